@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""Read the arrangement docs (docs/arrangements/NN_*.md) and check them against specs/.
+
+Each doc lists its sections as ``### Name (N bars)`` headings under
+``## Structure``, each with a ``**Chord Progression:** A - B - C (N beats
+per chord)`` line. ``parse_doc`` turns a doc into the song tuple
+``load_song`` returns, with sections shaped per ``song_spec.SECTION_SCHEMA``:
+
+- a meter named in the progression's note (``3.5 beats per chord, 7/8 time
+  feel``) becomes that section's ``ts_num``/``ts_den_pow``; otherwise the
+  song's ``**Time Signature:**`` applies;
+- a progression that is prose rather than chord symbols ("Ambient textures
+  ...") leaves ``prog`` empty;
+- docs carry no drum pattern or velocity, so those get the spec defaults.
+
+Parsed docs are cached by content hash in ``.cache/arrangements.json``.
+By default every doc is checked against its spec and every difference in
+tempo, section list, bars, progression, beats per chord and meter is
+reported. Sections are paired by name; a doc's unnumbered "Chorus" matches
+a spec's "Chorus 1". ``--build`` writes .rpp files from the docs via
+``make_rpp.build_rpp``, taking drum/velocity (and chords for prose
+progressions) from the matching spec section.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from drum_patterns import default_library
+from make_rpp import DEFAULT_VOICING, VOICING_MODES, build_rpp, select_songs
+from song_spec import SECTION_DEFAULTS, SPEC_DIR, Song, SpecError, load_song, spec_paths, validate_song
+from voicings import ChordError, parse_chord
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DOC_DIR = REPO_ROOT / "docs" / "arrangements"
+REAPER_DIR = REPO_ROOT / "reaper"
+# Local, untracked state (see .gitignore); the drift check never writes into the tracked tree.
+DEFAULT_CACHE = REPO_ROOT / ".cache" / "arrangements.json"
+# Bump when parse_doc's output changes, to drop cached results.
+PARSER_VERSION = 1
+
+DEFAULT_DRUM = "standard"
+
+_TITLE = re.compile(r"^# (.+?)(?: - Arrangement)?\s*$", re.MULTILINE)
+_FIELD = re.compile(r"^\*\*(Tempo|Key|Time Signature):\*\*\s*(.+?)\s*$", re.MULTILINE)
+_HEADING = re.compile(r"^### (.+?) \((\d+) bars?\)\s*$")
+_PROGRESSION = re.compile(r"\*\*Chord Progression:\*\*\s*(.+?)\s*$")
+_BPC = re.compile(r"(\d+(?:\.\d+)?) beats? per chord")
+_METER = re.compile(r"\b(\d+)/(\d+)\b")
+_KEY = re.compile(r"^([A-G][#b]?) (major|minor)\b")
+
+
+@dataclass
+class ArrangementDoc:
+    path: str
+    title: str
+    bpm: float | None
+    key: str | None  # tonic chord symbol, e.g. "Am"
+    sections: list[dict] = field(default_factory=list)
+
+
+def _number(text: str) -> float | int:
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def _meter(text: str) -> tuple[int, int] | None:
+    """The single ``N/D`` meter mentioned in ``text`` (None if none, or a choice of several)."""
+    meters = {(int(n), int(d)) for n, d in _METER.findall(text)}
+    if len(meters) != 1:
+        return None
+    num, den = meters.pop()
+    if den & (den - 1) or not num:
+        return None
+    return num, den.bit_length() - 1
+
+
+def _chords(text: str) -> list[str]:
+    """Chord symbols of a ``A - B - C`` progression, or [] when it is prose."""
+    symbols = [part.strip() for part in text.split(" - ")]
+    try:
+        for symbol in symbols:
+            parse_chord(symbol)
+    except ChordError:
+        return []
+    return symbols
+
+
+def parse_doc(text: str, path: str = "") -> ArrangementDoc:
+    title = _TITLE.search(text)
+    fields = dict(_FIELD.findall(text))
+    tempo = re.match(r"(\d+(?:\.\d+)?) BPM", fields.get("Tempo", ""))
+    key = _KEY.match(fields.get("Key", ""))
+    song_meter = _meter(fields.get("Time Signature", "").split("(")[0]) or (4, 2)
+    doc = ArrangementDoc(
+        path=path,
+        title=title.group(1) if title else Path(path).stem,
+        bpm=_number(tempo.group(1)) if tempo else None,
+        key=(key.group(1) + ("m" if key.group(2) == "minor" else "")) if key else None,
+    )
+
+    in_structure = False
+    section: dict | None = None
+    for line in text.splitlines():
+        if line.startswith("## "):
+            in_structure = line[3:].strip() == "Structure"
+            section = None
+            continue
+        if not in_structure:
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            section = {
+                "name": heading.group(1).strip(),
+                "bars": int(heading.group(2)),
+                "prog": [],
+                "bpc": None,
+                "drum": DEFAULT_DRUM,
+                "vel": SECTION_DEFAULTS["vel"],
+                "ts_num": song_meter[0],
+                "ts_den_pow": song_meter[1],
+            }
+            doc.sections.append(section)
+            continue
+        progression = _PROGRESSION.search(line)
+        if progression and section is not None:
+            chords, _, note = progression.group(1).partition("(")
+            section["prog"] = _chords(chords.strip())
+            bpc = _BPC.search(note)
+            section["bpc"] = _number(bpc.group(1)) if bpc else None
+            meter = _meter(note)
+            if meter:
+                section["ts_num"], section["ts_den_pow"] = meter
+    return doc
+
+
+# --- cache ------------------------------------------------------------------
+
+
+def load_cache(path: Path) -> dict:
+    try:
+        cache = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return cache.get("docs", {}) if cache.get("version") == PARSER_VERSION else {}
+
+
+def save_cache(path: Path, docs: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": PARSER_VERSION, "docs": docs}, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load_docs(paths: list[Path], cache_path: Path | None = DEFAULT_CACHE) -> tuple[list[ArrangementDoc], int]:
+    """Parse ``paths``, reusing cached results for unchanged content; returns (docs, parsed count)."""
+    cache = load_cache(cache_path) if cache_path else {}
+    # Entries for docs outside this run are kept; stale ones for these docs are dropped.
+    names = {path.name for path in paths}
+    fresh = {digest: entry for digest, entry in cache.items() if entry["path"] not in names}
+    docs = []
+    parsed = 0
+    for path in paths:
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        entry = cache.get(digest)
+        if entry is None or entry["path"] != path.name:
+            entry = asdict(parse_doc(data.decode("utf-8"), path.name))
+            parsed += 1
+        fresh[digest] = entry
+        docs.append(ArrangementDoc(**entry))
+    if cache_path and fresh != cache:
+        save_cache(cache_path, fresh)
+    return docs, parsed
+
+
+def doc_paths(doc_dir: Path = DOC_DIR) -> list[Path]:
+    """Song docs (``NN_*.md``) in album order."""
+    return sorted(doc_dir.glob("[0-9][0-9]_*.md"))
+
+
+# --- comparison -------------------------------------------------------------
+
+
+def _base_name(name: str) -> str:
+    return re.sub(r" 1$", "", name.strip()).lower()
+
+
+def pair_sections(doc_sections: list[dict], spec_sections: list[dict]) -> list[tuple[dict | None, dict | None]]:
+    """Line up doc and spec sections by name; unmatched ones pair with None."""
+    a = [_base_name(s["name"]) for s in doc_sections]
+    b = [_base_name(s["name"]) for s in spec_sections]
+    pairs: list[tuple[dict | None, dict | None]] = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag in ("equal", "replace") and i2 - i1 == j2 - j1:
+            pairs.extend(zip(doc_sections[i1:i2], spec_sections[j1:j2]))
+            continue
+        pairs.extend((s, None) for s in doc_sections[i1:i2])
+        pairs.extend((None, s) for s in spec_sections[j1:j2])
+    return pairs
+
+
+def drift(doc: ArrangementDoc, song: Song) -> list[str]:
+    """Every way ``doc`` disagrees with the spec ``song``."""
+    _filename, title, bpm, sections = song
+    problems = []
+    if doc.title != title:
+        problems.append(f"title: doc {doc.title!r}, spec {title!r}")
+    if doc.bpm is None:
+        problems.append(f"tempo: doc gives none, spec {bpm:g} BPM")
+    elif doc.bpm != bpm:
+        problems.append(f"tempo: doc {doc.bpm:g} BPM, spec {bpm:g} BPM")
+
+    for d, s in pair_sections(doc.sections, sections):
+        if s is None:
+            problems.append(f"{d['name']}: only in the doc")
+            continue
+        if d is None:
+            problems.append(f"{s['name']}: only in the spec")
+            continue
+        where = s["name"]
+        if _base_name(d["name"]) != _base_name(s["name"]):
+            problems.append(f"{where}: name: doc {d['name']!r}")
+        if d["bars"] != s["bars"]:
+            problems.append(f"{where}: bars: doc {d['bars']}, spec {s['bars']}")
+        if not d["prog"]:
+            problems.append(f"{where}: chords: doc gives none, spec {' - '.join(s['prog'])}")
+        elif d["prog"] != s["prog"]:
+            problems.append(f"{where}: chords: doc {' - '.join(d['prog'])}, spec {' - '.join(s['prog'])}")
+        if d["bpc"] is not None and d["bpc"] != s["bpc"]:
+            problems.append(f"{where}: beats per chord: doc {d['bpc']:g}, spec {s['bpc']:g}")
+        doc_meter, spec_meter = (d["ts_num"], d["ts_den_pow"]), (s["ts_num"], s.get("ts_den_pow", 2))
+        if doc_meter != spec_meter:
+            problems.append(
+                f"{where}: meter: doc {doc_meter[0]}/{1 << doc_meter[1]}, spec {spec_meter[0]}/{1 << spec_meter[1]}"
+            )
+    return problems
+
+
+def doc_song(doc: ArrangementDoc, spec: Song | None, filename: str, drums: set[str] | None = None) -> Song:
+    """The song the doc describes, ready for ``build_rpp``.
+
+    Drum pattern, velocity and the numbered name ("Chorus 1") come from the
+    matching spec section, so a doc in step with its spec builds the same
+    file as the spec does. A prose progression takes the spec's chords, else
+    the doc's key as a drone; a missing tempo or beats-per-chord falls back
+    to the spec as well.
+    """
+    matched = {id(d): s for d, s in pair_sections(doc.sections, spec[3] if spec else []) if d is not None}
+    sections = []
+    for sec in doc.sections:
+        other = matched.get(id(sec))
+        sec = dict(sec)
+        if other is not None:
+            sec["drum"], sec["vel"] = other["drum"], other.get("vel", SECTION_DEFAULTS["vel"])
+            if _base_name(sec["name"]) == _base_name(other["name"]):
+                sec["name"] = other["name"]  # "Chorus" -> "Chorus 1", keeping the spec's GUIDs
+        if not sec["prog"]:
+            sec["prog"] = list(other["prog"]) if other else [doc.key] if doc.key else []
+        if sec["bpc"] is None:
+            sec["bpc"] = other["bpc"] if other else sec["ts_num"] * 4 / (1 << sec["ts_den_pow"])
+        sections.append(sec)
+    data = {
+        "title": doc.title,
+        "bpm": doc.bpm if doc.bpm is not None else spec[2] if spec else None,
+        "sections": sections,
+    }
+    errors = validate_song(data, drums)
+    if errors:
+        raise SpecError(f"{doc.path}:\n  " + "\n  ".join(errors))
+    return filename, data["title"], data["bpm"], sections
+
+
+def doc_filename(doc_path: str, specs: dict[str, Path], title: str) -> str:
+    """Spec stem with the doc's ``NN`` prefix, else ``NN_Title_Words``."""
+    number = Path(doc_path).name.split("_", 1)[0]
+    if number in specs:
+        return specs[number].stem
+    return f"{number}_" + re.sub(r"[^A-Za-z0-9]+", "_", title).strip("_")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--doc-dir", type=Path, default=DOC_DIR, help="Directory of arrangement docs (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--spec-dir", type=Path, default=SPEC_DIR, help="Directory of per-song spec files (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--cache", type=Path, default=DEFAULT_CACHE, help="Parsed-doc cache file (default: %(default)s)"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Parse every doc without reading or writing the cache")
+    parser.add_argument(
+        "--build", action="store_true", help="Write .rpp files from the docs instead of checking them"
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, default=REAPER_DIR, help="Directory for --build output (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--voicing",
+        choices=VOICING_MODES,
+        default=DEFAULT_VOICING,
+        help="Chord voicing mode for --build, as for make_rpp.py (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--song",
+        action="append",
+        default=[],
+        metavar="SONG",
+        help="Only this song, e.g. 07_rise_of_neon_dawn or 07 (repeatable)",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    t0 = time.perf_counter()
+    paths = select_songs(doc_paths(args.doc_dir), args.song, key=lambda p: p.stem)
+    docs, parsed = load_docs(paths, None if args.no_cache else args.cache)
+    specs = {p.name.split("_", 1)[0]: p for p in spec_paths(args.spec_dir)}
+    drums = set(default_library().names())
+
+    failures = 0
+    if args.build:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+    for doc in docs:
+        spec_path = specs.get(doc.path.split("_", 1)[0])
+        spec = load_song(spec_path, drums) if spec_path else None
+        filename = doc_filename(doc.path, specs, doc.title)
+        if args.build:
+            try:
+                song = doc_song(doc, spec, filename, drums)
+            except SpecError as exc:
+                print(f"✗ {doc.path}: {exc}")
+                failures += 1
+                continue
+            total_secs = build_rpp(str(args.output_dir), *song, voicing_mode=args.voicing)
+            print(f"✓ {filename}.rpp  from {doc.path}  ({total_secs / 60:.1f} min, {song[2]:g} BPM)")
+            continue
+        if spec is None:
+            print(f"✗ {doc.path}: no spec in {args.spec_dir}")
+            failures += 1
+            continue
+        problems = drift(doc, spec)
+        if problems:
+            failures += 1
+            print(f"✗ {doc.path} vs {spec_path.name}:")
+            for problem in problems:
+                print(f"    - {problem}")
+        else:
+            print(f"✓ {doc.path} matches {spec_path.name}")
+
+    elapsed = (time.perf_counter() - t0) * 1000
+    verb = "built" if args.build else "in step with the specs"
+    print(f"\n{len(docs) - failures} of {len(docs)} docs {verb}; {parsed} parsed, {len(docs) - parsed} cached  ({elapsed:.1f} ms)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
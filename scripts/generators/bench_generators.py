@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""Benchmark the generator and QC pipeline, keeping a JSON history with a regression check.
+
+Stages, each timed over ``--repeat`` runs (the minimum is what counts):
+
+- ``events``   spec -> chord/drum note events (``make_midi.song_notes``)
+- ``rpp_text`` events -> .rpp text in memory (``make_rpp.iter_rpp``)
+- ``write``    ``make_rpp.build_rpp`` to a temporary directory
+- ``parse``    ``rpp_chunks.parse_rpp`` over the generated projects
+- ``template`` v01 template applied to every song (``apply_to_song``)
+- ``qc``       ``qc_v01_template.check_project`` on the templated projects
+- ``plan``     ``plan_renders.plan_project`` on the templated projects
+- ``merge``    ``merge_rpp.merge`` of each templated project with itself
+
+Suites:
+
+- ``album``  the real songs in specs/ (default)
+- ``songs``  ``--songs`` synthetic songs cycled from the album (default 1000)
+- ``long``   one song whose first section is ``--bars`` bars long (default 10000)
+- ``wide``   a templated project padded to ``--tracks`` tracks (default 500)
+
+Chord parsing/voicing caches are cleared before every run, so each run
+measures a cold build. Results are appended to ``bench_history.json``;
+each stage is compared with the median of its last ``--window`` results on
+the same host and Python at the same workload size, and ``--check`` exits 1 when one is slower by
+more than ``--threshold``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import voicings
+from build_v01_static_bloom_template import apply_to_song, compile_template
+from make_midi import song_notes
+from make_rpp import MidiPool, build_rpp, iter_rpp, section_starts
+from merge_rpp import merge
+from plan_renders import plan_project
+from qc_v01_template import check_project
+from rpp_chunks import parse_rpp
+from rpp_guid import DEFAULT_GUID_SEED, guid_factory
+from song_spec import SPEC_DIR, load_song, spec_paths
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_HISTORY = REPO_ROOT / "bench_history.json"
+SUITES = ("album", "songs", "long", "wide")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_WINDOW = 5
+
+
+@dataclass
+class Result:
+    suite: str
+    stage: str
+    units: int  # songs or projects processed per run
+    size: int  # the suite's workload size (songs, bars or tracks); only equal sizes are compared
+    runs: list[float]
+
+    @property
+    def key(self) -> str:
+        return f"{self.suite}/{self.stage}"
+
+    @property
+    def best(self) -> float:
+        return min(self.runs)
+
+
+def cold() -> None:
+    """Drop the chord caches so every run pays for parsing and voicing again."""
+    for fn in (voicings.parse_chord, voicings.voicing, voicings.chord_candidates, voicings._step):
+        fn.cache_clear()
+
+
+def timed(fn: Callable[[], object], repeat: int) -> list[float]:
+    runs = []
+    for _ in range(repeat):
+        cold()
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return runs
+
+
+# --- workloads ----------------------------------------------------------------
+
+
+def album_songs(spec_dir: Path = SPEC_DIR) -> list[tuple]:
+    return [load_song(path) for path in spec_paths(spec_dir)]
+
+
+def synthetic_songs(album: list[tuple], count: int) -> list[tuple]:
+    """``count`` songs cycled from the album, each with its own filename (and so GUIDs)."""
+    out = []
+    for i in range(count):
+        filename, title, bpm, sections = album[i % len(album)]
+        out.append((f"S{i:04d}_{filename.split('_', 1)[1]}", title, bpm, [dict(s) for s in sections]))
+    return out
+
+
+def long_song(album: list[tuple], bars: int) -> tuple:
+    filename, title, bpm, sections = album[0]
+    sections = [dict(s) for s in sections]
+    sections[0]["bars"] = bars
+    return f"L_{filename}", title, bpm, sections
+
+
+def wide_project(text: str, tracks: int) -> str:
+    """Pad a project with copies of its own tracks (fresh names) until it has ``tracks``."""
+    project = parse_rpp(text)
+    last = project.tracks[-1]
+    bodies = [t.text for t in project.tracks]
+    extra = []
+    for i in range(max(0, tracks - len(bodies))):
+        body = bodies[i % len(bodies)]
+        name = project.tracks[i % len(bodies)].name or "track"
+        extra.append(body.replace(f'NAME "{name}"', f'NAME "{name} {i}"', 1))
+    data = project.decode(0, last.end)
+    return data + "\n" + "\n".join(extra) + project.decode(last.end, len(project.data))
+
+
+def rpp_texts(songs: list[tuple]) -> list[str]:
+    out = []
+    for filename, _title, bpm, sections in songs:
+        guid = guid_factory("stable", filename, seed=DEFAULT_GUID_SEED)
+        out.append("\n".join(iter_rpp(filename, bpm, sections, guid, pool=MidiPool(guid))))
+    return out
+
+
+# --- stages ---------------------------------------------------------------------
+
+
+def generator_stages(songs: list[tuple], workdir: Path, with_write: bool = True) -> dict[str, Callable[[], object]]:
+    for song in songs:
+        section_starts(song[3])
+    texts: list[str] = []
+
+    def events() -> None:
+        for _filename, _title, _bpm, sections in songs:
+            starts, _ = section_starts(sections)
+            song_notes(sections, starts)
+
+    def rpp_text() -> None:
+        texts[:] = rpp_texts(songs)
+
+    def write() -> None:
+        for filename, title, bpm, sections in songs:
+            build_rpp(str(workdir), filename, title, bpm, sections)
+
+    def parse() -> None:
+        for text in texts:
+            parse_rpp(text)
+
+    stages = {"events": events, "rpp_text": rpp_text}
+    if with_write:
+        stages["write"] = write
+    stages["parse"] = parse
+    return stages
+
+
+def project_stages(songs: list[tuple], workdir: Path, tracks: int = 0) -> dict[str, Callable[[], object]]:
+    """template / qc / plan / merge over templated versions of ``songs``."""
+    template = compile_template()
+    paths: list[Path] = []
+    data: list[bytes] = []
+
+    def apply() -> None:
+        paths.clear()
+        data.clear()
+        for song in songs:
+            filename, text = apply_to_song(template, song, "stable", DEFAULT_GUID_SEED)
+            if tracks:
+                text = wide_project(text, tracks)
+            path = workdir / f"{filename}.rpp"
+            path.write_text(text + "\n", encoding="utf-8")
+            paths.append(path)
+            data.append(path.read_bytes())
+
+    def qc() -> None:
+        for path in paths:
+            check_project(path)
+
+    def plan() -> None:
+        for path in paths:
+            plan_project(path)
+
+    def merge_all() -> None:
+        for blob in data:
+            merge(blob, blob, blob)
+
+    return {"template": apply, "qc": qc, "plan": plan, "merge": merge_all}
+
+
+def run_suite(suite: str, args: argparse.Namespace, album: list[tuple]) -> list[Result]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix=f"bench_{suite}_") as tmp:
+        workdir = Path(tmp)
+        size = {"songs": args.songs, "long": args.bars, "wide": args.tracks}.get(suite, len(album))
+        if suite == "album":
+            songs = album
+            stages = {**generator_stages(songs, workdir), **project_stages(songs, workdir)}
+        elif suite == "songs":
+            songs = synthetic_songs(album, args.songs)
+            stages = generator_stages(songs, workdir, with_write=False)
+        elif suite == "long":
+            songs = [long_song(album, args.bars)]
+            stages = generator_stages(songs, workdir)
+        else:
+            songs = album[:1]
+            stages = project_stages(songs, workdir, tracks=args.tracks)
+        for stage, fn in stages.items():
+            runs = timed(fn, args.repeat)
+            results.append(Result(suite, stage, len(songs), size, runs))
+            print(f"  {suite + '/' + stage:<18} {len(songs):>6} × {min(runs) * 1000:>10.1f} ms", flush=True)
+    return results
+
+
+# --- history ----------------------------------------------------------------------
+
+
+def host_key() -> str:
+    return f"{platform.node()}|{platform.machine()}|py{platform.python_version()}"
+
+
+def git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def load_history(path: Path) -> dict:
+    try:
+        history = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"runs": []}
+    history.setdefault("runs", [])
+    return history
+
+
+def save_history(path: Path, history: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(history, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def baselines(history: dict, host: str, window: int) -> dict[tuple[str, int], float]:
+    """(stage key, size) -> median of its best times over the last ``window`` runs on ``host``."""
+    seen: dict[tuple[str, int], list[float]] = {}
+    for run in reversed(history["runs"]):
+        if run.get("host") != host:
+            continue
+        for key, entry in run["results"].items():
+            values = seen.setdefault((key, entry.get("size", 0)), [])
+            if len(values) < window:
+                values.append(entry["best"])
+    return {key: statistics.median(values) for key, values in seen.items()}
+
+
+def regressions(results: list[Result], base: dict[tuple[str, int], float], threshold: float) -> list[str]:
+    out = []
+    for r in results:
+        ref = base.get((r.key, r.size))
+        if ref is not None and r.best > ref * (1 + threshold):
+            out.append(f"{r.key}: {r.best * 1000:.1f} ms vs baseline {ref * 1000:.1f} ms (+{r.best / ref - 1:.0%})")
+    return out
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--suite",
+        action="append",
+        choices=SUITES,
+        default=[],
+        help="Suite to run (repeatable; default: album)",
+    )
+    parser.add_argument("--all", action="store_true", help="Run every suite")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest counts (default: %(default)s)")
+    parser.add_argument("--songs", type=int, default=1000, help="Song count for the songs suite (default: %(default)s)")
+    parser.add_argument("--bars", type=int, default=10000, help="Section length for the long suite (default: %(default)s)")
+    parser.add_argument("--tracks", type=int, default=500, help="Track count for the wide suite (default: %(default)s)")
+    parser.add_argument(
+        "--spec-dir", type=Path, default=SPEC_DIR, help="Directory of per-song spec files (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--history", type=Path, default=DEFAULT_HISTORY, help="JSON history file (default: %(default)s)"
+    )
+    parser.add_argument("--no-save", action="store_true", help="Do not append this run to the history")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Slowdown over the baseline that counts as a regression (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WINDOW,
+        help="Past runs whose median is the baseline (default: %(default)s)",
+    )
+    parser.add_argument("--check", action="store_true", help="Exit 1 if any stage regressed")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    suites = list(SUITES) if args.all else args.suite or ["album"]
+    album = album_songs(args.spec_dir)
+    history = load_history(args.history)
+    host = host_key()
+    base = baselines(history, host, args.window)
+
+    t0 = time.perf_counter()
+    results: list[Result] = []
+    for suite in suites:
+        print(f"{suite}:")
+        results.extend(run_suite(suite, args, album))
+
+    print(f"\n{'stage':<18} {'best ms':>10} {'median ms':>10} {'baseline':>10} {'change':>8}")
+    for r in results:
+        ref = base.get((r.key, r.size))
+        change = f"{r.best / ref - 1:+.0%}" if ref else "new"
+        baseline = f"{ref * 1000:.1f}" if ref else "-"
+        print(
+            f"{r.key:<18} {r.best * 1000:>10.1f} {statistics.median(r.runs) * 1000:>10.1f} {baseline:>10} {change:>8}"
+        )
+
+    if not args.no_save:
+        history["runs"].append(
+            {
+                "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "revision": git_revision(),
+                "host": host,
+                "repeat": args.repeat,
+                "results": {
+                    r.key: {"units": r.units, "size": r.size, "best": round(r.best, 6), "median": round(statistics.median(r.runs), 6)}
+                    for r in results
+                },
+            }
+        )
+        save_history(args.history, history)
+
+    slow = regressions(results, base, args.threshold)
+    print(f"\n{len(results)} stages in {time.perf_counter() - t0:.1f} s; {len(slow)} regression(s) over {args.threshold:.0%}")
+    for line in slow:
+        print(f"  - {line}")
+    return 1 if slow and args.check else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,20 +1,50 @@
 #!/usr/bin/env python3
-"""Build the v01 core-balanced template and apply it to Static Bloom."""
+"""Build the v01 core-balanced template and apply it to album songs.
+
+The track layout (``build_track_specs`` + ``add_routing``) is compiled once
+into a :class:`CompiledTemplate`: every non-scaffold track is rendered to
+text with numbered GUID and scaffold slots. Applying it to a song only fills
+those slots, so rolling the standard out to the whole album is one pass of
+string joins per song (optionally across worker processes). Each song's
+scaffold comes straight from its spec via ``make_rpp``, so re-running is
+idempotent even after a project has been templated.
+
+With no arguments only ``01_Static_Bloom`` is built (the pilot); ``--all``
+or ``--song`` apply the same template to other songs. Those songs get only
+``reaper/NN_Song.v01_template.rpp``: their active ``reaper/NN_Song.rpp``
+holds hand work (recordings, FX, automation, sends), so merge the template
+into it with merge_rpp.py, or pass ``--overwrite-active`` to replace it.
+"""
 
 from __future__ import annotations
 
+import argparse
+import os
 import re
-import uuid
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 
+import instrument
+from drum_patterns import default_library
+from make_rpp import MidiPool, iter_rpp, section_starts, select_songs, spec_name
+from rpp_chunks import parse_rpp
+from rpp_guid import DEFAULT_GUID_MODE, DEFAULT_GUID_SEED, GUID_MODES, GuidFn, guid_factory
+from song_spec import SPEC_DIR, load_song, spec_paths
+
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
-SOURCE_RPP = REPO_ROOT / "reaper" / "01_Static_Bloom.rpp"
-TEMPLATE_DIR = REPO_ROOT / "reaper" / "templates"
+REAPER_DIR = REPO_ROOT / "reaper"
+TEMPLATE_DIR = REAPER_DIR / "templates"
 TEMPLATE_RPP = TEMPLATE_DIR / "lalo_standard_v01.rpp"
-PILOT_TEMPLATE_RPP = REPO_ROOT / "reaper" / "01_Static_Bloom.v01_template.rpp"
-PILOT_ACTIVE_RPP = REPO_ROOT / "reaper" / "01_Static_Bloom.rpp"
+# The song the standalone template file is taken from.
+PILOT_SONG = "01_Static_Bloom"
+TEMPLATE_VERSION = "v01"
+
+# Names and folder positions given to a song's two scaffold tracks (chords, drums).
+SCAFFOLD_SLOTS = (("arr_chords_scaffold", "normal"), ("arr_drums_scaffold", "end"))
+_SLOT = re.compile(r"\x00(\d+)\x00|\x01(\d+)\x01")
 
 
 @dataclass
@@ -30,39 +60,16 @@ class TrackSpec:
     auxrecv_from: list[str] = field(default_factory=list)
 
 
-def new_guid() -> str:
-    return str(uuid.uuid4()).upper()
-
-
 def split_project(text: str) -> tuple[list[str], list[str], list[str]]:
-    lines = text.splitlines()
-    track_ranges: list[tuple[int, int]] = []
-    i = 0
-    while i < len(lines):
-        if lines[i].startswith("  <TRACK "):
-            start = i
-            depth = 1
-            i += 1
-            while i < len(lines):
-                s = lines[i].strip()
-                if s.startswith("<"):
-                    depth += 1
-                elif s == ">":
-                    depth -= 1
-                    if depth == 0:
-                        track_ranges.append((start, i))
-                        break
-                i += 1
-        i += 1
-
-    if not track_ranges:
+    project = parse_rpp(text)
+    if not project.tracks:
         raise RuntimeError("No TRACK chunks found in source RPP")
 
-    first_start = track_ranges[0][0]
-    last_end = track_ranges[-1][1]
-    header = lines[:first_start]
-    tracks = ["\n".join(lines[s : e + 1]) for s, e in track_ranges]
-    footer = lines[last_end + 1 :]
+    first_start = project.tracks[0].start
+    last_end = project.tracks[-1].end
+    header = project.decode(0, first_start).splitlines()
+    tracks = [track.text for track in project.tracks]
+    footer = project.decode(last_end, len(project.data)).splitlines()[1:]
     return header, tracks, footer
 
 
@@ -74,9 +81,9 @@ def folder_tokens(kind: str) -> tuple[str, str]:
     return "0 0", "0 0 0 0 0"
 
 
-def make_track_chunk(spec: TrackSpec, auxrecv_lines: list[str]) -> str:
+def make_track_chunk(spec: TrackSpec, auxrecv_lines: list[str], guid: GuidFn) -> str:
     isbus, buscomp = folder_tokens(spec.kind)
-    track_guid = new_guid()
+    track_guid = guid(spec.name, "track")
     lines = [
         f"  <TRACK {{{track_guid}}}",
         f'    NAME "{spec.name}"',
@@ -96,7 +103,7 @@ def make_track_chunk(spec: TrackSpec, auxrecv_lines: list[str]) -> str:
         "    INQ 0 0 0 0.5 100 0 0 100",
         "    NCHAN 2",
         f"    FX {1 if spec.fxchain else 0}",
-        f"    TRACKID {{{new_guid()}}}",
+        f"    TRACKID {{{guid(spec.name, 'trackid')}}}",
         "    PERF 0",
         "    MIDIOUT -1",
     ]
@@ -200,8 +207,8 @@ def build_track_specs(scaffold_tracks: list[str]) -> list[TrackSpec]:
         ],
     )
 
-    scaffold_chords = tweak_scaffold_chunk(scaffold_tracks[0], "arr_chords_scaffold", "normal")
-    scaffold_drums = tweak_scaffold_chunk(scaffold_tracks[1], "arr_drums_scaffold", "end")
+    scaffold_chords = tweak_scaffold_chunk(scaffold_tracks[0], *SCAFFOLD_SLOTS[0])
+    scaffold_drums = tweak_scaffold_chunk(scaffold_tracks[1], *SCAFFOLD_SLOTS[1])
     add_folder(
         "70_EDIT_BUILDER",
         [
@@ -255,7 +262,7 @@ def add_routing(specs: list[TrackSpec]) -> None:
         spec.auxrecv_from = [src for src in inputs if src in name_to_index]
 
 
-def emit_project(header: list[str], footer: list[str], specs: list[TrackSpec]) -> str:
+def emit_tracks(specs: list[TrackSpec], guid: GuidFn) -> list[str]:
     name_to_index = {s.name: idx for idx, s in enumerate(specs)}
 
     track_chunks = []
@@ -267,34 +274,173 @@ def emit_project(header: list[str], footer: list[str], specs: list[TrackSpec]) -
         for src in spec.auxrecv_from:
             src_idx = name_to_index[src]
             aux_lines.append(f"    AUXRECV {src_idx} 0 1 0 0 0 0 0 1 -1:U 0 -1 ''")
-        track_chunks.append(make_track_chunk(spec, aux_lines))
+        track_chunks.append(make_track_chunk(spec, aux_lines, guid))
+    return track_chunks
 
-    full = []
-    full.extend(header)
-    full.extend(track_chunks)
-    full.extend(footer)
-    return "\n".join(full) + "\n"
 
+@dataclass
+class CompiledTemplate:
+    """A track layout rendered once; ``fragments`` alternate with ``slots``.
 
-def main() -> None:
-    src_text = SOURCE_RPP.read_text(encoding="utf-8")
-    header, tracks, footer = split_project(src_text)
-    if len(tracks) < 2:
-        raise RuntimeError("Expected at least two scaffold tracks in source RPP")
+    A slot is ``("guid", parts)`` for a GUID drawn from the song's
+    ``guid(*parts)`` or ``("scaffold", i)`` for the song's i-th scaffold track.
+    """
+
+    version: str
+    fragments: list[str]
+    slots: list[tuple]
+
+    def apply(self, header: list[str], footer: list[str], scaffolds: list[str], guid: GuidFn) -> str:
+        tweaked = [tweak_scaffold_chunk(chunk, *slot) for chunk, slot in zip(scaffolds, SCAFFOLD_SLOTS)]
+        out = [self.fragments[0]]
+        for (kind, value), fragment in zip(self.slots, self.fragments[1:]):
+            out.append(guid(*value) if kind == "guid" else tweaked[value])
+            out.append(fragment)
+        return "\n".join([*header, "".join(out), *footer]) + "\n"
+
+
+def compile_template(version: str = TEMPLATE_VERSION) -> CompiledTemplate:
+    """Run the layout builders once, leaving GUIDs and scaffold tracks as slots."""
+    guid_parts: list[tuple] = []
+
+    def guid_slot(*parts: object) -> str:
+        guid_parts.append(parts)
+        return f"\x00{len(guid_parts) - 1}\x00"
 
-    scaffolds = tracks[:2]
-    specs = build_track_specs(scaffolds)
+    specs = build_track_specs([f"\x01{i}\x01" for i in range(len(SCAFFOLD_SLOTS))])
     add_routing(specs)
-    out_text = emit_project(header, footer, specs)
+    pieces = _SLOT.split("\n".join(emit_tracks(specs, guid_slot)))
+    # re.split yields text, guid index, scaffold index, text, ...
+    fragments = pieces[0::3]
+    slots = [
+        ("guid", guid_parts[int(g)]) if g is not None else ("scaffold", int(sc))
+        for g, sc in zip(pieces[1::3], pieces[2::3])
+    ]
+    return CompiledTemplate(version, fragments, slots)
+
+
+def scaffold_text(song: tuple, guid_mode: str, guid_seed: str) -> str:
+    """The song's make_rpp scaffold (default options), generated from its spec in memory."""
+    filename, _title, bpm, sections = song
+    section_starts(sections)
+    guid = instrument.wrap(guid_factory(guid_mode, filename, seed=guid_seed), "guid")
+    return "\n".join(iter_rpp(filename, bpm, sections, guid, pool=MidiPool(guid)))
+
+
+def apply_to_song(
+    template: CompiledTemplate, song: tuple, guid_mode: str, guid_seed: str
+) -> tuple[str, str]:
+    """Return (song filename, templated project text)."""
+    filename = song[0]
+    with instrument.span("scaffold"):
+        scaffold = scaffold_text(song, guid_mode, guid_seed)
+    with instrument.span("split"):
+        header, tracks, footer = split_project(scaffold)
+    if len(tracks) < len(SCAFFOLD_SLOTS):
+        raise RuntimeError(f"Expected at least {len(SCAFFOLD_SLOTS)} scaffold tracks in {filename}")
+    guid = instrument.wrap(guid_factory(guid_mode, filename, template.version, seed=guid_seed), "guid")
+    with instrument.span("apply"):
+        text = template.apply(header, footer, tracks[: len(SCAFFOLD_SLOTS)], guid)
+    return filename, text
+
+
+def write_song(
+    template: CompiledTemplate,
+    path: Path,
+    guid_mode: str,
+    guid_seed: str,
+    reaper_dir: Path,
+    overwrite_active: bool = False,
+) -> list[Path]:
+    """Worker entry point: template one song and write its project files."""
+    with instrument.span(f"song {path.stem}"):
+        with instrument.span("load spec"):
+            song = load_song(path, set(default_library().names()))
+        filename, text = apply_to_song(template, song, guid_mode, guid_seed)
+        written = [reaper_dir / f"{filename}.{template.version}_template.rpp"]
+        if filename == PILOT_SONG or overwrite_active:
+            written.append(reaper_dir / f"{filename}.rpp")
+        if filename == PILOT_SONG and reaper_dir == REAPER_DIR:
+            TEMPLATE_DIR.mkdir(parents=True, exist_ok=True)
+            written.insert(0, TEMPLATE_RPP)
+        with instrument.span("write"):
+            for out in written:
+                instrument.count(bytes=out.write_text(text, encoding="utf-8"))
+    return written
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--guids",
+        choices=GUID_MODES,
+        default=DEFAULT_GUID_MODE,
+        help="stable: uuid5 GUIDs so rebuilds are byte-identical; random: fresh uuid4 (default: %(default)s)",
+    )
+    parser.add_argument("--guid-seed", default=DEFAULT_GUID_SEED, help="Seed mixed into stable GUIDs")
+    parser.add_argument("--all", action="store_true", help="Apply the template to every song spec")
+    parser.add_argument(
+        "--song",
+        action="append",
+        default=[],
+        metavar="SONG",
+        help="Apply the template to this song, e.g. 07_Rise_of_Neon_Dawn or 07 (repeatable)",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=0, help="Worker processes; 0 uses every core (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--spec-dir", type=Path, default=SPEC_DIR, help="Directory of per-song spec files (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, default=REAPER_DIR, help="Directory for templated projects (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--overwrite-active",
+        action="store_true",
+        help="Also replace reaper/NN_Song.rpp of non-pilot songs (discards hand edits; default: template file only)",
+    )
+    instrument.add_arguments(parser, "build_v01_template")
+    return parser.parse_args()
+
 
-    TEMPLATE_DIR.mkdir(parents=True, exist_ok=True)
-    TEMPLATE_RPP.write_text(out_text, encoding="utf-8")
-    PILOT_TEMPLATE_RPP.write_text(out_text, encoding="utf-8")
-    PILOT_ACTIVE_RPP.write_text(out_text, encoding="utf-8")
+def main() -> None:
+    args = parse_args()
+    t0 = time.perf_counter()
+    paths = spec_paths(args.spec_dir)
+    wanted = args.song or ([] if args.all else [PILOT_SONG])
+    paths = select_songs(paths, wanted, key=spec_name)
+
+    with instrument.session(args, "build_v01_template"):
+        with instrument.span("compile template"):
+            template = compile_template()
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        jobs = 1 if instrument.requested(args) else args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        jobs = min(jobs, len(paths)) or 1
+        if jobs > 1:
+            n = len(paths)
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(
+                    pool.map(
+                        write_song,
+                        [template] * n,
+                        paths,
+                        [args.guids] * n,
+                        [args.guid_seed] * n,
+                        [args.output_dir] * n,
+                        [args.overwrite_active] * n,
+                    )
+                )
+        else:
+            results = [
+                write_song(template, path, args.guids, args.guid_seed, args.output_dir, args.overwrite_active)
+                for path in paths
+            ]
 
-    print(f"wrote {TEMPLATE_RPP}")
-    print(f"wrote {PILOT_TEMPLATE_RPP}")
-    print(f"wrote {PILOT_ACTIVE_RPP}")
+        for written in results:
+            for out in written:
+                print(f"wrote {out}")
+        print(f"\n{len(results)} song(s) on {template.version} in {(time.perf_counter() - t0) * 1000:.1f} ms")
 
 
 if __name__ == "__main__":
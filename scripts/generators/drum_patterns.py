@@ -0,0 +1,112 @@
+"""Data-driven drum pattern library.
+
+Patterns live in ``drum_patterns.json`` as one bar of hits each (note,
+beat offset within the bar, velocity, optional duration and
+``min_bar_len``). Each pattern is compiled once per bar length into a
+:class:`DrumTemplate` of array columns; a section is rendered by tiling the
+template ``bars`` times and adding the bar start to every offset.
+"""
+
+from __future__ import annotations
+
+import json
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain, repeat
+from operator import add
+from pathlib import Path
+
+from midi_events import NoteBuffer
+
+DEFAULT_LIBRARY = Path(__file__).with_name("drum_patterns.json")
+
+
+class UnknownPatternError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class DrumTemplate:
+    """One bar of a pattern, already filtered for a specific bar length."""
+
+    name: str
+    bar_len: float
+    pitch: array
+    offset: array
+    dur: array
+    vel: array
+
+    def render(self, bars: int) -> NoteBuffer:
+        n = len(self.pitch)
+        buf = NoteBuffer()
+        if not n or bars <= 0:
+            return buf
+        bar_starts = chain.from_iterable(repeat(bar * self.bar_len, n) for bar in range(bars))
+        buf.pitch = self.pitch * bars
+        buf.start = array("d", map(add, bar_starts, self.offset * bars))
+        buf.dur = self.dur * bars
+        buf.vel = self.vel * bars
+        return buf
+
+
+class PatternLibrary:
+    def __init__(self, patterns: dict[str, list[dict]], notes: dict[str, int], default_dur: float) -> None:
+        self.patterns = patterns
+        self.notes = notes
+        self.default_dur = default_dur
+        self._compiled: dict[tuple[str, float], DrumTemplate] = {}
+
+    @classmethod
+    def load(cls, path: Path | str) -> PatternLibrary:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        library = cls(data.get("patterns", {}), data.get("notes", {}), data.get("default_dur", 0.35))
+        for name in library.patterns:
+            library.validate(name)
+        return library
+
+    def names(self) -> list[str]:
+        return sorted(self.patterns)
+
+    def spec(self, name: str) -> list[dict]:
+        try:
+            return self.patterns[name]
+        except KeyError:
+            raise UnknownPatternError(
+                f"Unknown drum pattern {name!r}; known patterns: {', '.join(self.names())}"
+            ) from None
+
+    def validate(self, name: str) -> None:
+        for hit in self.spec(name):
+            note = hit.get("note")
+            if not isinstance(note, int) and note not in self.notes:
+                raise UnknownPatternError(f"Drum pattern {name!r} uses unknown note {note!r}")
+            if "beat" not in hit or "vel" not in hit:
+                raise UnknownPatternError(f"Drum pattern {name!r} has a hit without beat/vel: {hit}")
+
+    def compile(self, name: str, bar_len: float) -> DrumTemplate:
+        key = (name, bar_len)
+        template = self._compiled.get(key)
+        if template is None:
+            hits = [h for h in self.spec(name) if bar_len >= h.get("min_bar_len", 0)]
+            template = DrumTemplate(
+                name=name,
+                bar_len=bar_len,
+                pitch=array("i", (self.note_number(h["note"]) for h in hits)),
+                offset=array("d", (h["beat"] for h in hits)),
+                dur=array("d", (h.get("dur", self.default_dur) for h in hits)),
+                vel=array("i", (h["vel"] for h in hits)),
+            )
+            self._compiled[key] = template
+        return template
+
+    def note_number(self, note: int | str) -> int:
+        return note if isinstance(note, int) else self.notes[note]
+
+    def render(self, name: str, bars: int, bar_len: float) -> NoteBuffer:
+        return self.compile(name, bar_len).render(bars)
+
+
+@lru_cache(maxsize=None)
+def default_library() -> PatternLibrary:
+    return PatternLibrary.load(DEFAULT_LIBRARY)
@@ -0,0 +1,294 @@
+"""Seeded humanization of generated note events.
+
+A spec may give the song and any section a ``humanize`` object::
+
+    "humanize": {"timing": 0.02, "velocity": 6, "swing": 58,
+                 "drums": {"groove": "mpc_58", "accents": [8, 0, 4, 0]},
+                 "chords": {"curve": [0.9, 1.1]}}
+
+- ``timing``: largest timing offset, in beats (triangular distribution);
+- ``velocity``: largest velocity offset;
+- ``swing``: MPC-style swing percentage (50 = straight, 66 = triplet feel);
+  notes on the off-beats of the ``swing_unit`` grid (0.5 = eighths, the
+  default, or 0.25) are delayed;
+- ``groove``: a template from ``grooves.json``: per-step timing offsets (beats)
+  and velocity scales, cycled from the bar start every ``step`` beats;
+- ``accents``: velocity added on each quarter-note beat of the bar, cycled;
+- ``curve``: ``[start, end]`` velocity multipliers ramped across the section;
+- ``seed``: mixed into every random draw (default: the song's filename).
+
+Section keys override song keys, and a ``chords`` / ``drums`` object
+overrides the general keys for that track. Notes that start together (a
+chord hit) move and change level together. Each (seed, section, track) gets
+its own random stream, so editing one section never reshuffles another.
+
+The transforms run over :class:`NoteBuffer` columns: shifts and scales are
+computed once per distinct onset (a few dozen per section), all random
+values come from one ``randbytes`` call, and notes are updated with
+C-level ``map`` passes.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import repeat
+from operator import add, mod, mul, sub
+from pathlib import Path
+
+from midi_events import NoteBuffer
+
+DEFAULT_GROOVES = Path(__file__).with_name("grooves.json")
+TRACKS = ("chords", "drums")
+SWING_RANGE = (50, 75)
+SWING_UNITS = (0.25, 0.5)
+# Shortest note (beats) a shifted note is trimmed to.
+MIN_DUR = 0.01
+# Gap (beats) a note keeps before the next onset, if it had one; chord_slots leaves 0.05.
+KEEP_GAP = 0.05
+_GRID = 1e-6
+_UNIT = 1 / 65535
+# Velocity v is _VELOCITY[v + _VELOCITY_ZERO], clamped to 1-127; covers every value the
+# validated settings can produce (scales up to 2 x 2, accents and jitter up to +-64).
+_VELOCITY_ZERO = 256
+_VELOCITY = array("i", (min(max(v - _VELOCITY_ZERO, 1), 127) for v in range(1024)))
+
+
+class UnknownGrooveError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Groove:
+    step: float
+    timing: tuple[float, ...]
+    velocity: tuple[float, ...]
+
+
+class GrooveLibrary:
+    def __init__(self, grooves: dict[str, Groove]) -> None:
+        self.grooves = grooves
+
+    @classmethod
+    def load(cls, path: Path | str) -> GrooveLibrary:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        grooves = {}
+        for name, spec in data.get("grooves", {}).items():
+            if spec.get("step", 0) <= 0 or not spec.get("timing") or not spec.get("velocity"):
+                raise UnknownGrooveError(f"Groove {name!r} needs a positive step and timing/velocity lists")
+            if not all(0 <= v <= 2 for v in spec["velocity"]):
+                raise UnknownGrooveError(f"Groove {name!r} has a velocity scale outside 0-2")
+            grooves[name] = Groove(spec["step"], tuple(spec["timing"]), tuple(spec["velocity"]))
+        return cls(grooves)
+
+    def names(self) -> list[str]:
+        return sorted(self.grooves)
+
+    def get(self, name: str) -> Groove:
+        try:
+            return self.grooves[name]
+        except KeyError:
+            raise UnknownGrooveError(f"Unknown groove {name!r}; known grooves: {', '.join(self.names())}") from None
+
+
+@lru_cache(maxsize=None)
+def default_grooves() -> GrooveLibrary:
+    return GrooveLibrary.load(DEFAULT_GROOVES)
+
+
+@dataclass(frozen=True)
+class Humanize:
+    """Resolved settings for one track of one section; the defaults change nothing."""
+
+    timing: float = 0.0
+    velocity: float = 0.0
+    swing: float = 50.0
+    swing_unit: float = 0.5
+    groove: str | None = None
+    accents: tuple[int, ...] = ()
+    curve: tuple[float, float] = (1.0, 1.0)
+
+    @classmethod
+    def from_spec(cls, raw: dict, track: str) -> Humanize:
+        values = {k: v for k, v in raw.items() if k not in TRACKS and k != "seed"}
+        values.update(raw.get(track, {}))
+        values.pop("seed", None)
+        for key in ("accents", "curve"):
+            if key in values:
+                values[key] = tuple(values[key])
+        return cls(**values)
+
+    @property
+    def active(self) -> bool:
+        return self != _IDENTITY
+
+
+_IDENTITY = Humanize()
+
+# key -> (accepted types, check, what the value must be)
+_SETTINGS = {
+    "timing": ((int, float), lambda v: 0 <= v <= 0.5, "a number of beats from 0 to 0.5"),
+    "velocity": ((int, float), lambda v: 0 <= v <= 64, "a number from 0 to 64"),
+    "swing": (
+        (int, float),
+        lambda v: SWING_RANGE[0] <= v <= SWING_RANGE[1],
+        f"a percentage from {SWING_RANGE[0]} to {SWING_RANGE[1]}",
+    ),
+    "swing_unit": ((int, float), lambda v: v in SWING_UNITS, f"one of {SWING_UNITS}"),
+    "groove": ((str,), lambda v: v in default_grooves().grooves, "the name of a groove in grooves.json"),
+    "accents": (
+        (list,),
+        lambda v: bool(v) and all(_is_number(a, int) and -64 <= a <= 64 for a in v),
+        "a non-empty list of integers from -64 to 64",
+    ),
+    "curve": (
+        (list,),
+        lambda v: len(v) == 2 and all(_is_number(c) and 0 < c <= 2 for c in v),
+        "[start, end] multipliers above 0 and at most 2",
+    ),
+    "seed": ((str, int), lambda v: True, "a string or integer"),
+}
+
+
+def _is_number(value: object, *types: type) -> bool:
+    return isinstance(value, types or (int, float)) and not isinstance(value, bool)
+
+
+def validate(raw: object, where: str = "humanize", nested: bool = True) -> list[str]:
+    """Every problem in a ``humanize`` object (``nested`` allows chords/drums sub-objects)."""
+    if not isinstance(raw, dict):
+        return [f"{where} must be an object"]
+    errors = []
+    for key, value in raw.items():
+        if key in TRACKS and nested:
+            errors.extend(validate(value, f"{where}.{key}", nested=False))
+            continue
+        if key not in _SETTINGS or key in TRACKS:
+            errors.append(f"{where}: unknown key {key!r}")
+            continue
+        types, check, message = _SETTINGS[key]
+        if isinstance(value, bool) or not isinstance(value, types) or not check(value):
+            errors.append(f"{where}: {key!r} must be {message}")
+    return errors
+
+
+def merge(song: dict | None, section: dict | None, seed: str) -> dict:
+    """A section's effective ``humanize`` object: song keys, then the section's, per track too."""
+    song, section = song or {}, section or {}
+    out = {k: v for k, v in song.items() if k not in TRACKS}
+    out.update((k, v) for k, v in section.items() if k not in TRACKS)
+    for track in TRACKS:
+        if track in song or track in section:
+            out[track] = {**song.get(track, {}), **section.get(track, {})}
+    out.setdefault("seed", seed)
+    return out
+
+
+def grooves_used(raw: dict | None) -> set[str]:
+    """Names of the grooves a ``humanize`` object refers to, on any track."""
+    if not raw:
+        return set()
+    found = {raw[key]["groove"] for key in TRACKS if "groove" in raw.get(key, {})}
+    if "groove" in raw:
+        found.add(raw["groove"])
+    return found
+
+
+def _position_table(settings: Humanize, positions: set[int], groove: Groove | None) -> dict:
+    """Bar position (in micro-beats) -> (timing shift, velocity scale, velocity accent)."""
+    swing_shift = (settings.swing / 100 - 0.5) * 2 * settings.swing_unit
+    table = {}
+    for key in positions:
+        pos = key * _GRID
+        shift, scale, accent = 0.0, 1.0, 0
+        k = pos / settings.swing_unit
+        if swing_shift and abs(k - round(k)) < _GRID and round(k) % 2:
+            shift += swing_shift
+        if groove is not None:
+            k = pos / groove.step
+            if abs(k - round(k)) < _GRID:
+                shift += groove.timing[round(k) % len(groove.timing)]
+                scale *= groove.velocity[round(k) % len(groove.velocity)]
+        if settings.accents:
+            accent = settings.accents[int(pos + _GRID) % len(settings.accents)]
+        table[key] = (shift, scale, accent)
+    return table
+
+
+def apply(events: NoteBuffer, settings: Humanize, seed: str, bar_len: float, length: float) -> NoteBuffer:
+    """``events`` (section-relative beats) humanized; notes stay inside ``[0, length]``."""
+    if not len(events) or not settings.active:
+        return events
+    groove = default_grooves().get(settings.groove) if settings.groove else None
+
+    # Per distinct onset: position in the bar, in whole micro-beats so tiling noise cannot split a grid point.
+    onsets = sorted(set(events.start))
+    m = len(onsets)
+    positions = list(map(round, map(mul, map(mod, onsets, repeat(bar_len)), repeat(1 / _GRID))))
+    table = _position_table(settings, set(positions), groove)
+    grid_shift, grid_scale, accent = zip(*map(table.__getitem__, positions))
+
+    # Triangular jitter: difference of two uniform 16-bit draws per value.
+    draws = array("H", random.Random(seed).randbytes(8 * m))
+    if sys.byteorder == "big":
+        draws.byteswap()
+    t_jitter = map(mul, map(sub, draws[:m], draws[m : 2 * m]), repeat(settings.timing * _UNIT))
+    v_jitter = map(mul, map(sub, draws[2 * m : 3 * m], draws[3 * m :]), repeat(settings.velocity * _UNIT))
+
+    # Clamp into the section; only onsets within reach of an edge can leave it.
+    moved = list(map(add, onsets, map(add, grid_shift, t_jitter)))
+    reach = max(map(abs, map(sub, moved, onsets)))
+    last = max(length - MIN_DUR, 0.0)
+    for k in range(m):
+        if onsets[k] >= reach:
+            break
+        if moved[k] < 0.0:
+            moved[k] = 0.0
+    for k in range(m - 1, -1, -1):
+        if onsets[k] <= last - reach:
+            break
+        if moved[k] > last:
+            moved[k] = last
+
+    # A note keeps its length but stays up to KEEP_GAP clear of the next onset's new start
+    # (if it overlapped the next onset, by no more than it did):
+    #   new dur = min(dur, max(dur + closing, room - KEEP_GAP))
+    # with room = next new start - new start, closing = room - (next onset - onset).
+    room = list(map(sub, moved[1:] + [length], moved))
+    closing = list(map(sub, room, map(sub, onsets[1:] + [length], onsets)))
+    floor = list(map(max, map(sub, room, repeat(KEEP_GAP)), repeat(MIN_DUR)))
+
+    c0, c1 = settings.curve
+    curve = map(add, repeat(c0), map(mul, onsets, repeat((c1 - c0) / length if length else 0.0)))
+    scale = list(map(mul, grid_scale, curve))
+    # Offset into _VELOCITY, which clamps to 1-127 by lookup.
+    offset = list(map(add, map(add, accent, v_jitter), repeat(_VELOCITY_ZERO)))
+
+    index = list(map(dict(zip(onsets, range(m))).__getitem__, events.start))
+    out = NoteBuffer()
+    out.pitch = array("i", events.pitch)
+    out.start = array("d", map(moved.__getitem__, index))
+    dur = events.dur
+    out.dur = array(
+        "d", map(min, dur, map(max, map(add, dur, map(closing.__getitem__, index)), map(floor.__getitem__, index)))
+    )
+    vel = map(add, map(mul, events.vel, map(scale.__getitem__, index)), map(offset.__getitem__, index))
+    out.vel = array("i", map(_VELOCITY.__getitem__, map(round, vel)))
+    return out
+
+
+def apply_section(events: NoteBuffer, sec: dict, track: str, length: float | None = None) -> NoteBuffer:
+    """Humanize one track (``chords`` or ``drums``) of a section per its ``humanize`` object."""
+    raw = sec.get("humanize")
+    if not raw:
+        return events
+    settings = Humanize.from_spec(raw, track)
+    if not settings.active:
+        return events
+    bar_len = sec["_bar_len"]
+    length = sec["bars"] * bar_len if length is None else length
+    return apply(events, settings, f"{raw.get('seed', '')}/{sec['name']}/{track}", bar_len, length)
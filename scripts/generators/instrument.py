@@ -0,0 +1,272 @@
+"""Opt-in stage timing, profiling and tracing for the generator scripts.
+
+Scripts mark their stages with ``span("name")`` blocks, attribute output to
+the enclosing stage with ``count(events=..., bytes=...)`` and time hot
+callables (GUID sources, file writes) with ``wrap(fn, "name")``. Nothing is
+recorded until a :func:`session` is active: ``span`` then returns a shared
+no-op context and ``wrap`` returns ``fn`` itself, so normal runs pay only a
+function call per stage.
+
+:func:`add_arguments` gives a script three flags:
+
+- ``--timings``  print a tree of wall and CPU time per stage (repeated spans
+  under the same parent are summed), with counters, then totals per stage
+  name across the tree;
+- ``--profile [PATH]``  write a cProfile dump of the run (``<script>.prof``);
+- ``--trace [PATH]``  write Chrome trace-event JSON (``<script>.trace.json``),
+  one complete event per span, for chrome://tracing or Perfetto.
+
+Spans are recorded per process, so instrumented runs build in-process
+(scripts treat any of the flags as ``--jobs 1``). A span must not be held
+open across a ``yield``; time the work between yields instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+
+@dataclass
+class Node:
+    """One stage in the timing tree; repeated spans with the same path accumulate here."""
+
+    name: str
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    counters: dict[str, int] = field(default_factory=dict)
+    children: dict[str, Node] = field(default_factory=dict)
+
+    def walk(self, depth: int = 0) -> Iterator[tuple[int, Node]]:
+        yield depth, self
+        for child in self.children.values():
+            yield from child.walk(depth + 1)
+
+
+class _Null:
+    __slots__ = ()
+
+    def __enter__(self) -> _Null:
+        return self
+
+    def __exit__(self, *exc: object) -> bool:
+        return False
+
+
+_NULL = _Null()
+
+
+class _Span:
+    __slots__ = ("recorder", "node", "args", "wall", "cpu")
+
+    def __init__(self, recorder: Recorder, name: str) -> None:
+        self.recorder = recorder
+        children = recorder.stack[-1].node.children
+        node = children.get(name)
+        if node is None:
+            node = children[name] = Node(name)
+        self.node = node
+        self.args: dict[str, int] = {}
+
+    def __enter__(self) -> _Span:
+        self.recorder.stack.append(self)
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> bool:
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        self.recorder.stack.pop()
+        node = self.node
+        node.calls += 1
+        node.wall += wall
+        node.cpu += cpu
+        if self.recorder.events is not None:
+            self.recorder.event(node.name, self.wall, wall, self.args)
+        return False
+
+
+class Recorder:
+    """The timing tree (and, when tracing, the trace events) of one run."""
+
+    def __init__(self, name: str, trace: bool = False) -> None:
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        self.t0 = time.perf_counter()
+        self.events: list[dict] | None = [] if trace else None
+        root = _Span.__new__(_Span)
+        root.recorder, root.node, root.args = self, Node(name), {}
+        self.root = root
+        self.stack: list[_Span] = [root]
+
+    def start(self) -> None:
+        self.root.cpu = time.process_time()
+        self.root.wall = time.perf_counter()
+
+    def stop(self) -> None:
+        self.root.__exit__()
+        # __exit__ popped the root off the stack; keep it so late spans still land somewhere.
+        self.stack = [self.root]
+
+    def event(self, name: str, start: float, secs: float, args: dict[str, int]) -> None:
+        assert self.events is not None
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": round((start - self.t0) * 1e6, 3),
+            "dur": round(secs * 1e6, 3),
+            "pid": self.pid,
+            "tid": self.tid,
+        }
+        if args:
+            event["args"] = dict(args)
+        self.events.append(event)
+
+    def count(self, amounts: dict[str, int]) -> None:
+        span = self.stack[-1]
+        for key, value in amounts.items():
+            span.node.counters[key] = span.node.counters.get(key, 0) + value
+            span.args[key] = span.args.get(key, 0) + value
+
+    def report(self) -> str:
+        """The timing tree followed by per-name totals, as a fixed-width table."""
+        root = self.root.node
+        keys = sorted({k for _, node in root.walk() for k in node.counters})
+        head = f"{'stage':<44} {'calls':>7} {'wall ms':>10} {'cpu ms':>10} {'%':>6}"
+        head += "".join(f" {k:>10}" for k in keys)
+        lines = [head]
+        total = root.wall or 1e-12
+
+        def row(label: str, node: Node) -> str:
+            text = f"{label[:44]:<44} {node.calls:>7} {node.wall * 1000:>10.1f} {node.cpu * 1000:>10.1f}"
+            text += f" {node.wall / total:>6.1%}"
+            return text + "".join(f" {node.counters.get(k, ''):>10}" for k in keys)
+
+        for depth, node in root.walk():
+            lines.append(row("  " * depth + node.name, node))
+
+        totals: dict[str, Node] = {}
+        for depth, node in root.walk():
+            if depth == 0:
+                continue
+            acc = totals.setdefault(node.name, Node(node.name))
+            acc.calls += node.calls
+            acc.wall += node.wall
+            acc.cpu += node.cpu
+            for key, value in node.counters.items():
+                acc.counters[key] = acc.counters.get(key, 0) + value
+        repeated = [node for node in totals.values() if node.calls > 1]
+        if repeated:
+            lines += ["", "totals by stage (nested stages are also inside their parents)"]
+            for node in sorted(repeated, key=lambda n: n.wall, reverse=True):
+                lines.append(row(node.name, node))
+        return "\n".join(lines)
+
+    def write_trace(self, path: Path) -> None:
+        events = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": self.tid, "args": {"name": self.root.node.name}},
+            *(self.events or []),
+        ]
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+
+
+_active: Recorder | None = None
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+def span(name: str) -> _Span | _Null:
+    """Time the enclosed block as stage ``name`` under the current stage."""
+    recorder = _active
+    if recorder is None:
+        return _NULL
+    return _Span(recorder, name)
+
+
+def count(**amounts: int) -> None:
+    """Add ``amounts`` (e.g. ``events=12, bytes=4096``) to the current stage."""
+    if _active is not None:
+        _active.count(amounts)
+
+
+def wrap(fn: F, name: str) -> F:
+    """``fn`` timed as stage ``name`` on every call; ``fn`` unchanged when nothing is recording."""
+    recorder = _active
+    if recorder is None:
+        return fn
+
+    def timed(*args, **kwargs):
+        with _Span(recorder, name):
+            return fn(*args, **kwargs)
+
+    return timed  # type: ignore[return-value]
+
+
+def add_arguments(parser: argparse.ArgumentParser, name: str) -> None:
+    group = parser.add_argument_group("instrumentation (each implies --jobs 1)")
+    group.add_argument("--timings", action="store_true", help="Print wall/CPU time per stage and counters per song")
+    group.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=Path(f"{name}.prof"),
+        metavar="PATH",
+        help="Write a cProfile dump of the run (default path: %(const)s)",
+    )
+    group.add_argument(
+        "--trace",
+        type=Path,
+        nargs="?",
+        const=Path(f"{name}.trace.json"),
+        metavar="PATH",
+        help="Write Chrome trace-event JSON, one event per stage (default path: %(const)s)",
+    )
+
+
+def requested(args: argparse.Namespace) -> bool:
+    return bool(args.timings or args.profile or args.trace)
+
+
+@contextmanager
+def session(args: argparse.Namespace, name: str) -> Iterator[Recorder | None]:
+    """Record the enclosed run as requested by ``args`` and report when it ends."""
+    global _active
+    if not requested(args):
+        yield None
+        return
+    recorder = _active = Recorder(name, trace=bool(args.trace))
+    profiler = cProfile.Profile() if args.profile else None
+    recorder.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield recorder
+    finally:
+        if profiler:
+            profiler.disable()
+        recorder.stop()
+        _active = None
+        if args.timings:
+            print(f"\n{recorder.report()}")
+        if profiler:
+            profiler.dump_stats(args.profile)
+            print(f"profile written to {args.profile}  (python -m pstats {args.profile})")
+        if args.trace:
+            recorder.write_trace(args.trace)
+            print(f"trace written to {args.trace}  ({len(recorder.events or [])} events)")
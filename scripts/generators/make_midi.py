@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Export the song specs (specs/*.json) as type-1 .mid files under midi/."""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from drum_patterns import default_library
+from humanize import apply_section
+from make_rpp import (
+    DEFAULT_VOICING,
+    VOICING_MODES,
+    make_chord_events,
+    make_drum_events,
+    section_starts,
+    select_songs,
+    song_voicings,
+    spec_name,
+)
+from smf_writer import encode_track, note_off, note_on, tempo, time_signature, track_name, write_smf
+from song_spec import SPEC_DIR, load_song, spec_paths
+from timeline import Timeline
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+MIDI_DIR = REPO_ROOT / "midi"
+
+# Ticks per quarter note; matches the existing DAW-exported catalog.
+MIDI_PPQ = 480
+CHORD_CHANNEL = 0
+DRUM_CHANNEL = 9  # GM percussion
+
+# Catalog names that predate the NN_ prefix convention.
+MIDI_STEMS = {
+    "01_Static_Bloom": "static_bloom",
+    "02_Skywritting": "skywritting",
+}
+
+
+def midi_stem(filename: str) -> str:
+    return MIDI_STEMS.get(filename, filename.lower())
+
+
+def to_tick(beats: float) -> int:
+    return int(round(beats * MIDI_PPQ))
+
+
+def conductor_track(song_title: str, timeline: Timeline) -> bytes:
+    """Track name, tempo changes (ramps stepped, see Timeline.tempo_steps) and meter changes."""
+    events = [(0, track_name(song_title))]
+    events.extend((to_tick(beat), tempo(bpm)) for beat, bpm in timeline.tempo_steps())
+    events.extend((to_tick(beat), time_signature(num, den_pow)) for beat, num, den_pow in timeline.meter_changes())
+    return encode_track(events)
+
+
+def note_track(name: str, channel: int, notes: list[tuple[int, float, float, int]], end_tick: int) -> bytes:
+    events = [(0, track_name(name))]
+    for pitch, start, dur, vel in notes:
+        events.append((to_tick(start), note_on(channel, pitch, vel)))
+        events.append((to_tick(start + dur), note_off(channel, pitch)))
+    return encode_track(events, end_tick)
+
+
+def song_notes(
+    sections: list[dict], starts: list[float], voicing_mode: str = DEFAULT_VOICING
+) -> tuple[list, list]:
+    """Chord and drum note events for a whole song (humanized per spec), in absolute beats."""
+    chords, drums = [], []
+    voicings = song_voicings(sections, voicing_mode)
+    for sec, start, sec_voicings in zip(sections, starts, voicings):
+        bar_len = sec["_bar_len"]
+        sec_chords = make_chord_events(sec["prog"], sec["bpc"], sec["bars"], bar_len, sec.get("vel", 80), sec_voicings)
+        for pitch, b, dur, vel in apply_section(sec_chords, sec, "chords"):
+            chords.append((pitch, start + b, dur, vel))
+        sec_drums = make_drum_events(sec.get("drum", "standard"), sec["bars"], bar_len)
+        for pitch, b, dur, vel in apply_section(sec_drums, sec, "drums"):
+            drums.append((pitch, start + b, dur, vel))
+    return chords, drums
+
+
+def export_song(output_dir: Path, song: tuple, voicing_mode: str = DEFAULT_VOICING) -> list[tuple[str, int]]:
+    """Write ``<stem>_chords.mid`` and ``<stem>_drums.mid``; returns (name, bytes) per file."""
+    filename, song_title, bpm, sections = song
+    starts, total_beats = section_starts(sections)
+    end_tick = to_tick(total_beats)
+    chords, drums = song_notes(sections, starts, voicing_mode)
+    conductor = conductor_track(song_title, Timeline.from_sections(bpm, sections))
+
+    stem = midi_stem(filename)
+    written = []
+    for part, channel, notes in (("chords", CHORD_CHANNEL, chords), ("drums", DRUM_CHANNEL, drums)):
+        name = f"{stem}_{part}.mid"
+        track = note_track(f"{song_title} {part.capitalize()}", channel, notes, end_tick)
+        written.append((name, write_smf(output_dir / name, [conductor, track], MIDI_PPQ)))
+    return written
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--output-dir", type=Path, default=MIDI_DIR, help="Directory for .mid files (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--spec-dir", type=Path, default=SPEC_DIR, help="Directory of per-song spec files (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--voicing",
+        choices=VOICING_MODES,
+        default=DEFAULT_VOICING,
+        help="Chord voicing mode, as for make_rpp.py (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--song",
+        action="append",
+        default=[],
+        metavar="SONG",
+        help="Only export this song, e.g. 07_Rise_of_Neon_Dawn or 07 (repeatable)",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    count = 0
+    drums = set(default_library().names())
+    for path in select_songs(spec_paths(args.spec_dir), args.song, key=spec_name):
+        for name, size in export_song(args.output_dir, load_song(path, drums), args.voicing):
+            print(f"✓ {name}  ({size} bytes)")
+            count += 1
+    print(f"\n✅ {count} MIDI files written to: {args.output_dir}  ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
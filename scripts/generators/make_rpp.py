@@ -1,5 +1,6 @@
 """
-Generates REAPER .rpp project files for all 14 Lunar Static songs.
+Generates REAPER .rpp project files for all 14 Lunar Static songs from the
+per-song spec files in specs/ (see song_spec.py).
 Each file contains:
   - Correct BPM and time signature
   - Two tracks: Chords and Drums (kick/snare)
@@ -8,11 +9,34 @@ Each file contains:
 """
 
 import os
+import json
+import time
+import hashlib
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import humanize
+import instrument
+from drum_patterns import default_library
+from humanize import default_grooves
+from midi_events import EventStream, NoteBuffer
+from rpp_guid import DEFAULT_GUID_MODE, DEFAULT_GUID_SEED, GUID_MODES, guid_factory, random_guid
+from song_spec import SPEC_DIR, SpecError, load_song, spec_paths
+from timeline import Timeline, bar_length as meter_bar_length
+from voicings import lead_voices, voicing
 
 # ── REAPER MIDI uses ticks. 960 PPQ (standard)
 PPQ = 960
 
+# Bump whenever a change here alters the .rpp text produced for an unchanged
+# spec, so the build cache (see song_fingerprint) invalidates every song.
+GENERATOR_VERSION = '7'
+MANIFEST_NAME = 'make_rpp.manifest.json'
+SECTION_INDEX_SUFFIX = '.sections.json'
+DEFAULT_WRITE_BUFFER = 1 << 16
+VOICING_MODES = ('lead', 'fixed')
+DEFAULT_VOICING = 'lead'
+
 NOTE_NAMES = {'C':0,'C#':1,'Db':1,'D':2,'D#':3,'Eb':3,'E':4,'F':5,
               'F#':6,'Gb':6,'G':7,'G#':8,'Ab':8,'A':9,'A#':10,'Bb':10,'B':11}
 
@@ -21,6 +45,7 @@ def nn(name, octave):
 
 def ch(*notes): return list(notes)
 
+# Hand-pinned voicings; they win over the computed ones in voicings.py.
 V = {
     'Am':    ch(nn('A',3),nn('C',4),nn('E',4)),
     'Am7':   ch(nn('A',3),nn('C',4),nn('E',4),nn('G',4)),
@@ -57,92 +82,85 @@ V = {
     'Bbm':   ch(nn('Bb',2),nn('Db',3),nn('F',3)),
     'Bmaj7': ch(nn('B',2),nn('D#',3),nn('F#',3),nn('A#',3)),
     'Bm7':   ch(nn('B',3),nn('D',4),nn('F#',4),nn('A',4)),
-    'Am7':   ch(nn('A',3),nn('C',4),nn('E',4),nn('G',4)),
-    'D7':    ch(nn('D',3),nn('F#',3),nn('A',3),nn('C',4)),
 }
 
-KICK=36; SNARE=38
+def chord_pitches(chord_name):
+    """Pinned voicing from V, else computed from the symbol (see voicings.py).
+
+    Raises ChordError for symbols that cannot be parsed, rather than
+    silently rendering an empty bar.
+    """
+    pitches = V.get(chord_name)
+    return pitches if pitches is not None else list(voicing(chord_name))
 
 def beats_to_secs(beats, bpm):
     return beats * 60.0 / bpm
 
-def make_chord_events(prog, bpc, bars, bar_len, vel=80):
-    """Returns list of (pitch, start_beat, dur_beats, velocity)"""
-    events = []
+def chord_slots(prog, bpc, bars, bar_len):
+    """Yield (start_beat, dur_beats, chord_name) for every chord hit in a section."""
     total = bars * bar_len
     b = 0.0; ci = 0
     while b < total - 0.01:
-        chord_name = prog[ci % len(prog)]
-        pitches = V.get(chord_name, [])
-        dur = min(bpc, total - b) - 0.05
-        for p in pitches:
-            events.append((p, b, dur, vel))
+        yield b, min(bpc, total - b) - 0.05, prog[ci % len(prog)]
         b += bpc; ci += 1
-    return events
 
-def make_drum_events(pattern, bars, bar_len):
-    events = []
-    for bar in range(bars):
-        b = bar * bar_len
-        if pattern == 'none': pass
-        elif pattern == 'kick_only': events.append((KICK,b,0.35,90))
-        elif pattern == 'standard':
-            events+=[(KICK,b,0.35,100),(KICK,b+2,0.35,95),(SNARE,b+1,0.35,90),(SNARE,b+3,0.35,90)]
-        elif pattern == 'driving':
-            events+=[(KICK,b,0.35,105),(KICK,b+0.5,0.35,80),(KICK,b+2,0.35,100),(KICK,b+2.5,0.35,75),
-                    (SNARE,b+1,0.35,95),(SNARE,b+3,0.35,95)]
-        elif pattern == 'half_time':
-            events+=[(KICK,b,0.35,90),(SNARE,b+2,0.35,80)]
-        elif pattern == 'bridge_sparse':
-            events+=[(KICK,b,0.35,85),(SNARE,b+2.5,0.35,75)]
-        elif pattern == '78':
-            events+=[(KICK,b,0.35,105),(KICK,b+2.5,0.35,90),(SNARE,b+1.5,0.35,95)]
-        elif pattern == '68':
-            events+=[(KICK,b,0.35,95),(SNARE,b+1.5,0.35,85)]
-        elif pattern == '54':
-            events+=[(KICK,b,0.35,100),(KICK,b+2,0.35,90),(SNARE,b+1,0.35,88),(SNARE,b+3,0.35,88)]
-        elif pattern == 'intense':
-            events+=[(KICK,b,0.35,110),(KICK,b+1,0.35,95),(KICK,b+2,0.35,105),(KICK,b+3,0.35,90),
-                    (SNARE,b+1,0.35,100),(SNARE,b+3,0.35,100)]
-        elif pattern == 'dnb':
-            events+=[(KICK,b,0.35,110),(KICK,b+2.5,0.35,95),(SNARE,b+1.5,0.35,105)]
-            if bar_len >= 4: events.append((SNARE,b+3.5,0.35,100))
+def make_chord_events(prog, bpc, bars, bar_len, vel=80, voicings=None):
+    """Returns a NoteBuffer of (pitch, start_beat, dur_beats, velocity)
+
+    `voicings` gives the pitches of each chord hit (see song_voicings);
+    without it every chord uses its fixed chord_pitches() voicing.
+    """
+    events = NoteBuffer()
+    for i, (b, dur, chord_name) in enumerate(chord_slots(prog, bpc, bars, bar_len)):
+        pitches = voicings[i] if voicings is not None else chord_pitches(chord_name)
+        events.add_chord(pitches, b, dur, vel)
     return events
 
-def events_to_reaper_midi(events, clip_length_beats):
+def song_voicings(sections, mode=DEFAULT_VOICING):
+    """Per-section lists of chord-hit voicings for a whole song.
+
+    'lead' voice-leads every section (lead_voices) starting from where the
+    previous section ended; the song opens on its first chord's fixed
+    voicing. 'fixed' returns None per section (root-position chord_pitches).
     """
-    Convert note events to REAPER's inline MIDI format.
+    if mode == 'fixed':
+        return [None] * len(sections)
+    previous = None
+    out = []
+    for sec in sections:
+        names = [name for _, _, name in chord_slots(sec['prog'], sec['bpc'], sec['bars'], sec['_bar_len'])]
+        if previous is None and names:
+            previous = tuple(chord_pitches(names[0]))
+        path = lead_voices(names, previous)
+        out.append(path)
+        if path:
+            previous = path[-1]
+    return out
+
+def make_drum_events(pattern, bars, bar_len, library=None):
+    """Tile the compiled one-bar template of `pattern` (see drum_patterns.json)."""
+    return (library or default_library()).render(pattern, bars, bar_len)
+
+def iter_midi_events(events, clip_length_beats):
+    """
+    Yield note events in REAPER's inline MIDI format, one block per clip.
     REAPER MIDI events: E <tick_offset> <status> <note> <vel>
-    Uses running tick offset from previous event.
+    Uses running tick offset from previous event; note-offs (8x) sort
+    before note-ons (9x) on the same tick, then the all-notes-off (Bx).
+    """
+    with instrument.span('midi'):
+        text = EventStream.from_notes(events, PPQ, clip_length_beats).sorted().reaper_text()
+    yield text
+
+def iter_midi_item(name, position_secs, length_secs, events, clip_length_beats, color=0,
+                   guid=None, guid_key=(), pool_guid=None, pooled=False):
+    """Yield the lines of a REAPER MIDI item block. GUIDs come from guid(*guid_key, role).
+
+    `pool_guid` overrides the POOLEDEVTS GUID; with `pooled` the item is a
+    further instance of that pool and its events are not written again.
     """
-    # Build flat list of (tick, type, note, vel)
-    # type: 9x = note on, 8x = note off
-    flat = []
-    for (pitch, start_b, dur_b, vel) in events:
-        start_tick = int(round(start_b * PPQ))
-        end_tick   = int(round((start_b + dur_b) * PPQ))
-        flat.append((start_tick, 0x90, pitch, vel))
-        flat.append((end_tick,   0x80, pitch, 0))
-
-    # Add end-of-track marker
-    end_tick = int(round(clip_length_beats * PPQ))
-    flat.append((end_tick, 0xb0, 0x7b, 0))  # all notes off
-
-    flat.sort(key=lambda x: (x[0], x[1]))
-
-    lines = []
-    prev_tick = 0
-    for (tick, status, data1, data2) in flat:
-        delta = tick - prev_tick
-        lines.append(f'      E {delta} {status:02x} {data1:02x} {data2:02x}')
-        prev_tick = tick
-
-    return '\n'.join(lines)
-
-def make_midi_item(name, position_secs, length_secs, events, clip_length_beats, color=0):
-    """Generate a REAPER MIDI item block."""
-    midi_data = events_to_reaper_midi(events, clip_length_beats)
-    return f'''    <ITEM
+    guid = guid or generate_guid
+    yield f'''    <ITEM
       POSITION {position_secs:.6f}
       SNAPOFFS 0
       LENGTH {length_secs:.6f}
@@ -152,31 +170,68 @@ def make_midi_item(name, position_secs, length_secs, events, clip_length_beats,
       FADEOUT 1 0 0 1 0 0 0
       MUTE 0 0
       SEL 0
-      IGUID {{{generate_guid()}}}
+      IGUID {{{guid(*guid_key, 'iguid')}}}
       IID 1
       NAME "{name}"
       VOLPAN 1 0 1 -1
       SOFFS 0
       PLAYRATE 1 1 0 -1 0 0.0025
       CHANMODE 0
-      GUID {{{generate_guid()}}}
+      GUID {{{guid(*guid_key, 'guid')}}}
       <SOURCE MIDI
         HASDATA 1 {PPQ} QN
         CCINTERP 32
-        POOLEDEVTS {{{generate_guid()}}}
-        LAST_REC_LAUNCHQUANT 0
-{midi_data}
-        CCEVT -1 0 0
+        POOLEDEVTS {{{pool_guid or guid(*guid_key, 'pooledevts')}}}
+        LAST_REC_LAUNCHQUANT 0'''
+    if not pooled:
+        yield from iter_midi_events(events, clip_length_beats)
+    yield '''        CCEVT -1 0 0
       >
     >'''
 
-import uuid
-def generate_guid():
-    return str(uuid.uuid4()).upper()
+class MidiPool:
+    """Hands out one POOLEDEVTS GUID per distinct clip (events + clip length).
 
-def make_track(name, color_r, color_g, color_b, items_text):
+    The first item with a given clip carries the events; later identical
+    clips reference the same pool, so REAPER stores the data once and
+    editing one instance edits them all.
+    """
+
+    def __init__(self, guid):
+        self.guid = guid
+        self.ids = {}
+        self.clips = 0
+
+    def lookup(self, events, clip_length_beats):
+        """Returns (pool GUID, True for the first clip of this pool)."""
+        self.clips += 1
+        h = hashlib.blake2b(repr(clip_length_beats).encode('ascii'), digest_size=16)
+        for col in (events.pitch, events.start, events.dur, events.vel):
+            h.update(col.tobytes())
+            h.update(b'|')
+        digest = h.hexdigest()
+        pool_guid = self.ids.get(digest)
+        if pool_guid is not None:
+            return pool_guid, False
+        pool_guid = self.ids[digest] = self.guid('pool', digest)
+        return pool_guid, True
+
+    @property
+    def unique(self):
+        return len(self.ids)
+
+    def ratio(self):
+        """Clips per stored copy of MIDI data (1.0 = nothing shared)."""
+        return self.clips / self.unique if self.unique else 1.0
+
+def generate_guid(*_parts):
+    return random_guid()
+
+def iter_track(name, color_r, color_g, color_b, items, guid=None):
+    """Yield the lines of a track chunk; `items` is an iterable of per-item line iterables."""
+    guid = guid or generate_guid
     color = color_r + (color_g << 8) + (color_b << 16) + 0x1000000
-    return f'''  <TRACK {{{generate_guid()}}}
+    yield f'''  <TRACK {{{guid(name, 'track')}}}
     NAME "{name}"
     PEAKCOL {color}
     BEAT -1
@@ -196,65 +251,38 @@ def make_track(name, color_r, color_g, color_b, items_text):
     INQ 0 0 0 0.5 100 0 0 100
     NCHAN 2
     FX 1
-    TRACKID {{{generate_guid()}}}
+    TRACKID {{{guid(name, 'trackid')}}}
     PERF 0
     MIDIOUT -1
-    MAINSEND 1 0
-{items_text}
-  >'''
-
-def make_regions(sections, starts_secs, bpm):
-    """Generate REAPER region markers."""
-    lines = []
-    for i, (sec, start) in enumerate(zip(sections, starts_secs)):
-        bar_len = sec['_bar_len']
-        length_secs = sec['bars'] * bar_len * 60.0 / bpm
-        end = start + length_secs
+    MAINSEND 1 0'''
+    for item_lines in items:
+        yield from item_lines
+    yield ''
+    yield '  >'
+
+def iter_regions(sections, starts_secs, ends_secs, guid=None):
+    """Yield REAPER region lines: a start MARKER and a matching end MARKER per section."""
+    guid = guid or generate_guid
+    for i, (sec, start, end) in enumerate(zip(sections, starts_secs, ends_secs)):
         region_id = i + 1
-        lines.append(f'  MARKER {region_id} {start:.6f} "{sec["name"]}" 1 0 1 B {{{generate_guid()}}} 0')
-    return '\n'.join(lines)
+        yield f'  MARKER {region_id} {start:.6f} "{sec["name"]}" 1 0 1 B {{{guid("marker", region_id, sec["name"])}}} 0'
+        yield f'  MARKER {region_id} {end:.6f} "" 1'
 
-def build_rpp(output_dir, filename, song_title, bpm, sections):
-    # Compute section start times in beats and seconds
-    starts_beats = []
-    cursor = 0.0
-    for sec in sections:
-        ts_den_pow = sec.get('ts_den_pow', 2)
-        bar_len = sec['ts_num'] * (1.0 if ts_den_pow == 2 else 0.5)
-        sec['_bar_len'] = bar_len
-        starts_beats.append(cursor)
-        cursor += sec['bars'] * bar_len
-
-    starts_secs = [b * 60.0 / bpm for b in starts_beats]
-    total_beats = cursor
-    total_secs  = total_beats * 60.0 / bpm
-
-    # First section time sig for project
-    first_ts_num = sections[0].get('ts_num', 4)
-    first_ts_den = sections[0].get('ts_den_pow', 2)
+def iter_tempo_points(timeline):
+    """Yield TEMPOENVEX `PT` lines: one per tempo/meter change point.
 
-    # Build items for each track
-    chord_items = ''
-    drum_items  = ''
-
-    for i, sec in enumerate(sections):
-        start_secs  = starts_secs[i]
-        bar_len     = sec['_bar_len']
-        length_beats = sec['bars'] * bar_len
-        length_secs  = length_beats * 60.0 / bpm
-
-        c_events = make_chord_events(sec['prog'], sec['bpc'], sec['bars'], bar_len, sec.get('vel',80))
-        d_events = make_drum_events(sec.get('drum','standard'), sec['bars'], bar_len)
-
-        chord_items += make_midi_item(sec['name'], start_secs, length_secs, c_events, length_beats) + '\n'
-        drum_items  += make_midi_item(sec['name'], start_secs, length_secs, d_events, length_beats) + '\n'
-
-    chord_track = make_track('Chords', 82, 130, 255, chord_items)
-    drum_track  = make_track('Drums (Kick+Snare)', 255, 100, 80, drum_items)
-
-    regions = make_regions(sections, starts_secs, bpm)
-
-    rpp = f'''<REAPER_PROJECT 0.1 "6.82/OSX64" 1708000000
+    Shape 0 ramps linearly to the next point, 1 holds the tempo. The time
+    signature is packed as num + (den << 16) on points where it changes.
+    """
+    meter = None
+    for seg in timeline.segments:
+        line = f'    PT {seg.secs:.6f} {seg.bpm:g} {0 if seg.ramp else 1}'
+        if (seg.num, seg.den_pow) != meter:
+            meter = (seg.num, seg.den_pow)
+            line += f' {seg.num + ((1 << seg.den_pow) << 16)}'
+        yield line
+
+PROJECT_HEADER = '''<REAPER_PROJECT 0.1 "6.82/OSX64" 1708000000
   RIPPLE 0
   GROUPOVERRIDE 0 0 0
   AUTOXFADE 129
@@ -265,7 +293,7 @@ def build_rpp(output_dir, filename, song_title, bpm, sections):
   FEEDBACK 0
   PANLAW 1
   PROJOFFS 0 0 0
-  MAXPROJLEN 0 {total_secs + 4:.6f}
+  MAXPROJLEN 0 {max_len:.6f}
   GRID 3199 8 1 8 1 0 0 0
   TIMEMODE 1 5 -1 30 0 0 -1
   VIDEO_CONFIG 0 0 256
@@ -310,6 +338,7 @@ def build_rpp(output_dir, filename, song_title, bpm, sections):
     PATTERN 2863311530 2863311530
     MULT 1
   >
+  TEMPO {bpm:g} {ts_num} {ts_den}
   MASTER_NCH 2
   MASTER_VOLUME 1
   MASTER_FX 1
@@ -319,24 +348,134 @@ def build_rpp(output_dir, filename, song_title, bpm, sections):
     VIS 1 0 1
     LANEHEIGHT 0 0
     ARM 0
-    DEFSHAPE 0 -1 -1
-    PT 0 {bpm} 0
+    DEFSHAPE 1 -1 -1
+{tempo_points}
   >
   <PROJBAY
-  >
-  {regions}
-{chord_track}
-{drum_track}
->'''
+  >'''
 
-    out_path = os.path.join(output_dir, f'{filename}.rpp')
-    with open(out_path, 'w', encoding='utf-8') as f:
-        f.write(rpp)
-    print(f'✓ {filename}.rpp  ({total_secs/60:.1f} min, {bpm} BPM)')
+def write_lines(path, lines, buffer_size=DEFAULT_WRITE_BUFFER):
+    """Stream newline-joined `lines` to `path`; returns the number of bytes written."""
+    with open(path, 'w', encoding='utf-8', buffering=buffer_size) as f:
+        write = instrument.wrap(f.write, 'write')
+        it = iter(lines)
+        for line in it:
+            write(line)
+            break
+        for line in it:
+            write('\n')
+            write(line)
+        with instrument.span('write'):
+            f.flush()
+        return f.tell()
+
+def bar_length(sec):
+    """Bar length in quarter-note beats (ts_den_pow 2 = /4, 3 = /8)."""
+    return meter_bar_length(sec['ts_num'], sec.get('ts_den_pow', 2))
+
+def section_starts(sections):
+    """Returns (start beat of each section, total beats); caches sec['_bar_len']."""
+    starts_beats = []
+    cursor = 0.0
+    for sec in sections:
+        bar_len = bar_length(sec)
+        sec['_bar_len'] = bar_len
+        starts_beats.append(cursor)
+        cursor += sec['bars'] * bar_len
+    return starts_beats, cursor
 
-def S(name, bars, prog, bpc, drum, vel=80, ts_num=4, ts_den_pow=2):
-    return {'name':name,'bars':bars,'prog':prog,'bpc':bpc,'drum':drum,
-            'vel':vel,'ts_num':ts_num,'ts_den_pow':ts_den_pow}
+def iter_rpp(filename, bpm, sections, guid, voicing_mode=DEFAULT_VOICING, pool=None):
+    """Yield the lines of a whole project; every item is formatted only as it is written."""
+    # Compute section start times in beats and seconds
+    with instrument.span('tempo map'):
+        starts_beats, cursor = section_starts(sections)
+        timeline = Timeline.from_sections(bpm, sections)
+        starts_secs = [timeline.beat_to_secs(b) for b in starts_beats]
+        ends_secs = starts_secs[1:] + [timeline.total_secs]
+        total_secs = timeline.total_secs
+    with instrument.span('voicing'):
+        voicings = song_voicings(sections, voicing_mode)
+
+    def track_items(track, make_events):
+        for i, sec in enumerate(sections):
+            length_beats = sec['bars'] * sec['_bar_len']
+            length_secs  = ends_secs[i] - starts_secs[i]
+            with instrument.span('events'):
+                events = NoteBuffer.from_notes(make_events(i, sec))
+            instrument.count(events=len(events))
+            with instrument.span('pool'):
+                pool_guid, first = pool.lookup(events, length_beats) if pool else (None, True)
+            yield iter_midi_item(sec['name'], starts_secs[i], length_secs, events,
+                                 length_beats, guid=guid, guid_key=(track, i, sec['name']),
+                                 pool_guid=pool_guid, pooled=not first)
+
+    def chord_events(i, sec):
+        events = make_chord_events(sec['prog'], sec['bpc'], sec['bars'], sec['_bar_len'], sec.get('vel',80),
+                                   voicings[i])
+        return humanize.apply_section(events, sec, 'chords')
+
+    def drum_events(i, sec):
+        events = make_drum_events(sec.get('drum','standard'), sec['bars'], sec['_bar_len'])
+        return humanize.apply_section(events, sec, 'drums')
+
+    first = timeline.segments[0]
+    yield PROJECT_HEADER.format(max_len=total_secs + 4, bpm=first.bpm, ts_num=first.num,
+                                ts_den=1 << first.den_pow,
+                                tempo_points='\n'.join(iter_tempo_points(timeline)))
+    yield from iter_regions(sections, starts_secs, ends_secs, guid=guid)
+    yield from iter_track('Chords', 82, 130, 255, track_items('Chords', chord_events), guid=guid)
+    yield from iter_track('Drums (Kick+Snare)', 255, 100, 80, track_items('Drums', drum_events), guid=guid)
+    yield '>'
+
+def song_length_secs(bpm, sections):
+    return Timeline.from_sections(bpm, sections).total_secs
+
+def section_index(filename, song_title, bpm, sections):
+    """Where every section starts and ends, for tools that seek without parsing the .rpp.
+
+    Bars are offsets from the song start (0 = first bar); `chords` counts chord hits.
+    """
+    starts_beats, total_beats = section_starts(sections)
+    ends_beats = starts_beats[1:] + [total_beats]
+    timeline = Timeline.from_sections(bpm, sections)
+    return {
+        'song': filename,
+        'title': song_title,
+        'bpm': bpm,
+        'sections': [{
+            'region': i + 1,
+            'name': sec['name'],
+            'start_beat': start,
+            'end_beat': end,
+            'start_secs': round(timeline.beat_to_secs(start), 6),
+            'end_secs': round(timeline.beat_to_secs(end), 6),
+            'start_bar': round(timeline.beat_to_bar(start), 6),
+            'end_bar': round(timeline.beat_to_bar(end), 6),
+            'chords': sum(1 for _ in chord_slots(sec['prog'], sec['bpc'], sec['bars'], sec['_bar_len'])),
+        } for i, (sec, start, end) in enumerate(zip(sections, starts_beats, ends_beats))],
+    }
+
+def build_rpp(output_dir, filename, song_title, bpm, sections,
+              guid_mode=DEFAULT_GUID_MODE, guid_seed=DEFAULT_GUID_SEED,
+              buffer_size=DEFAULT_WRITE_BUFFER, voicing_mode=DEFAULT_VOICING,
+              write_section_index=False, pool_midi=True, stats=None):
+    """Write `<filename>.rpp`; returns the song length in seconds.
+
+    Pass a dict as `stats` to receive the MIDI pooling counts (clips, unique, ratio).
+    """
+    guid = instrument.wrap(guid_factory(guid_mode, filename, seed=guid_seed), 'guid')
+    pool = MidiPool(guid) if pool_midi else None
+    out_path = os.path.join(output_dir, f'{filename}.rpp')
+    written = write_lines(out_path, iter_rpp(filename, bpm, sections, guid, voicing_mode, pool), buffer_size)
+    instrument.count(bytes=written)
+    if stats is not None and pool is not None:
+        stats.update(clips=pool.clips, unique=pool.unique, ratio=pool.ratio())
+    if write_section_index:
+        index_path = os.path.join(output_dir, f'{filename}{SECTION_INDEX_SUFFIX}')
+        with instrument.span('section index'), open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(section_index(filename, song_title, bpm, sections), f, indent=2)
+            f.write('\n')
+    return song_length_secs(bpm, sections)
 
 def parse_args():
     repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -347,136 +486,308 @@ def parse_args():
         default=default_output_dir,
         help='Directory to write generated .rpp files (default: %(default)s)',
     )
+    parser.add_argument(
+        '--spec-dir',
+        default=str(SPEC_DIR),
+        help='Directory of per-song spec files (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='After building, keep running and rebuild each song when its spec file is saved',
+    )
+    parser.add_argument(
+        '--poll',
+        type=float,
+        default=0.05,
+        metavar='SECS',
+        help='Spec polling interval for --watch (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Number of worker processes; 0 uses every core (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--guids',
+        choices=GUID_MODES,
+        default=DEFAULT_GUID_MODE,
+        help='stable: uuid5 GUIDs so identical specs give byte-identical files; '
+             'random: fresh uuid4 GUIDs every run (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--guid-seed',
+        default=DEFAULT_GUID_SEED,
+        help='Seed mixed into stable GUIDs (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--voicing',
+        choices=VOICING_MODES,
+        default=DEFAULT_VOICING,
+        help='lead: voice-lead each progression for the least movement between chords; '
+             'fixed: every chord in its root-position voicing (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--section-index',
+        action='store_true',
+        help='Also write <song>.sections.json next to each .rpp with every section\'s '
+             'start/end in beats, seconds and bars',
+    )
+    parser.add_argument(
+        '--no-pool',
+        action='store_true',
+        help='Give every MIDI item its own copy of the events instead of pooling identical clips',
+    )
+    parser.add_argument(
+        '--write-buffer',
+        type=int,
+        default=DEFAULT_WRITE_BUFFER,
+        metavar='BYTES',
+        help='Output buffer size used when streaming .rpp files to disk (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Rebuild every selected song even if its inputs are unchanged',
+    )
+    parser.add_argument(
+        '--song',
+        action='append',
+        default=[],
+        metavar='SONG',
+        help='Only build this song, e.g. 07_Rise_of_Neon_Dawn or 07 (repeatable)',
+    )
+    instrument.add_arguments(parser, 'make_rpp')
     return parser.parse_args()
 
+def spec_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def select_songs(songs, wanted, key=lambda song: song[0]):
+    """Filter songs (or spec paths) by filename or NN track-number prefix, keeping album order."""
+    if not wanted:
+        return songs
+    selected = []
+    unknown = set(wanted)
+    for song in songs:
+        filename = key(song)
+        hits = {w for w in wanted if w in (filename, filename.split('_', 1)[0])}
+        if hits:
+            selected.append(song)
+            unknown -= hits
+    if unknown:
+        known = ', '.join(key(song) for song in songs)
+        raise SystemExit(f'Unknown song(s): {", ".join(sorted(unknown))}\nKnown songs: {known}')
+    return selected
+
+def build_song(output_dir, song, options):
+    """Worker entry point: build one song and return (filename, bpm, total_secs, wall_secs, stats)."""
+    filename, song_title, bpm, sections = song
+    t0 = time.perf_counter()
+    stats = {}
+    with instrument.span(f'song {filename}'):
+        total_secs = build_rpp(output_dir, filename, song_title, bpm, sections, stats=stats, **options)
+    return filename, bpm, total_secs, time.perf_counter() - t0, stats
+
+# ── Build cache ───────────────────────────────────────────────────────────────
+# A song is rebuilt only when the fingerprint of its inputs differs from the
+# one recorded in the manifest, or when its .rpp (or, with --section-index,
+# its sections.json) is missing / edited since.
+
+SPEC_KEYS = ('name', 'bars', 'prog', 'bpc', 'drum', 'vel', 'ts_num', 'ts_den_pow', 'bpm', 'ramp', 'humanize')
+# build_rpp options that change the bytes written (buffer_size, for one, does not).
+OUTPUT_OPTIONS = ('guid_mode', 'guid_seed', 'voicing_mode', 'write_section_index', 'pool_midi')
+
+def song_inputs(song, options):
+    """Everything that determines a song's .rpp text, as plain JSON-able data."""
+    filename, song_title, bpm, sections = song
+    chords = sorted({c for sec in sections for c in sec['prog']})
+    grooves = sorted({g for sec in sections for g in humanize.grooves_used(sec.get('humanize'))})
+    return {
+        'generator_version': GENERATOR_VERSION,
+        'filename': filename,
+        'title': song_title,
+        'bpm': bpm,
+        'sections': [{k: sec.get(k) for k in SPEC_KEYS} for sec in sections],
+        'voicings': {c: chord_pitches(c) for c in chords},
+        'drums': {d: default_library().spec(d) for d in sorted({sec['drum'] for sec in sections})},
+        'grooves': {g: vars(default_grooves().get(g)) for g in grooves},
+        'options': {k: options[k] for k in OUTPUT_OPTIONS if k in options},
+    }
+
+def song_fingerprint(song, options):
+    blob = json.dumps(song_inputs(song, options), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'songs': {}}
+    manifest.setdefault('songs', {})
+    return manifest
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp, path)
+
+def file_matches(path, size, sha256):
+    """True if `path` exists with the recorded size and hash (size is checked first)."""
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        return file_sha256(path) == sha256
+    except OSError:
+        return False
+
+def is_up_to_date(output_dir, entry, fingerprint, section_index=False):
+    """True if the manifest entry was built from `fingerprint` and its outputs are untouched."""
+    if not entry or entry.get('input_sha256') != fingerprint:
+        return False
+    if not file_matches(os.path.join(output_dir, entry['output']),
+                        entry.get('output_bytes'), entry.get('output_sha256')):
+        return False
+    if not section_index:
+        return True
+    index = entry.get('section_index')
+    return bool(index) and file_matches(os.path.join(output_dir, index['output']),
+                                        index.get('output_bytes'), index.get('output_sha256'))
+
+def manifest_entry(output_dir, song, fingerprint, section_index=False):
+    filename, song_title, bpm, sections = song
+    output = f'{filename}.rpp'
+    out_path = os.path.join(output_dir, output)
+    entry = {
+        'title': song_title,
+        'bpm': bpm,
+        'sections': [sec['name'] for sec in sections],
+        'generator_version': GENERATOR_VERSION,
+        'input_sha256': fingerprint,
+        'output': output,
+        'output_bytes': os.path.getsize(out_path),
+        'output_sha256': file_sha256(out_path),
+    }
+    if section_index:
+        index = f'{filename}{SECTION_INDEX_SUFFIX}'
+        index_path = os.path.join(output_dir, index)
+        entry['section_index'] = {
+            'output': index,
+            'output_bytes': os.path.getsize(index_path),
+            'output_sha256': file_sha256(index_path),
+        }
+    return entry
+
+def album(spec_dir=SPEC_DIR):
+    """Returns the album table: (filename, song_title, bpm, sections) per spec file."""
+    drums = set(default_library().names())
+    return [load_song(path, drums) for path in spec_paths(spec_dir)]
+
+def build_album(args, output_dir, paths):
+    """Load the given spec files and rebuild whichever songs are out of date."""
+    with instrument.span('load specs'):
+        drums = set(default_library().names())
+        songs = [load_song(path, drums) for path in paths]
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if instrument.enabled():
+        jobs = 1
+
+    t0 = time.perf_counter()
+    manifest = load_manifest(output_dir)
+    options = {'guid_mode': args.guids, 'guid_seed': args.guid_seed,
+               'buffer_size': args.write_buffer, 'voicing_mode': args.voicing,
+               'write_section_index': args.section_index, 'pool_midi': not args.no_pool}
+    with instrument.span('build cache check'):
+        fingerprints = {song[0]: song_fingerprint(song, options) for song in songs}
+        dirty = [song for song in songs
+                 if args.force or not is_up_to_date(output_dir, manifest['songs'].get(song[0]),
+                                                    fingerprints[song[0]], args.section_index)]
+
+    jobs = min(jobs, len(dirty)) or 1
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            built = list(pool.map(build_song, [output_dir] * len(dirty), dirty,
+                                  [options] * len(dirty)))
+    else:
+        built = [build_song(output_dir, song, options) for song in dirty]
+
+    with instrument.span('manifest'):
+        for song in dirty:
+            manifest['songs'][song[0]] = manifest_entry(output_dir, song, fingerprints[song[0]],
+                                                        args.section_index)
+        manifest['generator_version'] = GENERATOR_VERSION
+        if dirty:
+            save_manifest(output_dir, manifest)
+    wall = time.perf_counter() - t0
+
+    # Report in album order regardless of which worker finished first.
+    results = {r[0]: r for r in built}
+    for song in songs:
+        if song[0] not in results:
+            print(f'· {song[0]}.rpp  unchanged')
+            continue
+        filename, bpm, total_secs, song_wall, stats = results[song[0]]
+        pooled = ''
+        if stats:
+            pooled = f'  {stats["clips"]} clips / {stats["unique"]} pooled ({stats["ratio"]:.2f}x)'
+        print(f'✓ {filename}.rpp  ({total_secs/60:.1f} min, {bpm} BPM){pooled}  {song_wall*1000:.1f} ms')
+    print(f'\n✅ {len(built)} REAPER .rpp files generated, {len(songs) - len(built)} unchanged, '
+          f'in: {output_dir}  ({wall*1000:.1f} ms wall, {jobs} job{"s" if jobs != 1 else ""})')
+
+def watch(args, output_dir):
+    """Poll the spec files and rebuild each song as soon as its spec is saved."""
+    def snapshot():
+        paths = select_songs(spec_paths(args.spec_dir), args.song, key=spec_name)
+        stamps = {}
+        for path in paths:
+            try:
+                stamps[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+        return stamps
+
+    seen = snapshot()
+    print(f'\n👀 Watching {len(seen)} spec file(s) in {args.spec_dir} (Ctrl+C to stop)')
+    try:
+        while True:
+            time.sleep(args.poll)
+            current = snapshot()
+            changed = [path for path, stamp in current.items() if seen.get(path) != stamp]
+            seen = current
+            if not changed:
+                continue
+            try:
+                build_album(args, output_dir, changed)
+            except (SpecError, ValueError) as exc:
+                print(f'✗ {exc}')
+    except KeyboardInterrupt:
+        print()
+
 def main():
     args = parse_args()
     output_dir = os.path.abspath(args.output_dir)
     os.makedirs(output_dir, exist_ok=True)
 
-    # ── ALL 14 SONGS ──────────────────────────────────────────────────────────
-    build_rpp(output_dir, '01_Static_Bloom', 'Static Bloom', 120, [
-    S('Intro',    8,  ['Bm7b5','E7','Am7'],    4, 'standard', 65),
-    S('Verse 1',  16, ['Am','G','F','E'],       4, 'driving',  78),
-    S('Chorus 1', 16, ['C','G','Am','F'],       4, 'driving',  92),
-    S('Verse 2',  16, ['Am','G','F','E'],       4, 'driving',  78),
-    S('Bridge',   12, ['Am','Fmaj7','Em','Dm'], 3.5,'78',      72, 7, 3),
-    S('Chorus 2', 16, ['C','G','Am','F'],       4, 'driving',  95),
-    S('Outro',    8,  ['C','G','Am','F'],       4, 'standard', 70),
-    ])
-    build_rpp(output_dir, '02_Skywritting', 'Skywritting', 70, [
-    S('Intro',    4,  ['Dm'],               4, 'kick_only',    55),
-    S('Verse 1',  16, ['Dm','C','Bb','A'],  4, 'half_time',    75),
-    S('Chorus 1', 16, ['F','C','G','Am'],   4, 'standard',     90),
-    S('Verse 2',  16, ['Dm','C','Bb','A'],  4, 'half_time',    75),
-    S('Bridge',   8,  ['Gm','Dm','Am','E'], 4, 'bridge_sparse',65),
-    S('Chorus 2', 16, ['F','C','G','Am'],   4, 'standard',     90),
-    S('Outro',    8,  ['Dm','C','Bb','A'],  4, 'half_time',    60),
-    ])
-    build_rpp(output_dir, '03_Twin_Fish', 'Twin Fish', 60, [
-    S('Intro',    8,  ['Em'],              4, 'kick_only',     60),
-    S('Verse 1',  16, ['Em','D','C','B'],  4, 'half_time',     72),
-    S('Chorus 1', 16, ['Am','B','Em','D'], 4, 'standard',      88),
-    S('Verse 2',  16, ['Em','D','C','B'],  4, 'half_time',     72),
-    S('Bridge',   8,  ['C','G','D','Am'],  2, 'bridge_sparse', 65),
-    S('Chorus 2', 16, ['Am','B','Em','D'], 4, 'driving',       92),
-    S('Outro',    8,  ['Em','D','C','B'],  2, 'half_time',     60),
-    ])
-    build_rpp(output_dir, '04_Binary_Heart', 'Binary Heart', 100, [
-    S('Intro',    8,  ['Fm','Cm','Bbm','Eb'],  2, 'standard',    65),
-    S('Verse 1',  16, ['Fm','Db','Ab','Eb'],   4, 'standard',    78),
-    S('Chorus 1', 16, ['Bbm','Eb','Ab','Db'],  4, 'driving',     92),
-    S('Verse 2',  16, ['Fm','Db','Ab','Eb'],   4, 'standard',    78),
-    S('Bridge',   8,  ['Cm','Fm','Bbm','Eb'],  3, '68',          70, 6, 3),
-    S('Chorus 2', 16, ['Bbm','Eb','Ab','Db'],  4, 'driving',     95),
-    S('Outro',    8,  ['Fm','Db','Ab','Eb'],   2, 'half_time',   65),
-    ])
-    build_rpp(output_dir, '05_Electric_Pickle', 'Electric Pickle', 128, [
-    S('Intro',    8,  ['Am','G','F','E'],       2, 'standard', 65),
-    S('Verse 1',  16, ['Am','G','F','E'],       4, 'driving',  82),
-    S('Chorus 1', 16, ['Am','G','C','F'],       4, 'driving',  95),
-    S('Verse 2',  16, ['Am','G','F','E'],       4, 'driving',  82),
-    S('Bridge',   12, ['Am','Fmaj7','Em','Dm'], 3.5,'78',      72, 7, 3),
-    S('Chorus 2', 16, ['Am','G','C','F'],       4, 'driving',  100),
-    S('Outro',    8,  ['Am','G','C','F'],       2, 'standard', 75),
-    ])
-    jazz = ['C#m7','F#7','Bmaj7','Emaj7','Am7','D7','Gmaj7','C#m7']
-    build_rpp(output_dir, '06_Kaleidoscope_Mind', 'Kaleidoscope Mind', 130, [
-    S('Intro',  4,  ['C#m7'], 4, 'half_time', 60),
-    S('Head 1', 16, jazz,     2, 'standard',  82),
-    S('Solo 1', 16, jazz,     2, 'standard',  78),
-    S('Solo 2', 16, jazz,     2, 'standard',  78),
-    S('Head 2', 16, jazz,     2, 'standard',  85),
-    S('Outro',  4,  ['C#m7'], 4, 'half_time', 60),
-    ])
-    build_rpp(output_dir, '07_Rise_of_Neon_Dawn', 'Rise of the Neon Dawn', 140, [
-    S('Intro',    8,  ['E','B','C#m','A'],   2, 'standard', 70),
-    S('Verse 1',  16, ['E','A','B','E'],     4, 'driving',  85),
-    S('Chorus 1', 16, ['A','B','E','C#m'],   4, 'driving',  100),
-    S('Verse 2',  16, ['E','A','B','E'],     4, 'driving',  85),
-    S('Bridge',   8,  ['C#m','A','B','E'],   2, 'half_time',70),
-    S('Chorus 2', 16, ['A','B','E','C#m'],   4, 'intense',  105),
-    S('Outro',    8,  ['E','B','C#m','A'],   2, 'standard', 80),
-    ])
-    build_rpp(output_dir, '08_Whispers_at_a_Void', 'Whispers at a Void', 90, [
-    S('Intro',     8,  ['Dm'],               4, 'kick_only', 55),
-    S('Section 1', 16, ['Dm','C','Gm','F'],  4, 'half_time', 70),
-    S('Section 2', 16, ['Dm','Am','Bb','C'], 4, 'driving',   88),
-    S('Section 3', 16, ['Dm','C','Gm','F'],  4, 'half_time', 65),
-    S('Outro',     8,  ['Dm'],               4, 'none',       50),
-    ])
-    build_rpp(output_dir, '09_Oddysea', 'Oddysea', 95, [
-    S('Section 1', 8,  ['Cm','Gm'],           4, 'none',      60),
-    S('Section 2', 12, ['Am','Dm','G'],        4, 'half_time', 75),
-    S('Section 3', 16, ['C#m','G#','A','E'],   4, 'intense',   95),
-    S('Silence',   4,  ['Cm'],                4, 'none',       40),
-    S('Section 5', 12, ['Fm','Cm','Ab','Eb'],  4, 'standard',  72),
-    S('Section 6', 8,  ['Am','E','F','C'],    4, 'driving',    88),
-    S('Outro',     4,  ['Am'],                4, 'none',        45),
-    ])
-    build_rpp(output_dir, '10_Echoes_in_the_Static', 'Echoes in the Static', 100, [
-    S('Intro',    12, ['Gm','Dm','Eb','Bb'],  4, 'none',          60),
-    S('Verse 1',  16, ['Gm','Bb','F','Eb'],   4, 'half_time',     75),
-    S('Chorus 1', 16, ['Cm','Gm','Bb','Eb'],  4, 'standard',      90),
-    S('Verse 2',  16, ['Gm','Bb','F','Eb'],   4, 'half_time',     75),
-    S('Bridge',   12, ['Dm','Am','Bb','Eb'],  4, 'bridge_sparse', 65),
-    S('Chorus 2', 16, ['Cm','Gm','Bb','Eb'],  4, 'driving',       95),
-    S('Outro',    12, ['Gm','Dm','Eb','Bb'],  4, 'half_time',     55),
-    ])
-    build_rpp(output_dir, '11_Foul_Beast', 'Foul Beast', 140, [
-    S('Intro',    4, ['G#m'],               4, 'kick_only', 70),
-    S('Verse 1',  8, ['G#m','E','F#','D#'], 2, 'intense',   95),
-    S('Chorus 1', 4, ['G#m','F#','E','D#'], 1, 'intense',   110),
-    S('Verse 2',  8, ['G#m','E','F#','D#'], 2, 'intense',   100),
-    S('Chorus 2', 4, ['G#m','F#','E','D#'], 1, 'intense',   115),
-    S('Outro',    4, ['G#m'],               4, 'driving',   80),
-    ])
-    build_rpp(output_dir, '12_The_Somnium_Shift', 'The Somnium Shift', 120, [
-    S('Intro',    4, ['C#m','G#','A','E'],  1, 'half_time', 65),
-    S('Verse 1',  8, ['C#m','A','G#','E'],  2, 'standard',  78),
-    S('Chorus 1', 8, ['C#m','F#m','A','E'], 2, '54',        90, 5, 2),
-    S('Verse 2',  8, ['C#m','A','G#','E'],  2, 'standard',  80),
-    S('Chorus 2', 8, ['C#m','F#m','A','E'], 2, '54',        95, 5, 2),
-    S('Outro',    4, ['C#m'],               4, 'none',       55),
-    ])
-    build_rpp(output_dir, '13_Benson_and_Hedges', 'Benson and Hedges', 80, [
-    S('Intro',    4, ['D'],              4, 'kick_only', 55),
-    S('Verse 1',  8, ['D','A','Bm','G'], 2, 'half_time', 72),
-    S('Chorus 1', 4, ['D','G','A','D'],  1, 'standard',  88),
-    S('Verse 2',  8, ['D','A','Bm','G'], 2, 'half_time', 75),
-    S('Chorus 2', 4, ['D','G','A','D'],  1, 'standard',  92),
-    S('Outro',    4, ['D'],              4, 'none',       55),
-    ])
-    build_rpp(output_dir, '14_Politician', 'Politician', 170, [
-    S('Intro',    4,  ['Am','G','F','E'],   2, 'dnb',       72),
-    S('Verse 1',  16, ['Am','G','F','E'],   4, 'dnb',       85),
-    S('Chorus 1', 16, ['C','G','Am','F'],   4, 'dnb',       100),
-    S('Verse 2',  16, ['Am','G','F','E'],   4, 'dnb',       85),
-    S('Bridge',   8,  ['Dm','Am','E','Am'], 2, 'half_time', 72),
-    S('Chorus 2', 16, ['C','G','Am','F'],   4, 'dnb',       105),
-    S('Outro',    8,  ['Am','G','F','E'],   2, 'dnb',       70),
-    ])
-    print(f'\n✅ All 14 REAPER .rpp files generated in: {output_dir}')
+    paths = select_songs(spec_paths(args.spec_dir), args.song, key=spec_name)
+    with instrument.session(args, 'make_rpp'):
+        try:
+            build_album(args, output_dir, paths)
+        except SpecError as exc:
+            if not args.watch:
+                raise SystemExit(f'✗ {exc}')
+            print(f'✗ {exc}')
+        if args.watch:
+            watch(args, output_dir)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Three-way merge of a regenerated scaffold into a hand-edited project.
+
+Takes the project ``make_rpp.py`` generated last time (BASE), the one it
+generates now (NEW) and the project as it is after production work
+(CURRENT). Only the parts the generator owns are merged:
+
+- the scaffold tracks' items (``arr_chords_scaffold`` / ``arr_drums_scaffold``,
+  or ``Chords`` / ``Drums (Kick+Snare)`` in a plain scaffold),
+- the region ``MARKER`` lines,
+- the ``TEMPO`` line and the ``TEMPOENVEX`` envelope,
+- the ``MAXPROJLEN`` project length.
+
+Parts are compared by their parsed fields (tokens, with quoting dropped and
+numbers compared as numbers), so a project REAPER merely re-saved, with its
+own indentation and number formatting, still matches BASE. For each part:
+if CURRENT still matches BASE it is replaced by NEW; if NEW did not change
+it, CURRENT is kept; if both changed it is a conflict and
+CURRENT is kept unless ``--prefer new``. Every other byte of CURRENT
+(recorded media, FX chains, routing, other tracks) is copied through
+untouched. Each project is parsed once and the output is assembled from
+byte slices, so large projects merge in one pass.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from rpp_chunks import Chunk, RppProject, parse_rpp, unquote
+
+# Scaffold track in a templated project -> its name in a plain make_rpp scaffold.
+SCAFFOLD_TRACKS = {
+    "arr_chords_scaffold": "Chords",
+    "arr_drums_scaffold": "Drums (Kick+Snare)",
+}
+
+_MARKER_LINE = re.compile(rb"^[ \t]*MARKER [^\n]*\n?", re.MULTILINE)
+_TEMPO_LINE = re.compile(rb"^[ \t]*TEMPO [^\n]*\n?", re.MULTILINE)
+_MAXPROJLEN_LINE = re.compile(rb"^[ \t]*MAXPROJLEN [^\n]*\n?", re.MULTILINE)
+_TOKEN = re.compile(r"\"[^\"]*\"|'[^']*'|`[^`]*`|\S+")
+
+
+@dataclass
+class Part:
+    """One generator-owned span: its text in each project and where it sits in CURRENT."""
+
+    name: str
+    base: bytes | None
+    new: bytes | None
+    current: bytes | None
+    start: int  # span in CURRENT (start == end for an insertion point)
+    end: int
+    status: str = ""
+
+
+def _line_end(data: bytes, end: int) -> int:
+    """Extend a chunk end (just past ">") over its newline."""
+    return end + 1 if data[end : end + 1] == b"\n" else end
+
+
+def _value(token: str) -> str | float:
+    try:
+        return float(token)
+    except ValueError:
+        return unquote(token)
+
+
+def fields(text: bytes) -> list[tuple[str | float, ...]]:
+    """``text`` as one tuple of values per non-blank line, independent of layout and number format."""
+    lines = text.decode("utf-8", "replace").splitlines()
+    return [tuple(map(_value, _TOKEN.findall(line))) for line in lines if line.strip()]
+
+
+def same(a: bytes | None, b: bytes | None) -> bool:
+    if a is None or b is None:
+        return a is b
+    return a == b or fields(a) == fields(b)
+
+
+def chunk_span(chunk: Chunk) -> tuple[int, int]:
+    assert chunk.project is not None
+    return chunk.start, _line_end(chunk.project.data, chunk.end)
+
+
+def scaffold_track(project: RppProject, name: str) -> Chunk | None:
+    return project.track(name) or project.track(SCAFFOLD_TRACKS[name])
+
+
+def item_part(project: RppProject, name: str) -> tuple[bytes | None, int, int]:
+    """All items of a scaffold track as one block, plus the block's span."""
+    track = scaffold_track(project, name)
+    if track is None:
+        return None, -1, -1
+    items = [child for child in track.children if child.tag == "ITEM"]
+    data = project.data
+    if not items:
+        # Insert just before the track's closing ">" line.
+        close = data.rfind(b"\n", track.start, track.end) + 1
+        return b"", close, close
+    start, _ = chunk_span(items[0])
+    _, end = chunk_span(items[-1])
+    return bytes(data[start:end]), start, end
+
+
+def line_part(project: RppProject, pattern: re.Pattern[bytes]) -> tuple[bytes | None, int, int]:
+    """The contiguous run of top-level lines matching ``pattern`` (outside tracks)."""
+    data = project.data
+    limit = project.tracks[0].start if project.tracks else len(data)
+    matches = [m for m in pattern.finditer(data, 0, limit)]
+    if not matches:
+        return None, limit, limit
+    start, end = matches[0].start(), matches[-1].end()
+    return bytes(data[start:end]), start, end
+
+
+def tempo_env_part(project: RppProject) -> tuple[bytes | None, int, int]:
+    env = next((c for c in project.root.children if c.tag == "TEMPOENVEX"), None)
+    if env is None:
+        limit = project.tracks[0].start if project.tracks else len(project.data)
+        return None, limit, limit
+    start, end = chunk_span(env)
+    return bytes(project.data[start:end]), start, end
+
+
+def collect_parts(base: RppProject, new: RppProject, current: RppProject) -> list[Part]:
+    extractors = [
+        ("markers", lambda p: line_part(p, _MARKER_LINE)),
+        ("tempo", lambda p: line_part(p, _TEMPO_LINE)),
+        ("tempo envelope", tempo_env_part),
+        ("project length", lambda p: line_part(p, _MAXPROJLEN_LINE)),
+    ]
+    extractors += [(f"{name} items", lambda p, n=name: item_part(p, n)) for name in SCAFFOLD_TRACKS]
+    parts = []
+    for name, extract in extractors:
+        current_text, start, end = extract(current)
+        parts.append(Part(name, extract(base)[0], extract(new)[0], current_text, start, end))
+    return parts
+
+
+def resolve(part: Part, prefer: str) -> bytes | None:
+    """Text to put in CURRENT's span, or None to leave it alone."""
+    if part.current is None and part.start < 0:
+        part.status = "missing in current project"
+        return None
+    if same(part.new, part.base):
+        part.status = "unchanged"
+        return None
+    if same(part.current, part.new):
+        part.status = "already up to date"
+        return None
+    if same(part.current, part.base) or (part.base is None and not part.current):
+        part.status = "updated"
+        return part.new or b""
+    if prefer == "new":
+        part.status = "conflict: hand edits replaced"
+        return part.new or b""
+    part.status = "conflict: hand edits kept"
+    return None
+
+
+def merge(base: bytes, new: bytes, current: bytes, prefer: str = "current") -> tuple[bytes, list[Part]]:
+    parts = collect_parts(parse_rpp(base), parse_rpp(new), parse_rpp(current))
+    edits = []
+    for part in parts:
+        text = resolve(part, prefer)
+        if text is not None:
+            edits.append((part.start, part.end, text))
+    edits.sort(key=lambda e: e[0])
+    out = []
+    pos = 0
+    for start, end, text in edits:
+        out.append(current[pos:start])
+        out.append(text)
+        pos = end
+    out.append(current[pos:])
+    return b"".join(out), parts
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path, help="Project as generated last time")
+    parser.add_argument("new", type=Path, help="Project as generated now")
+    parser.add_argument("current", type=Path, help="Hand-edited project to merge into")
+    parser.add_argument("-o", "--output", type=Path, help="Where to write the result (default: CURRENT, in place)")
+    parser.add_argument(
+        "--prefer",
+        choices=("current", "new"),
+        default="current",
+        help="Which side wins when a part was changed both by hand and by the generator (default: %(default)s)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    t0 = time.perf_counter()
+    base, new, current = (path.read_bytes() for path in (args.base, args.new, args.current))
+    merged, parts = merge(base, new, current, args.prefer)
+    for part in parts:
+        print(f"{part.name:<28} {part.status}")
+
+    output = args.output or args.current
+    if args.dry_run:
+        print(f"\n(dry run) {output} would {'change' if merged != current else 'stay the same'}")
+    elif merged != current or output != args.current:
+        tmp = output.with_name(output.name + ".tmp")
+        tmp.write_bytes(merged)
+        os.replace(tmp, output)
+        print(f"\nwrote {output}  ({len(merged)} bytes, {(time.perf_counter() - t0) * 1000:.1f} ms)")
+    else:
+        print(f"\n{output} already up to date")
+    conflicts = [p for p in parts if p.status.startswith("conflict")]
+    return 1 if conflicts and args.prefer == "current" else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
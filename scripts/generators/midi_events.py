@@ -0,0 +1,151 @@
+"""Column-oriented MIDI event buffers for the generators.
+
+Notes and the raw on/off stream are stored as parallel ``array`` columns
+instead of lists of tuples: conversion to ticks, ordering and delta
+computation run as whole-column passes (``map`` / one ``sorted`` argsort),
+and REAPER text is formatted for a whole clip in one ``join``.
+"""
+
+from __future__ import annotations
+
+from array import array
+from itertools import chain, repeat
+from operator import itemgetter, lshift, or_
+from typing import Iterable, Iterator
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+CONTROL_CHANGE = 0xB0
+ALL_NOTES_OFF = 0x7B
+
+Note = tuple[int, float, float, int]
+
+
+class NoteBuffer:
+    """Notes as (pitch, start_beat, dur_beats, velocity) columns.
+
+    Iterates as 4-tuples, so callers written against the old list-of-tuples
+    return value keep working.
+    """
+
+    __slots__ = ("pitch", "start", "dur", "vel")
+
+    def __init__(self) -> None:
+        self.pitch = array("i")
+        self.start = array("d")
+        self.dur = array("d")
+        self.vel = array("i")
+
+    @classmethod
+    def from_notes(cls, notes: Iterable[Note]) -> NoteBuffer:
+        if isinstance(notes, NoteBuffer):
+            return notes
+        buf = cls()
+        for note in notes:
+            buf.add(*note)
+        return buf
+
+    def add(self, pitch: int, start: float, dur: float, vel: int) -> None:
+        self.pitch.append(pitch)
+        self.start.append(start)
+        self.dur.append(dur)
+        self.vel.append(vel)
+
+    def add_chord(self, pitches: Iterable[int], start: float, dur: float, vel: int) -> None:
+        for p in pitches:
+            self.add(p, start, dur, vel)
+
+    def extend(self, other: NoteBuffer, offset: float = 0.0) -> None:
+        """Append ``other``'s notes, moved ``offset`` beats later."""
+        self.pitch.extend(other.pitch)
+        self.start.extend(other.start if not offset else array("d", (s + offset for s in other.start)))
+        self.dur.extend(other.dur)
+        self.vel.extend(other.vel)
+
+    def __len__(self) -> int:
+        return len(self.pitch)
+
+    def __iter__(self) -> Iterator[Note]:
+        return zip(self.pitch, self.start, self.dur, self.vel)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, NoteBuffer):
+            return list(self) == list(other)
+        return NotImplemented
+
+
+class EventStream:
+    """A flat MIDI stream as tick/status/data1/data2 columns."""
+
+    __slots__ = ("tick", "status", "data1", "data2")
+
+    def __init__(self) -> None:
+        self.tick = array("i")
+        self.status = array("i")
+        self.data1 = array("i")
+        self.data2 = array("i")
+
+    @classmethod
+    def from_notes(cls, notes: Iterable[Note], ppq: int, clip_length_beats: float | None = None) -> EventStream:
+        """Note-ons, note-offs and an optional trailing all-notes-off, unsorted."""
+        notes = NoteBuffer.from_notes(notes)
+        n = len(notes)
+        stream = cls()
+        # round() of a float is already an int; same ticks as int(round(beats * ppq)).
+        scale = float(ppq).__mul__
+        stream.tick = array("i", map(round, map(scale, notes.start)))
+        stream.tick.extend(map(round, map(scale, map(float.__add__, notes.start, notes.dur))))
+        stream.status = array("i", [NOTE_ON]) * n + array("i", [NOTE_OFF]) * n
+        stream.data1 = notes.pitch + notes.pitch
+        stream.data2 = notes.vel + array("i", [0]) * n
+        if clip_length_beats is not None:
+            stream.tick.append(int(round(clip_length_beats * ppq)))
+            stream.status.append(CONTROL_CHANGE)
+            stream.data1.append(ALL_NOTES_OFF)
+            stream.data2.append(0)
+        return stream
+
+    def __len__(self) -> int:
+        return len(self.tick)
+
+    def order(self) -> list[int]:
+        """Stable argsort by (tick, status): note-offs before note-ons at a tick.
+
+        Tick, status and original index are packed into one int per event so
+        the sort runs without a Python key function.
+        """
+        n = len(self.tick)
+        shift = max(n - 1, 1).bit_length()
+        keys = map(or_, map(lshift, map(or_, map(lshift, self.tick, repeat(8)), self.status), repeat(shift)), range(n))
+        mask = (1 << shift) - 1
+        return [k & mask for k in sorted(keys)]
+
+    def sorted(self) -> EventStream:
+        out = EventStream()
+        if len(self.tick) < 2:
+            for col in self.__slots__:
+                setattr(out, col, array("i", getattr(self, col)))
+            return out
+        take = itemgetter(*self.order())
+        for col in self.__slots__:
+            setattr(out, col, array("i", take(getattr(self, col))))
+        return out
+
+    def deltas(self) -> array:
+        """Tick offsets from the previous event (first one from tick 0)."""
+        return array("i", map(int.__sub__, self.tick, chain((0,), self.tick[:-1])))
+
+    def __iter__(self) -> Iterator[tuple[int, int, int, int]]:
+        return zip(self.tick, self.status, self.data1, self.data2)
+
+    def reaper_text(self, indent: str = "      ") -> str:
+        """All events as REAPER inline ``E <delta> <status> <d1> <d2>`` lines."""
+        if not self.tick:
+            return ""
+        # Only a handful of distinct (status, data1, data2) triples occur, so
+        # their hex text is formatted once and looked up per event.
+        codes = list(map(or_, map(lshift, self.status, repeat(16)), map(or_, map(lshift, self.data1, repeat(8)), self.data2)))
+        suffix = {c: " %02x %02x %02x" % (c >> 16, (c >> 8) & 0xFF, c & 0xFF) for c in set(codes)}
+        prefix = indent + "E "
+        return prefix + ("\n" + prefix).join(map(str.__add__, map(str, self.deltas()), map(suffix.__getitem__, codes)))
+
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Plan section x bus stem renders for the album as one batched job file.
+
+For every project, each region (section) is paired with each stem target:
+the v01 contract buses (``BUS_DRUM`` ... ``BUS_PREMASTER``) when the project
+has them, otherwise every track that holds items (plain scaffolds). A cell
+is fingerprinted from everything that feeds its target inside the region:
+the items on the target and on every track routed into it (via ``AUXRECV``,
+transitively), with positions taken relative to the region start, GUID/name
+lines dropped and pooled MIDI resolved to its events, plus the region length
+and any tempo points inside it. Cells with no items are skipped; cells whose
+fingerprint was already seen are written as copies of the first render
+instead of being rendered again. Sources carrying automation envelopes are
+never deduplicated.
+
+The result is one region-render-matrix pass per project (all of which can
+go into a single REAPER render-queue run) and a list of file copies.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from rpp_chunks import Chunk, RppProject
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+REAPER_DIR = REPO_ROOT / "reaper"
+DEFAULT_PLAN = REAPER_DIR / "render_plan.json"
+DEFAULT_STEM_DIR = "stems"
+
+STEM_BUSES = (
+    "BUS_DRUM",
+    "BUS_BASS",
+    "BUS_MUSIC",
+    "BUS_VOX",
+    "BUS_FX",
+    "BUS_PARALLEL",
+    "BUS_PREMASTER",
+)
+
+# Item lines that differ between identical-sounding clips.
+VOLATILE_KEYS = frozenset({b"IGUID", b"GUID", b"POOLEDEVTS", b"POSITION", b"NAME", b"SEL", b"IID"})
+# Track sub-chunks that automate something over time.
+ENVELOPE_TAG = re.compile(r"(ENV\d*|PARMENV|AUXVOLENV|AUXPANENV|AUXMUTEENV)$")
+
+
+@dataclass
+class Render:
+    region: int
+    section: str
+    track: str
+    start: float
+    end: float
+    file: str
+
+
+@dataclass
+class Copy:
+    source: str
+    file: str
+
+
+@dataclass
+class ProjectPlan:
+    project: str
+    regions: int
+    targets: list[str]
+    renders: list[Render] = field(default_factory=list)
+    copies: list[Copy] = field(default_factory=list)
+    silent: int = 0
+
+    @property
+    def cells(self) -> int:
+        return self.regions * len(self.targets)
+
+    def matrix(self) -> dict[str, list[str]]:
+        """Region name -> tracks to render, as set in REAPER's region render matrix."""
+        out: dict[str, list[str]] = {}
+        for render in self.renders:
+            out.setdefault(render.section, []).append(render.track)
+        return out
+
+
+def album_projects(reaper_dir: Path = REAPER_DIR) -> list[Path]:
+    """Album song projects (``NN_Name.rpp``), without templates or ``.v01_template`` copies."""
+    return sorted(p for p in reaper_dir.glob("[0-9][0-9]_*.rpp") if p.name.count(".") == 1)
+
+
+def slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")
+
+
+def stem_targets(project: RppProject) -> list[Chunk]:
+    buses = [project.tracks_by_name[name] for name in STEM_BUSES if name in project.tracks_by_name]
+    if buses:
+        return buses
+    return [track for track in project.tracks if any(track.find("ITEM"))]
+
+
+def feeding_tracks(project: RppProject, target: Chunk) -> list[Chunk]:
+    """``target`` plus every track routed into it, directly or through other buses."""
+    seen: dict[int, Chunk] = {}
+    stack = [target]
+    index = {id(track): i for i, track in enumerate(project.tracks)}
+    while stack:
+        track = stack.pop()
+        i = index[id(track)]
+        if i in seen:
+            continue
+        seen[i] = track
+        for recv in track.fields.get("AUXRECV", []):
+            src = int(recv.split(" ", 1)[0])
+            if 0 <= src < len(project.tracks):
+                stack.append(project.tracks[src])
+    return [seen[i] for i in sorted(seen)]
+
+
+def is_automated(track: Chunk) -> bool:
+    return any(ENVELOPE_TAG.search(child.tag) and child.count("PT") > 1 for child in track.children)
+
+
+def item_span(item: Chunk) -> tuple[float, float]:
+    start = float(item.fields["POSITION"][0])
+    return start, start + float(item.fields["LENGTH"][0])
+
+
+def stable_lines(raw: bytes) -> bytes:
+    return b"\n".join(line for line in raw.split(b"\n") if line.strip().split(b" ", 1)[0] not in VOLATILE_KEYS)
+
+
+def pool_sources(project: RppProject) -> dict[str, bytes]:
+    """POOLEDEVTS GUID -> source text of the pooled instance that carries the events."""
+    out: dict[str, bytes] = {}
+    for track in project.tracks:
+        for source in track.find("SOURCE"):
+            pool = source.fields.get("POOLEDEVTS")
+            if pool:
+                body = stable_lines(source.raw)
+                if len(body) > len(out.get(pool[0], b"")):
+                    out[pool[0]] = body
+    return out
+
+
+def item_body(item: Chunk, pools: dict[str, bytes]) -> bytes:
+    """Item text minus volatile lines, with pooled MIDI resolved to the pool's events."""
+    source = next(item.find("SOURCE"), None)
+    pool = source.fields.get("POOLEDEVTS") if source else None
+    if not pool or pool[0] not in pools:
+        return stable_lines(item.raw)
+    head = item.raw[: source.start - item.start]
+    tail = item.raw[source.end - item.start :]
+    return stable_lines(head + tail) + pools[pool[0]]
+
+
+def tempo_points(project: RppProject) -> list[tuple[float, str]]:
+    envelope = next(project.root.find("TEMPOENVEX"), None)
+    if envelope is None:
+        return []
+    out = []
+    for value in envelope.fields.get("PT", []):
+        position, _, rest = value.partition(" ")
+        out.append((float(position), rest))
+    return out
+
+
+def cell_fingerprint(
+    sources: list[Chunk],
+    start: float,
+    end: float,
+    tempo: list[tuple[float, str]],
+    pools: dict[str, bytes],
+    salt: str | None,
+) -> str | None:
+    """Hash of what a target plays between ``start`` and ``end``; None when nothing does."""
+    h = hashlib.sha256()
+    h.update(f"{end - start:.6f}".encode())
+    # The tempo in effect at the region start, plus changes inside it.
+    active = [p for p in tempo if p[0] <= start][-1:] + [p for p in tempo if start < p[0] < end]
+    for position, rest in active:
+        h.update(f"|T{max(position - start, 0):.6f} {rest}".encode())
+    items = 0
+    for track in sources:
+        for item in track.find("ITEM"):
+            a, b = item_span(item)
+            if a < end and b > start:
+                items += 1
+                h.update(f"|I{a - start:.6f}\n".encode())
+                h.update(item_body(item, pools))
+    if not items:
+        return None
+    if salt is not None:
+        h.update(salt.encode())
+    return h.hexdigest()
+
+
+def plan_project(path: Path, stem_dir: str = DEFAULT_STEM_DIR) -> ProjectPlan:
+    project = RppProject.from_path(path)
+    regions = project.regions
+    song = path.name.split(".")[0]
+    targets = stem_targets(project)
+    plan = ProjectPlan(display_path(path), len(regions), [t.name or "" for t in targets])
+    tempo = tempo_points(project)
+    pools = pool_sources(project)
+    song_end = max((item_span(i)[1] for t in project.tracks for i in t.find("ITEM")), default=0.0)
+
+    first_render: dict[str, str] = {}
+    for target in targets:
+        sources = feeding_tracks(project, target)
+        automated = any(is_automated(track) for track in sources)
+        for n, region in enumerate(regions):
+            end = region.end
+            if end is None:
+                end = regions[n + 1].start if n + 1 < len(regions) else song_end
+            # Automated sources only match themselves.
+            salt = f"{song}|{region.index}" if automated else None
+            fingerprint = cell_fingerprint(sources, region.start, end, tempo, pools, salt)
+            if fingerprint is None:
+                plan.silent += 1
+                continue
+            name = target.name or ""
+            out = f"{stem_dir}/{song}/{region.index:02d}_{slug(region.name)}__{name}.wav"
+            key = f"{name}|{fingerprint}"
+            if key in first_render:
+                plan.copies.append(Copy(first_render[key], out))
+            else:
+                first_render[key] = out
+                plan.renders.append(Render(region.index, region.name, name, region.start, end, out))
+    return plan
+
+
+def display_path(path: Path) -> str:
+    try:
+        return path.resolve().relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def job_file(plans: list[ProjectPlan]) -> dict:
+    return {
+        "passes": [
+            {
+                "project": plan.project,
+                "bounds": "region_matrix",
+                "matrix": plan.matrix(),
+                "renders": [asdict(r) for r in plan.renders],
+            }
+            for plan in plans
+            if plan.renders
+        ],
+        "copies": [asdict(c) for plan in plans for c in plan.copies],
+        "summary": {
+            "projects": len(plans),
+            "cells": sum(p.cells for p in plans),
+            "renders": sum(len(p.renders) for p in plans),
+            "copies": sum(len(p.copies) for p in plans),
+            "silent": sum(p.silent for p in plans),
+        },
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", type=Path, help="Projects to plan (default: every album song in reaper/)")
+    parser.add_argument(
+        "--output", type=Path, default=DEFAULT_PLAN, help="Job file to write (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--stem-dir", default=DEFAULT_STEM_DIR, help="Render output folder used in file names (default: %(default)s)"
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    paths = args.paths or album_projects()
+    t0 = time.perf_counter()
+    plans = [plan_project(path, args.stem_dir) for path in paths]
+    jobs = job_file(plans)
+    args.output.write_text(json.dumps(jobs, indent=2) + "\n", encoding="utf-8")
+
+    for plan in plans:
+        print(
+            f"{plan.project}: {plan.regions} regions x {len(plan.targets)} targets = {plan.cells} cells -> "
+            f"{len(plan.renders)} renders, {len(plan.copies)} copies, {plan.silent} silent"
+        )
+    summary = jobs["summary"]
+    print(
+        f"\n{len(jobs['passes'])} render pass(es) for {summary['projects']} project(s): "
+        f"{summary['renders']} of {summary['cells']} cells rendered, {summary['copies']} copied, "
+        f"{summary['silent']} silent  ({(time.perf_counter() - t0) * 1000:.1f} ms)"
+    )
+    print(f"Wrote {display_path(args.output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
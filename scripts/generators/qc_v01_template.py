@@ -1,15 +1,25 @@
 #!/usr/bin/env python3
-"""QC checks for the Static Bloom v01 template."""
+"""QC checks for the v01 template and the album projects built on it."""
 
 from __future__ import annotations
 
-import re
-import sys
+import argparse
+import json
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Callable
+
+import instrument
+from rpp_chunks import RppProject
+from song_spec import SPEC_DIR, SpecError, load_song
 
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
-TEMPLATE = REPO_ROOT / "reaper" / "templates" / "lalo_standard_v01.rpp"
+REAPER_DIR = REPO_ROOT / "reaper"
+TEMPLATE = REAPER_DIR / "templates" / "lalo_standard_v01.rpp"
 
 REQUIRED_NAMES = [
     "00_REF",
@@ -44,76 +54,214 @@ LEGACY_TOKENS = [
 ]
 
 
-def fail(msg: str) -> None:
-    print(f"FAIL: {msg}")
-    sys.exit(1)
+# Minimum AUXRECV inputs per contract bus.
+REQUIRED_AUX = {
+    "BUS_DRUM": 1,
+    "BUS_BASS": 1,
+    "BUS_MUSIC": 1,
+    "BUS_VOX": 1,
+    "BUS_FX": 1,
+    "BUS_PREMASTER": 5,
+}
 
+# Marker floor for projects that are not an album song (e.g. the template).
+MIN_MARKERS = 7
+# A project carrying this bus has had the v01 template applied; plain make_rpp scaffolds do not.
+TEMPLATED_MARK = b"BUS_PREMASTER"
 
-def main() -> int:
-    if not TEMPLATE.exists():
-        fail(f"Missing template file: {TEMPLATE}")
-
-    text = TEMPLATE.read_text(encoding="utf-8")
-
-    for token in LEGACY_TOKENS:
-        if token in text:
-            fail(f"Found unsupported token in template: {token}")
-
-    for name in REQUIRED_NAMES:
-        if f'NAME "{name}"' not in text:
-            fail(f"Missing required track/folder name: {name}")
-
-    markers = re.findall(r"^\s*MARKER\s+\d+\s+", text, flags=re.MULTILINE)
-    if len(markers) < 7:
-        fail(f"Expected at least 7 section markers, found {len(markers)}")
-
-    # Routing sanity checks for contract buses.
-    lines = text.splitlines()
-
-    def get_track_chunks() -> dict[str, str]:
-        chunks: dict[str, str] = {}
-        i = 0
-        while i < len(lines):
-            if lines[i].startswith("  <TRACK "):
-                start = i
-                depth = 1
-                i += 1
-                while i < len(lines):
-                    s = lines[i].strip()
-                    if s.startswith("<"):
-                        depth += 1
-                    elif s == ">":
-                        depth -= 1
-                        if depth == 0:
-                            break
-                    i += 1
-                chunk_lines = lines[start : i + 1]
-                chunk = "\n".join(chunk_lines)
-                name_match = re.search(r'^\s*NAME "(.*?)"', chunk, flags=re.MULTILINE)
-                if name_match:
-                    chunks[name_match.group(1)] = chunk
-            i += 1
-        return chunks
-
-    track_chunks = get_track_chunks()
-
-    def require_aux(bus_name: str, minimum: int) -> None:
-        chunk = track_chunks.get(bus_name)
-        if not chunk:
-            fail(f"Missing track chunk for {bus_name}")
-        aux_count = len(re.findall(r"^\s*AUXRECV ", chunk, flags=re.MULTILINE))
+
+@dataclass
+class Violation:
+    path: str
+    rule: str
+    message: str
+
+
+def expected_markers(path: Path) -> int:
+    """One marker per section for album songs; MIN_MARKERS for anything else."""
+    spec = SPEC_DIR / f"{path.name.split('.')[0]}.json"
+    if not spec.exists():
+        return MIN_MARKERS
+    return len(load_song(spec)[3])
+
+
+def rule_legacy_tokens(project: RppProject, path: Path) -> list[str]:
+    return [
+        f"Found unsupported token: {token}"
+        for token in LEGACY_TOKENS
+        if project.data.find(token.encode("ascii")) >= 0  # mmap "in" only tests single bytes
+    ]
+
+
+def rule_required_names(project: RppProject, path: Path) -> list[str]:
+    return [
+        f"Missing required track/folder name: {name}"
+        for name in REQUIRED_NAMES
+        if name not in project.tracks_by_name
+    ]
+
+
+def rule_markers(project: RppProject, path: Path) -> list[str]:
+    minimum = expected_markers(path)
+    found = len(project.regions)
+    if found < minimum:
+        return [f"Expected at least {minimum} section markers, found {found}"]
+    return []
+
+
+def rule_routing(project: RppProject, path: Path) -> list[str]:
+    messages = []
+    for bus_name, minimum in REQUIRED_AUX.items():
+        track = project.track(bus_name)
+        if track is None:
+            messages.append(f"Missing track chunk for {bus_name}")
+            continue
+        aux_count = track.count("AUXRECV")
         if aux_count < minimum:
-            fail(f"{bus_name} expected >= {minimum} AUXRECV entries, found {aux_count}")
+            messages.append(f"{bus_name} expected >= {minimum} AUXRECV entries, found {aux_count}")
+    return messages
+
+
+RULES: dict[str, Callable[[RppProject, Path], list[str]]] = {
+    "legacy_tokens": rule_legacy_tokens,
+    "required_names": rule_required_names,
+    "markers": rule_markers,
+    "routing": rule_routing,
+}
+
+
+def check_project(path: Path) -> dict[str, list[str]]:
+    """Parse ``path`` once and run every rule; returns messages keyed by rule name."""
+    if not path.exists():
+        return {"file": [f"Missing project file: {path}"]}
+    with instrument.span(f"project {path.name}"):
+        try:
+            with instrument.span("parse"):
+                project = RppProject.from_path(path)
+        except (OSError, ValueError) as exc:
+            return {"file": [f"Could not parse {path}: {exc}"]}
+        instrument.count(bytes=len(project.data))
+        results = {"file": []}
+        with project:
+            for rule, check in RULES.items():
+                with instrument.span(f"rule {rule}"):
+                    try:
+                        results[rule] = check(project, path)
+                    except SpecError as exc:
+                        results[rule] = [f"Could not load song spec: {exc}"]
+    return results
+
+
+def templated_projects(reaper_dir: Path = REAPER_DIR) -> tuple[list[Path], list[Path]]:
+    """(projects the v01 contract applies to, untemplated scaffolds) under ``reaper_dir``."""
+    checked, skipped = [], []
+    for path in sorted(reaper_dir.rglob("*.rpp")):
+        templated = path.parent.name == "templates" or path.name.endswith(".v01_template.rpp")
+        if templated or TEMPLATED_MARK in path.read_bytes():
+            checked.append(path)
+        else:
+            skipped.append(path)
+    return checked, skipped
+
+
+def run(paths: list[Path], jobs: int) -> dict[Path, dict[str, list[str]]]:
+    jobs = min(jobs, len(paths))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return dict(zip(paths, pool.map(check_project, paths)))
+    return {path: check_project(path) for path in paths}
+
+
+def violations(results: dict[Path, dict[str, list[str]]]) -> list[Violation]:
+    return [
+        Violation(display_path(path), rule, message)
+        for path, rules in results.items()
+        for rule, messages in rules.items()
+        for message in messages
+    ]
+
+
+def display_path(path: Path) -> str:
+    try:
+        return path.resolve().relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def write_json(results: dict[Path, dict[str, list[str]]], out: Path) -> None:
+    report = {
+        "files": len(results),
+        "violations": [asdict(v) for v in violations(results)],
+    }
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+def write_junit(results: dict[Path, dict[str, list[str]]], out: Path) -> None:
+    suites = ET.Element("testsuites", name="qc_v01_template")
+    for path, rules in results.items():
+        failures = sum(1 for messages in rules.values() if messages)
+        suite = ET.SubElement(
+            suites, "testsuite", name=display_path(path), tests=str(len(rules)), failures=str(failures)
+        )
+        for rule, messages in rules.items():
+            case = ET.SubElement(suite, "testcase", classname=display_path(path), name=rule)
+            for message in messages:
+                ET.SubElement(case, "failure", message=message)
+    ET.indent(suites)
+    ET.ElementTree(suites).write(out, encoding="utf-8", xml_declaration=True)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="*", type=Path, help=f"Projects to check (default: {TEMPLATE.name})")
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Check every templated .rpp under reaper/ (plain make_rpp scaffolds are skipped)",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=0, help="Worker processes; 0 uses every core (default: %(default)s)"
+    )
+    parser.add_argument("--json", type=Path, metavar="PATH", help="Write a JSON violation report")
+    parser.add_argument("--junit", type=Path, metavar="PATH", help="Write a JUnit XML report")
+    instrument.add_arguments(parser, "qc_v01_template")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    paths = list(args.paths)
+    if args.all:
+        templated, skipped = templated_projects()
+        paths.extend(templated)
+        if skipped:
+            print(f"skipping {len(skipped)} untemplated scaffold(s): {', '.join(p.name for p in skipped)}")
+    if not paths:
+        paths = [TEMPLATE]
+
+    jobs = 1 if instrument.requested(args) else args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    with instrument.session(args, "qc_v01_template"):
+        results = run(paths, jobs)
+        found = violations(results)
+
+        with instrument.span("reports"):
+            if args.json:
+                write_json(results, args.json)
+            if args.junit:
+                write_junit(results, args.junit)
 
-    require_aux("BUS_DRUM", 1)
-    require_aux("BUS_BASS", 1)
-    require_aux("BUS_MUSIC", 1)
-    require_aux("BUS_VOX", 1)
-    require_aux("BUS_FX", 1)
-    require_aux("BUS_PREMASTER", 5)
+        for v in found:
+            print(f"FAIL: {v.path}: {v.message}")
+        if found:
+            bad = len({v.path for v in found})
+            print(f"{len(found)} violation(s) in {bad} of {len(paths)} project(s).")
+            return 1
 
-    print("OK: v01 template QC passed.")
-    return 0
+        if paths == [TEMPLATE]:
+            print("OK: v01 template QC passed.")
+        else:
+            print(f"OK: v01 QC passed for {len(paths)} project(s).")
+        return 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""Render the song specs to WAV previews without REAPER (previews/*.wav).
+
+Uses the same chord and drum events as make_rpp.py / make_midi.py
+(``make_midi.song_notes``), placed on the song's tempo map, so a preview
+follows tempo ramps and meter changes exactly like the scaffold does.
+
+Voices are deliberately simple: chords are additive sine tones with a
+short attack and exponential decay, kick and snare are synthesised
+one-shots. Synthesis works on whole ``array`` columns:
+
+- a pitch is one wavetable holding a whole number of cycles, so a note is
+  the table repeated (C-speed ``array`` repetition) and trimmed;
+- every distinct chord hit (voicing, length, velocity) is mixed once and
+  cached; drum one-shots are cached per velocity;
+- the song is written in fixed-size 16-bit blocks: chord hits are copied
+  into the block by slice assignment, only drum hits are summed sample by
+  sample, and each block is streamed to the ``wave`` writer, so memory does
+  not grow with song length.
+
+``--sections`` writes one file per section instead (``previews/<song>/NN_Name.wav``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import re
+import sys
+import time
+import wave
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import groupby
+from operator import add, mul
+from pathlib import Path
+
+from make_midi import song_notes
+from make_rpp import DEFAULT_VOICING, VOICING_MODES, section_starts, select_songs, spec_name
+from song_spec import SPEC_DIR, load_song, spec_paths
+from timeline import Timeline
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+PREVIEW_DIR = REPO_ROOT / "previews"
+
+DEFAULT_RATE = 22050
+BLOCK_SAMPLES = 1 << 15
+FULL_SCALE = 32767
+
+# Additive chord voice: (harmonic, amplitude).
+HARMONICS = ((1, 1.0), (2, 0.35), (3, 0.15))
+# Peak level of a whole chord and of one drum hit, as a fraction of full scale.
+CHORD_LEVEL = 0.45
+DRUM_LEVEL = 0.3
+ATTACK_SECS = 0.008
+RELEASE_SECS = 0.03
+DECAY_PER_SEC = 1.2  # chord amplitude falls by e^-1.2 per second held
+KICK, SNARE = 36, 38
+
+
+def midi_hz(pitch: int) -> float:
+    return 440.0 * 2 ** ((pitch - 69) / 12)
+
+
+@lru_cache(maxsize=None)
+def wavetable(pitch: int, rate: int) -> array:
+    """One period of the chord voice, stretched over ``k`` cycles so its length is a whole
+    number of samples (pitch error under a cent for k <= 16)."""
+    period = rate / midi_hz(pitch)
+    k = min(range(1, 17), key=lambda c: abs(c * period - round(c * period)))
+    length = round(k * period)
+    step = 2 * math.pi * k / length
+    return array(
+        "f", (sum(amp * math.sin(h * step * i) for h, amp in HARMONICS) for i in range(length))
+    )
+
+
+@lru_cache(maxsize=64)
+def envelope(n: int, rate: int) -> array:
+    attack = max(1, min(int(ATTACK_SECS * rate), n // 4))
+    release = max(1, min(int(RELEASE_SECS * rate), n // 4))
+    decay = math.exp(-DECAY_PER_SEC / rate)
+    env = array("f", (decay**i for i in range(n)))
+    for i in range(attack):
+        env[i] *= i / attack
+    for i in range(release):
+        env[n - 1 - i] *= i / release
+    return env
+
+
+def tiled(table: array, n: int) -> array:
+    return (table * (n // len(table) + 1))[:n]
+
+
+@lru_cache(maxsize=128)
+def chord_clip(pitches: tuple[int, ...], n: int, vel: int, rate: int) -> array:
+    """One chord hit of ``n`` 16-bit samples."""
+    mix = tiled(wavetable(pitches[0], rate), n)
+    for pitch in pitches[1:]:
+        mix = array("f", map(add, mix, tiled(wavetable(pitch, rate), n)))
+    peak = sum(amp for _, amp in HARMONICS) * len(pitches)
+    gain = CHORD_LEVEL * FULL_SCALE * vel / 127 / peak
+    return array("h", map(int, map(mul, mix, map(mul, envelope(n, rate), [gain] * n))))
+
+
+@lru_cache(maxsize=None)
+def drum_voice(pitch: int, rate: int) -> array:
+    """Unit-level one-shot: a pitch-dropping sine kick, a tone+noise snare, else a noise tick."""
+    noise = random.Random(pitch)
+    if pitch == KICK:
+        n = int(0.25 * rate)
+        phase, out = 0.0, array("f")
+        for i in range(n):
+            t = i / rate
+            phase += 2 * math.pi * (45 + 75 * math.exp(-t * 30)) / rate
+            out.append(math.sin(phase) * math.exp(-t * 14))
+        return out
+    if pitch == SNARE:
+        n = int(0.18 * rate)
+        return array(
+            "f",
+            (
+                (0.45 * math.sin(2 * math.pi * 185 * i / rate) + 0.55 * noise.uniform(-1, 1)) * math.exp(-i / rate * 22)
+                for i in range(n)
+            ),
+        )
+    n = int(0.05 * rate)
+    return array("f", (noise.uniform(-1, 1) * math.exp(-i / rate * 60) for i in range(n)))
+
+
+@lru_cache(maxsize=None)
+def drum_clip(pitch: int, vel: int, rate: int) -> array:
+    gain = DRUM_LEVEL * FULL_SCALE * vel / 127
+    return array("h", (int(x * gain) for x in drum_voice(pitch, rate)))
+
+
+class Preview:
+    """A song's chord and drum hits as (start sample, clip) lists, ready to mix in blocks."""
+
+    def __init__(self, song: tuple, rate: int = DEFAULT_RATE, voicing_mode: str = DEFAULT_VOICING) -> None:
+        self.filename, self.title, bpm, self.sections = song
+        self.rate = rate
+        starts, total_beats = section_starts(self.sections)
+        self.timeline = Timeline.from_sections(bpm, self.sections)
+        self.bounds = [self.sample(b) for b in starts] + [self.sample(total_beats)]
+        chords, drums = song_notes(self.sections, starts, voicing_mode)
+
+        # Chord notes sharing start, length and velocity are one hit.
+        self.chords: list[tuple[int, array]] = []
+        for (start, dur, vel), notes in groupby(sorted(chords, key=lambda n: (n[1], n[2], n[3], n[0])), key=lambda n: n[1:]):
+            a = self.sample(start)
+            clip = chord_clip(tuple(n[0] for n in notes), self.sample(start + dur) - a, vel, rate)
+            self.chords.append((a, clip))
+        self.drums = sorted((self.sample(start), drum_clip(pitch, vel, rate)) for pitch, start, _dur, vel in drums)
+        self._drum_starts = [a for a, _ in self.drums]
+        self._longest_drum = max((len(c) for _, c in self.drums), default=0)
+        self._chord_starts = [a for a, _ in self.chords]
+        self._longest_chord = max((len(c) for _, c in self.chords), default=0)
+
+    def sample(self, beat: float) -> int:
+        return round(self.timeline.beat_to_secs(beat) * self.rate)
+
+    @property
+    def length(self) -> int:
+        return self.bounds[-1]
+
+    def _overlapping(self, hits, starts, longest, lo, hi):
+        for i in range(bisect_left(starts, lo - longest), bisect_left(starts, hi)):
+            a, clip = hits[i]
+            if a + len(clip) > lo:
+                yield a, clip
+
+    def block(self, lo: int, hi: int) -> array:
+        """16-bit samples ``[lo, hi)`` of the mix."""
+        buf = array("h", bytes(2 * (hi - lo)))
+        # Chord hits never overlap each other: copy them in.
+        for a, clip in self._overlapping(self.chords, self._chord_starts, self._longest_chord, lo, hi):
+            s, e = max(a, lo), min(a + len(clip), hi)
+            buf[s - lo : e - lo] = clip[s - a : e - a]
+        for a, clip in self._overlapping(self.drums, self._drum_starts, self._longest_drum, lo, hi):
+            s, e = max(a, lo), min(a + len(clip), hi)
+            mixed = list(map(add, buf[s - lo : e - lo], clip[s - a : e - a]))
+            try:
+                buf[s - lo : e - lo] = array("h", mixed)
+            except OverflowError:
+                buf[s - lo : e - lo] = array("h", (min(max(x, -FULL_SCALE), FULL_SCALE) for x in mixed))
+        if sys.byteorder == "big":
+            buf.byteswap()
+        return buf
+
+    def write(self, path: Path, lo: int = 0, hi: int | None = None, block: int = BLOCK_SAMPLES) -> int:
+        """Stream samples ``[lo, hi)`` to a mono 16-bit WAV; returns the sample count."""
+        hi = self.length if hi is None else hi
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(path), "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.rate)
+            for start in range(lo, hi, block):
+                out.writeframes(self.block(start, min(start + block, hi)).tobytes())
+        return hi - lo
+
+
+def slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")
+
+
+def render_song(song: tuple, output_dir: Path, rate: int, voicing_mode: str, per_section: bool) -> tuple:
+    """Worker entry point; returns (filename, files written, audio seconds, wall seconds)."""
+    t0 = time.perf_counter()
+    preview = Preview(song, rate, voicing_mode)
+    if per_section:
+        files = []
+        for i, sec in enumerate(preview.sections):
+            path = output_dir / preview.filename / f"{i + 1:02d}_{slug(sec['name'])}.wav"
+            preview.write(path, preview.bounds[i], preview.bounds[i + 1])
+            files.append(path)
+    else:
+        files = [output_dir / f"{preview.filename}.wav"]
+        preview.write(files[0])
+    return preview.filename, files, preview.length / rate, time.perf_counter() - t0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--output-dir", type=Path, default=PREVIEW_DIR, help="Directory for .wav files (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--spec-dir", type=Path, default=SPEC_DIR, help="Directory of per-song spec files (default: %(default)s)"
+    )
+    parser.add_argument("--rate", type=int, default=DEFAULT_RATE, help="Sample rate in Hz (default: %(default)s)")
+    parser.add_argument("--sections", action="store_true", help="Write one file per section instead of one per song")
+    parser.add_argument(
+        "--voicing",
+        choices=VOICING_MODES,
+        default=DEFAULT_VOICING,
+        help="Chord voicing mode, as for make_rpp.py (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="Worker processes; 0 uses every core (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--song",
+        action="append",
+        default=[],
+        metavar="SONG",
+        help="Only render this song, e.g. 07_Rise_of_Neon_Dawn or 07 (repeatable)",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    t0 = time.perf_counter()
+    songs = [load_song(path) for path in select_songs(spec_paths(args.spec_dir), args.song, key=spec_name)]
+    jobs = min(args.jobs if args.jobs > 0 else (os.cpu_count() or 1), len(songs)) or 1
+    work = [(song, args.output_dir, args.rate, args.voicing, args.sections) for song in songs]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(render_song, *zip(*work)))
+    else:
+        results = [render_song(*w) for w in work]
+
+    audio = 0.0
+    for filename, files, secs, wall in results:
+        audio += secs
+        where = f"{len(files)} section files" if args.sections else files[0].name
+        print(f"✓ {filename}  {where}  ({secs / 60:.1f} min in {wall:.2f} s, {secs / wall:.0f}x realtime)")
+    wall = time.perf_counter() - t0
+    print(
+        f"\n✅ {audio / 60:.1f} min of audio rendered to: {args.output_dir}  "
+        f"({wall:.2f} s wall, {audio / wall:.0f}x realtime, {jobs} job{'s' if jobs != 1 else ''})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,264 @@
+"""Single-pass chunk index for REAPER .rpp projects.
+
+``parse_rpp`` walks a project once and records every ``<CHUNK ... >`` as a
+:class:`Chunk` with byte offsets into the original buffer, plus the values of
+a few interesting keyword lines (``NAME``, ``MARKER``, ``AUXRECV``, ...).
+The scan is one compiled regex that only stops on chunk open/close lines
+and indexed keys, so MIDI event lines and base64 blobs are skipped without
+being copied. ``RppProject.from_path`` memory-maps the file; chunk text is
+only decoded when asked for (``Chunk.view`` gives a zero-copy slice), so
+checks that just need names, GUIDs or counts never materialise the track
+bodies.
+"""
+
+from __future__ import annotations
+
+import gc
+import mmap
+import os
+import re
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Iterator
+
+# Keyword lines whose values are captured on the directly enclosing chunk.
+DEFAULT_INDEXED_KEYS = frozenset(
+    {"NAME", "GUID", "IGUID", "TRACKID", "POOLEDEVTS", "MARKER", "AUXRECV", "POSITION", "LENGTH", "PT"}
+)
+
+
+def unquote(value: str) -> str:
+    """Strip REAPER string quoting ("x", 'x' or `x`) from a single value."""
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+        return value[1:-1]
+    return value
+
+
+def parse_marker(value: str) -> tuple[int, float, str, int]:
+    """Split a ``MARKER`` value into (index, position, name, flags)."""
+    index, position, rest = (value.split(" ", 2) + [""])[:3]
+    if rest[:1] and rest[0] in "\"'`":
+        close = rest.find(rest[0], 1)
+        close = len(rest) if close < 0 else close
+        name, tail = rest[1:close], rest[close + 1 :].split()
+    else:
+        name, *tail = rest.split() or [""]
+    return int(index), float(position), name, int(tail[0]) if tail else 0
+
+
+@dataclass(frozen=True)
+class Region:
+    """A marker (``end is None``) or a region built from its start/end ``MARKER`` pair."""
+
+    index: int
+    start: float
+    name: str
+    end: float | None = None
+
+
+@dataclass(eq=False)
+class Chunk:
+    tag: str
+    args: str
+    start: int  # byte offset of the line opening the chunk (incl. indent)
+    end: int = -1  # byte offset just past the closing ">"
+    depth: int = 0
+    parent: Chunk | None = field(default=None, repr=False)
+    children: list[Chunk] = field(default_factory=list, repr=False)
+    fields: dict[str, list[str]] = field(default_factory=dict, repr=False)
+    project: RppProject | None = field(default=None, repr=False)
+
+    @property
+    def name(self) -> str | None:
+        values = self.fields.get("NAME")
+        return unquote(values[0]) if values else None
+
+    @property
+    def guid(self) -> str | None:
+        """Track GUID lives on the header line; items carry a GUID field."""
+        if self.tag == "TRACK" and self.args.startswith("{"):
+            return self.args.split()[0]
+        values = self.fields.get("GUID")
+        return values[0] if values else None
+
+    @property
+    def raw(self) -> bytes:
+        assert self.project is not None
+        return bytes(self.project.data[self.start : self.end])
+
+    @property
+    def view(self) -> memoryview:
+        """Zero-copy slice of the chunk's bytes (valid while the project is open)."""
+        assert self.project is not None
+        return memoryview(self.project.data)[self.start : self.end]
+
+    @property
+    def text(self) -> str:
+        return self.raw.decode(self.project.encoding if self.project else "utf-8")
+
+    def lines(self) -> list[str]:
+        return self.text.split("\n")
+
+    def count(self, key: str) -> int:
+        return len(self.fields.get(key, ()))
+
+    def find(self, tag: str) -> Iterator[Chunk]:
+        """Yield descendant chunks with ``tag`` in document order."""
+        for child in self.children:
+            if child.tag == tag:
+                yield child
+            yield from child.find(tag)
+
+
+@dataclass(eq=False)
+class RppProject:
+    data: bytes | mmap.mmap
+    root: Chunk
+    encoding: str = "utf-8"
+    tracks: list[Chunk] = field(default_factory=list)
+    tracks_by_name: dict[str, Chunk] = field(default_factory=dict)
+    tracks_by_guid: dict[str, Chunk] = field(default_factory=dict)
+
+    @classmethod
+    def from_path(cls, path: Path | str, indexed_keys: frozenset[str] = DEFAULT_INDEXED_KEYS) -> RppProject:
+        """Index a project file through a read-only memory map.
+
+        Only the index is built up front; chunk bytes stay in the page cache
+        until ``raw``/``text``/``view`` touch them.
+        """
+        with open(path, "rb") as fh:
+            if not os.fstat(fh.fileno()).st_size:
+                return parse_rpp(b"", indexed_keys)
+            data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return parse_rpp(data, indexed_keys)
+        except ValueError:
+            data.close()
+            raise
+
+    def close(self) -> None:
+        """Release the memory map, if any; chunk ``view``s must be released first."""
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self) -> RppProject:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def track(self, key: str) -> Chunk | None:
+        """Look up a top-level track by name or ``{GUID}``."""
+        return self.tracks_by_name.get(key) or self.tracks_by_guid.get(key)
+
+    def decode(self, start: int, end: int) -> str:
+        return bytes(self.data[start:end]).decode(self.encoding)
+
+    @property
+    def markers(self) -> list[str]:
+        return self.root.fields.get("MARKER", [])
+
+    @property
+    def regions(self) -> list[Region]:
+        """Markers and regions in file order; a region's second line closes it."""
+        out: list[Region] = []
+        open_regions: dict[int, int] = {}
+        for value in self.markers:
+            index, position, name, flags = parse_marker(value)
+            if flags & 1 and index in open_regions:
+                i = open_regions.pop(index)
+                out[i] = replace(out[i], end=position)
+                continue
+            if flags & 1:
+                open_regions[index] = len(out)
+            out.append(Region(index, position, name))
+        return out
+
+
+def _line_pattern(indexed_keys: frozenset[str]) -> re.Pattern[bytes]:
+    """Match only the lines the index needs: chunk opens, chunk closes, indexed keys.
+
+    Everything else (MIDI event lines, base64 blobs, ...) is skipped inside
+    the regex engine without being copied or decoded.
+    """
+    keys = b"|".join(re.escape(k.encode("ascii")) for k in sorted(indexed_keys, key=len, reverse=True))
+    return re.compile(
+        rb"^[ \t]*(?:<([^ \t\r\n]*)(?: ([^\n]*?))?|(>)|(" + keys + rb")(?: ([^\n]*?))?)[ \t\r]*$",
+        re.MULTILINE,
+    )
+
+
+_PATTERNS: dict[frozenset[str], re.Pattern[bytes]] = {}
+
+
+def _scan(pattern: re.Pattern[bytes], data: bytes | mmap.mmap, encoding: str) -> list[Chunk]:
+    """All chunks in document order, with parents, children, ends and fields filled in."""
+    chunks: list[Chunk] = []
+    stack: list[Chunk] = []
+    for m in pattern.finditer(data):
+        tag, args, close, key, value = m.groups()
+        if tag is not None:
+            chunk = Chunk(
+                tag=tag.decode(encoding),
+                args=args.decode(encoding) if args else "",
+                start=m.start(),
+                depth=len(stack),
+            )
+            if stack:
+                chunk.parent = stack[-1]
+                stack[-1].children.append(chunk)
+            elif chunks:
+                continue  # only the first top-level chunk is the project
+            chunks.append(chunk)
+            stack.append(chunk)
+        elif close is not None:
+            if stack:
+                stack.pop().end = m.end()
+        elif stack:
+            stack[-1].fields.setdefault(key.decode("ascii"), []).append(value.decode(encoding) if value else "")
+    if stack:
+        raise ValueError(f"Unterminated <{stack[-1].tag}> chunk at byte {stack[-1].start}")
+    return chunks
+
+
+def parse_rpp(
+    data: bytes | str | mmap.mmap,
+    indexed_keys: frozenset[str] = DEFAULT_INDEXED_KEYS,
+    encoding: str = "utf-8",
+) -> RppProject:
+    """Index every chunk in ``data`` in one pass over its lines.
+
+    ``data`` may be an ``mmap``; only the matched lines are ever copied.
+    """
+    if isinstance(data, str):
+        data = data.encode(encoding)
+    pattern = _PATTERNS.get(indexed_keys)
+    if pattern is None:
+        pattern = _PATTERNS[indexed_keys] = _line_pattern(indexed_keys)
+
+    # The index is one big reference cycle (parent <-> children); pausing the
+    # collector while it is built saves repeated scans of a growing heap.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        chunks = _scan(pattern, data, encoding)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    if not chunks:
+        raise ValueError("No REAPER_PROJECT chunk found")
+
+    project = RppProject(data=data, root=chunks[0], encoding=encoding)
+    for chunk in chunks:
+        chunk.project = project
+    for chunk in project.root.children:
+        if chunk.tag != "TRACK":
+            continue
+        project.tracks.append(chunk)
+        name = chunk.name
+        if name is not None:
+            project.tracks_by_name.setdefault(name, chunk)
+        guid = chunk.guid
+        if guid is not None:
+            project.tracks_by_guid.setdefault(guid, chunk)
+    return project
@@ -0,0 +1,93 @@
+"""Minimal Standard MIDI File (type 1) writer.
+
+Tracks are lists of ``(tick, message)`` pairs with absolute tick times and raw
+message bytes. ``encode_track`` sorts them, converts to VLQ delta times and
+applies running status, so the output is as small as a DAW export.
+"""
+
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+META = 0xFF
+META_TRACK_NAME = 0x03
+META_END_OF_TRACK = 0x2F
+META_TEMPO = 0x51
+META_TIME_SIGNATURE = 0x58
+
+TrackEvents = list[tuple[int, bytes]]
+
+
+def vlq(value: int) -> bytes:
+    """Encode a non-negative int as a MIDI variable-length quantity."""
+    if value < 0:
+        raise ValueError(f"VLQ value must be non-negative, got {value}")
+    out = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    out.reverse()
+    return bytes(out)
+
+
+def meta(kind: int, payload: bytes) -> bytes:
+    return bytes([META, kind]) + vlq(len(payload)) + payload
+
+
+def track_name(name: str) -> bytes:
+    return meta(META_TRACK_NAME, name.encode("latin-1", "replace"))
+
+
+def tempo(bpm: float) -> bytes:
+    return meta(META_TEMPO, struct.pack(">I", round(60_000_000 / bpm))[1:])
+
+
+def time_signature(numerator: int, denominator_power: int) -> bytes:
+    return meta(META_TIME_SIGNATURE, bytes([numerator, denominator_power, 24, 8]))
+
+
+def note_on(channel: int, pitch: int, velocity: int) -> bytes:
+    return bytes([NOTE_ON | channel, pitch, velocity])
+
+
+def note_off(channel: int, pitch: int) -> bytes:
+    return bytes([NOTE_OFF | channel, pitch, 0])
+
+
+def encode_track(events: TrackEvents, end_tick: int | None = None) -> bytes:
+    """Return a complete ``MTrk`` chunk for ``events``.
+
+    Events at the same tick keep their relative order except that note-offs
+    sort before note-ons, so retriggered notes are not cut short.
+    """
+    ordered = sorted(events, key=lambda e: (e[0], (e[1][0] & 0xF0) != NOTE_OFF))
+    body = bytearray()
+    prev_tick = 0
+    running = None
+    for tick, msg in ordered:
+        body += vlq(tick - prev_tick)
+        prev_tick = tick
+        status = msg[0]
+        if status < 0xF0 and status == running:
+            body += msg[1:]
+        else:
+            body += msg
+            running = status if status < 0xF0 else None
+    last = max(prev_tick, end_tick or 0)
+    body += vlq(last - prev_tick) + meta(META_END_OF_TRACK, b"")
+    return b"MTrk" + struct.pack(">I", len(body)) + bytes(body)
+
+
+def encode_smf(tracks: list[bytes], ppq: int) -> bytes:
+    """Assemble encoded ``MTrk`` chunks into a type-1 file."""
+    return b"MThd" + struct.pack(">IHHH", 6, 1, len(tracks), ppq) + b"".join(tracks)
+
+
+def write_smf(path: Path | str, tracks: list[bytes], ppq: int) -> int:
+    data = encode_smf(tracks, ppq)
+    Path(path).write_bytes(data)
+    return len(data)
@@ -0,0 +1,138 @@
+"""Per-song arrangement spec files (``specs/NN_Song.json``).
+
+Each file holds one song's title, BPM and section list; the file stem is
+the song's output filename. ``load_song`` validates a file against the
+schema below and returns the ``(filename, title, bpm, sections)`` tuple
+that ``make_rpp.build_rpp`` takes, with sections shaped per
+``SECTION_SCHEMA`` and ``SECTION_DEFAULTS`` filled in. A song-level
+``humanize`` object is merged into every section's (see humanize.py), so
+each section carries its complete settings.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import humanize
+from voicings import ChordError, parse_chord
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SPEC_DIR = REPO_ROOT / "specs"
+
+SONG_KEYS = {"title", "bpm", "sections", "humanize"}
+# key -> (accepted types, required)
+SECTION_SCHEMA: dict[str, tuple[tuple[type, ...], bool]] = {
+    "name": ((str,), True),
+    "bars": ((int,), True),
+    "prog": ((list,), True),
+    "bpc": ((int, float), True),
+    "drum": ((str,), True),
+    "vel": ((int,), False),
+    "ts_num": ((int,), False),
+    "ts_den_pow": ((int,), False),
+    "bpm": ((int, float), False),
+    "ramp": ((bool,), False),
+    "humanize": ((dict,), False),
+}
+SECTION_DEFAULTS = {"vel": 80, "ts_num": 4, "ts_den_pow": 2}
+# bar_length() understands /4 and /8 meters.
+TS_DEN_POWS = (2, 3)
+
+Song = tuple[str, str, float, list[dict]]
+
+
+class SpecError(ValueError):
+    pass
+
+
+def spec_paths(spec_dir: Path | str = SPEC_DIR) -> list[Path]:
+    """Every song spec in album (file name) order, without reading them."""
+    return sorted(Path(spec_dir).glob("*.json"))
+
+
+def _is(value: object, types: tuple[type, ...]) -> bool:
+    # bool is an int subclass; never accept it for numeric fields.
+    return isinstance(value, types) and (bool in types or not isinstance(value, bool))
+
+
+def validate_song(data: object, drum_patterns: set[str] | None = None) -> list[str]:
+    """Return every schema problem in ``data`` (empty when valid)."""
+    if not isinstance(data, dict):
+        return ["top level must be an object"]
+    errors = [f"unknown key {key!r}" for key in sorted(set(data) - SONG_KEYS)]
+    if not isinstance(data.get("title"), str) or not data.get("title"):
+        errors.append("'title' must be a non-empty string")
+    bpm = data.get("bpm")
+    if not _is(bpm, (int, float)) or bpm <= 0:
+        errors.append("'bpm' must be a positive number")
+    if "humanize" in data:
+        errors.extend(humanize.validate(data["humanize"]))
+    sections = data.get("sections")
+    if not isinstance(sections, list) or not sections:
+        errors.append("'sections' must be a non-empty list")
+        return errors
+
+    seen: set[str] = set()
+    for i, sec in enumerate(sections):
+        where = f"sections[{i}]"
+        if not isinstance(sec, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        where = f"sections[{i}] ({sec.get('name', '?')})"
+        errors.extend(f"{where}: unknown key {key!r}" for key in sorted(set(sec) - set(SECTION_SCHEMA)))
+        # Missing or mistyped fields make the value checks below meaningless for this section only.
+        shape = []
+        for key, (types, required) in SECTION_SCHEMA.items():
+            if key not in sec:
+                if required:
+                    shape.append(f"{where}: missing {key!r}")
+            elif not _is(sec[key], types):
+                shape.append(f"{where}: {key!r} must be {' or '.join(t.__name__ for t in types)}")
+        if shape:
+            errors.extend(shape)
+            continue
+        if sec["name"] in seen:
+            errors.append(f"{where}: duplicate section name")
+        seen.add(sec["name"])
+        if sec["bars"] <= 0:
+            errors.append(f"{where}: 'bars' must be positive")
+        if sec["bpc"] <= 0:
+            errors.append(f"{where}: 'bpc' must be positive")
+        if not sec["prog"] or not all(isinstance(c, str) and c for c in sec["prog"]):
+            errors.append(f"{where}: 'prog' must be a non-empty list of chord names")
+        else:
+            for chord in sec["prog"]:
+                try:
+                    parse_chord(chord)
+                except ChordError as exc:
+                    errors.append(f"{where}: {exc}")
+        if not 1 <= sec.get("vel", SECTION_DEFAULTS["vel"]) <= 127:
+            errors.append(f"{where}: 'vel' must be 1-127")
+        if sec.get("ts_num", SECTION_DEFAULTS["ts_num"]) <= 0:
+            errors.append(f"{where}: 'ts_num' must be positive")
+        if "bpm" in sec and sec["bpm"] <= 0:
+            errors.append(f"{where}: 'bpm' must be positive")
+        if sec.get("ts_den_pow", SECTION_DEFAULTS["ts_den_pow"]) not in TS_DEN_POWS:
+            errors.append(f"{where}: 'ts_den_pow' must be one of {TS_DEN_POWS}")
+        if drum_patterns is not None and sec["drum"] not in drum_patterns:
+            errors.append(f"{where}: unknown drum pattern {sec['drum']!r}")
+        if "humanize" in sec:
+            errors.extend(humanize.validate(sec["humanize"], f"{where}: humanize"))
+    return errors
+
+
+def load_song(path: Path | str, drum_patterns: set[str] | None = None) -> Song:
+    path = Path(path)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise SpecError(f"{path}: {exc}") from None
+    errors = validate_song(data, drum_patterns)
+    if errors:
+        raise SpecError(f"{path}:\n  " + "\n  ".join(errors))
+    sections = [{**SECTION_DEFAULTS, **sec} for sec in data["sections"]]
+    if "humanize" in data or any("humanize" in sec for sec in sections):
+        for sec in sections:
+            sec["humanize"] = humanize.merge(data.get("humanize"), sec.get("humanize"), path.stem)
+    return path.stem, data["title"], data["bpm"], sections
@@ -0,0 +1,6 @@
+"""The generator scripts import each other as top-level modules; make them importable here."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
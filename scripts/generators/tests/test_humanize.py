@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+import humanize
+from humanize import KEEP_GAP, GrooveLibrary, Humanize, UnknownGrooveError, apply, apply_section, merge, validate
+from midi_events import NoteBuffer
+
+BAR = 4.0
+
+
+def chords(bars=4, hits_per_bar=2, vel=80):
+    """Three-note chord hits, each held until KEEP_GAP before the next (as chord_slots does)."""
+    buf = NoteBuffer()
+    step = BAR / hits_per_bar
+    for k in range(bars * hits_per_bar):
+        buf.add_chord((57, 60, 64), k * step, step - KEEP_GAP, vel)
+    return buf
+
+
+def eighths(bars=4, vel=100):
+    buf = NoteBuffer()
+    for k in range(bars * 8):
+        buf.add(42, k * 0.5, 0.25, vel)
+    return buf
+
+
+def section(raw, bars=4, name="Verse"):
+    return {"name": name, "bars": bars, "_bar_len": BAR, "humanize": raw}
+
+
+def onsets(buf):
+    """start -> velocities of the notes starting there."""
+    out = {}
+    for _pitch, start, _dur, vel in buf:
+        out.setdefault(start, []).append(vel)
+    return out
+
+
+def test_inactive_settings_return_the_input():
+    events = chords()
+    assert apply(events, Humanize(), "seed", BAR, 16) is events
+    assert apply_section(events, section({"seed": "x"}), "chords") is events
+    assert apply_section(events, {"name": "Verse", "bars": 4, "_bar_len": BAR}, "chords") is events
+
+
+def test_same_seed_same_result_and_sections_are_independent():
+    raw = {"timing": 0.03, "velocity": 10, "seed": "song"}
+    a = apply_section(chords(), section(raw), "chords")
+    assert a == apply_section(chords(), section(raw), "chords")
+    assert a != apply_section(chords(), section(raw, name="Chorus"), "chords")
+    assert a != apply_section(chords(), section({**raw, "seed": "other"}), "chords")
+    assert a != apply_section(chords(), section(raw), "drums")
+
+
+def test_swing_delays_off_beats_only():
+    out = apply(eighths(), Humanize(swing=66), "s", BAR, 16)
+    starts = sorted(set(out.start))
+    assert starts[:4] == [0.0, pytest.approx(0.66), 1.0, pytest.approx(1.66)]
+    assert list(out.dur)[:2] == [0.25, 0.25]
+    sixteenths = apply(eighths(), Humanize(swing=66, swing_unit=0.25), "s", BAR, 16)
+    # Eighth notes sit on even sixteenths, so a sixteenth swing leaves them alone.
+    assert list(sixteenths.start) == list(eighths().start)
+
+
+def test_chord_notes_move_together_and_keep_their_gap():
+    out = apply(chords(), Humanize(timing=0.1, velocity=12), "c", BAR, 16)
+    groups = {}
+    for pitch, start, dur, vel in out:
+        groups.setdefault(round(start, 9), set()).add((dur, vel))
+    assert len(groups) == 8
+    assert all(len(g) == 1 for g in groups.values())
+    ends = sorted(s + next(iter(g))[0] for s, g in groups.items())
+    starts = sorted(groups)
+    assert all(nxt - end >= KEEP_GAP - 1e-9 for end, nxt in zip(ends, starts[1:]))
+
+
+def test_notes_stay_inside_the_section_and_velocities_in_range():
+    raw = {"timing": 0.5, "velocity": 64, "accents": [64, -64], "curve": [0.01, 2], "seed": 1}
+    for track, events in (("chords", chords(vel=127)), ("drums", eighths(vel=1))):
+        out = apply_section(events, section(raw), track)
+        assert len(out) == len(events)
+        assert min(out.start) >= 0
+        assert max(s + d for _p, s, d, _v in out) <= 16 + 1e-9
+        assert min(out.dur) > 0
+        assert 1 <= min(out.vel) and max(out.vel) <= 127
+
+
+def test_groove_accents_and_curve_shape_velocity():
+    out = apply(eighths(bars=1), Humanize(groove="shuffle", accents=(10, 0, 0, 0)), "g", BAR, BAR)
+    vel = {round(s, 4): v[0] for s, v in onsets(out).items()}
+    assert vel[0.0] == 110  # downbeat: accent, groove scale 1.0
+    assert vel[round(0.5 + 0.1667, 4)] == 90  # off-beat: pushed late, scaled by 0.8, same beat's accent
+    assert vel[1.0] == 100
+    assert vel[round(1.5 + 0.1667, 4)] == 80
+    ramp = apply(eighths(), Humanize(curve=(0.5, 1.0)), "r", BAR, 16)
+    assert ramp.vel[0] == 50 and ramp.vel[-1] == pytest.approx(99, abs=1)
+
+
+def test_track_settings_override_general_ones():
+    raw = {"swing": 66, "drums": {"swing": 50, "velocity": 5}, "seed": "s"}
+    assert Humanize.from_spec(raw, "chords") == Humanize(swing=66)
+    assert Humanize.from_spec(raw, "drums") == Humanize(swing=50, velocity=5)
+
+
+def test_merge_song_and_section_settings():
+    song = {"timing": 0.02, "drums": {"groove": "mpc_58"}, "chords": {"curve": [1, 1.2]}}
+    sec = {"timing": 0.01, "drums": {"accents": [4]}}
+    assert merge(song, sec, "07_Song") == {
+        "timing": 0.01,
+        "chords": {"curve": [1, 1.2]},
+        "drums": {"groove": "mpc_58", "accents": [4]},
+        "seed": "07_Song",
+    }
+    assert merge(None, {"seed": "mine"}, "07_Song") == {"seed": "mine"}
+
+
+@pytest.mark.parametrize(
+    "raw, error",
+    [
+        ({"swing": 80}, "humanize: 'swing' must be a percentage from 50 to 75"),
+        ({"swing": True}, "humanize: 'swing' must be a percentage from 50 to 75"),
+        ({"groove": "polka"}, "humanize: 'groove' must be the name of a groove in grooves.json"),
+        ({"curve": [1, 3]}, "humanize: 'curve' must be [start, end] multipliers above 0 and at most 2"),
+        ({"accents": []}, "humanize: 'accents' must be a non-empty list of integers from -64 to 64"),
+        ({"jitter": 1}, "humanize: unknown key 'jitter'"),
+        ({"drums": {"drums": {}}}, "humanize.drums: unknown key 'drums'"),
+        ([], "humanize must be an object"),
+    ],
+)
+def test_validate_reports_bad_settings(raw, error):
+    assert validate(raw) == [error]
+
+
+def test_shipped_grooves_load_and_unknown_names_raise():
+    library = humanize.default_grooves()
+    assert {"shuffle", "mpc_58"} <= set(library.names())
+    with pytest.raises(UnknownGrooveError):
+        library.get("polka")
+
+
+def test_groove_library_rejects_out_of_range_scales(tmp_path):
+    path = tmp_path / "grooves.json"
+    path.write_text(json.dumps({"grooves": {"loud": {"step": 0.5, "timing": [0], "velocity": [3]}}}), encoding="utf-8")
+    with pytest.raises(UnknownGrooveError, match="outside 0-2"):
+        GrooveLibrary.load(path)
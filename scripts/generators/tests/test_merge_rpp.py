@@ -0,0 +1,105 @@
+import re
+
+import pytest
+
+from make_rpp import iter_rpp, section_starts
+from merge_rpp import Part, fields, merge, resolve, same
+from rpp_guid import guid_factory
+
+
+def project(intro_bars=2, bpm=120):
+    sections = [
+        {"name": "Intro", "bars": intro_bars, "prog": ["Am", "F"], "bpc": 4, "drum": "standard"},
+        {"name": "Verse", "bars": 4, "prog": ["C", "G"], "bpc": 4, "drum": "standard", "vel": 90},
+    ]
+    sections = [{"vel": 80, "ts_num": 4, "ts_den_pow": 2, **sec} for sec in sections]
+    section_starts(sections)
+    return ("\n".join(iter_rpp("09_Test", bpm, sections, guid_factory("stable", "09_Test"))) + "\n").encode()
+
+
+def resaved(data: bytes) -> bytes:
+    """``data`` as REAPER might write it back: other indentation, shortest number format."""
+    data = re.sub(rb"(?<= )-?\d+\.\d+(?=[ \n])", lambda m: b"%g" % float(m.group(0)), data)
+    return re.sub(rb"(?m)^[ \t]+", b"   ", data)
+
+
+def part(base, new, current, start=0, end=0):
+    return Part("tempo", base, new, current, start, end)
+
+
+def test_resolve_three_way_cases():
+    a, b, c = b"TEMPO 120 4 4\n", b"TEMPO 100 4 4\n", b"TEMPO 90 4 4\n"
+    cases = [
+        (part(a, a, c), "current", None, "unchanged"),
+        (part(a, b, b), "current", None, "already up to date"),
+        (part(a, b, a), "current", b, "updated"),
+        (part(a, b, c), "current", None, "conflict: hand edits kept"),
+        (part(a, b, c), "new", b, "conflict: hand edits replaced"),
+        (part(None, b, b""), "current", b, "updated"),
+        (part(a, b, None, -1, -1), "current", None, "missing in current project"),
+    ]
+    for p, prefer, text, status in cases:
+        assert (resolve(p, prefer), p.status) == (text, status)
+
+
+def test_fields_ignore_layout_quoting_and_number_format():
+    assert same(b'  MARKER 1 4.000000 "Intro" 1\n', b'MARKER 1 4 Intro 1')
+    assert same(b"  TEMPO 120.000000 4 4\n\n", b"TEMPO 120 4 4\n")
+    assert not same(b'MARKER 1 4 "Intro" 1', b'MARKER 1 4 "Outro" 1')
+    assert not same(b"TEMPO 120 4 4", None)
+    assert fields(b'NAME "two words"\n') == [("NAME", "two words")]
+
+
+def test_untouched_project_takes_the_regenerated_scaffold():
+    base, new = project(2), project(4)
+    merged, parts = merge(base, new, base)
+    assert merged == new
+    assert {p.name: p.status for p in parts} == {
+        "markers": "updated",
+        "tempo": "unchanged",
+        "tempo envelope": "unchanged",
+        "project length": "updated",
+        "arr_chords_scaffold items": "updated",
+        "arr_drums_scaffold items": "updated",
+    }
+
+
+def test_resaved_project_is_not_a_conflict():
+    base, new = project(2), project(4)
+    current = resaved(base)
+    assert current != base
+    merged, parts = merge(base, new, current)
+    assert not [p for p in parts if p.status.startswith("conflict")]
+    length = re.compile(rb"MAXPROJLEN 0 (\S+)")
+    assert float(length.search(new)[1]) > float(length.search(base)[1])
+    assert length.search(merged)[0] == length.search(new)[0]
+
+
+def test_hand_edit_conflicts_with_a_regenerated_part():
+    base, new = project(2), project(4)
+    current = base.replace(b'"Verse"', b'"Verse (hand)"', 1)
+    merged, parts = merge(base, new, current)
+    status = {p.name: p.status for p in parts}
+    assert status["markers"] == "conflict: hand edits kept"
+    assert status["arr_chords_scaffold items"] == "updated"
+    assert b'"Verse (hand)"' in merged
+    merged, _ = merge(base, new, current, prefer="new")
+    assert b'"Verse (hand)"' not in merged
+
+
+def test_hand_work_outside_generated_parts_is_kept_byte_for_byte():
+    base, new = project(2, bpm=120), project(2, bpm=100)
+    notes = b"  <NOTES 0 2\n    |hand-written note\n  >\n"
+    current = base.replace(b"  RIPPLE 0\n", b"  RIPPLE 0\n" + notes, 1)
+    merged, parts = merge(base, new, current)
+    assert {p.name: p.status for p in parts}["tempo"] == "updated"
+    assert merged == new.replace(b"  RIPPLE 0\n", b"  RIPPLE 0\n" + notes, 1)
+
+
+@pytest.mark.parametrize("prefer", ["current", "new"])
+def test_merge_is_idempotent(prefer):
+    base, new = project(2), project(4)
+    once, _ = merge(base, new, base, prefer)
+    twice, parts = merge(base, new, once, prefer)
+    assert twice == once
+    assert all(p.status in ("unchanged", "already up to date") for p in parts)
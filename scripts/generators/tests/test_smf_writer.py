@@ -0,0 +1,72 @@
+import struct
+
+import pytest
+
+from smf_writer import encode_smf, encode_track, note_off, note_on, tempo, track_name, vlq
+
+
+@pytest.mark.parametrize(
+    "value, encoded",
+    [
+        (0, b"\x00"),
+        (0x7F, b"\x7f"),
+        (0x80, b"\x81\x00"),
+        (0x2000, b"\xc0\x00"),
+        (0x3FFF, b"\xff\x7f"),
+        (0x4000, b"\x81\x80\x00"),
+        (0x1FFFFF, b"\xff\xff\x7f"),
+        (0x200000, b"\x81\x80\x80\x00"),
+        (0x0FFFFFFF, b"\xff\xff\xff\x7f"),
+    ],
+)
+def test_vlq_boundaries(value, encoded):
+    assert vlq(value) == encoded
+
+
+def test_vlq_rejects_negative():
+    with pytest.raises(ValueError):
+        vlq(-1)
+
+
+def body(chunk: bytes) -> bytes:
+    assert chunk[:4] == b"MTrk"
+    (length,) = struct.unpack(">I", chunk[4:8])
+    assert length == len(chunk) - 8
+    return chunk[8:]
+
+
+END = b"\xff\x2f\x00"
+
+
+def test_running_status_drops_repeated_status_bytes():
+    events = [(0, note_on(0, 60, 100)), (0, note_on(0, 64, 100)), (96, note_off(0, 60)), (96, note_off(0, 64))]
+    assert body(encode_track(events)) == (
+        b"\x00\x90\x3c\x64" + b"\x00\x40\x64" + b"\x60\x80\x3c\x00" + b"\x00\x40\x00" + b"\x00" + END
+    )
+
+
+def test_meta_event_breaks_running_status():
+    events = [(0, note_on(0, 60, 100)), (0, tempo(120)), (0, note_on(0, 64, 100))]
+    out = body(encode_track(events))
+    # 500000 us per quarter note at 120 BPM.
+    assert out == b"\x00\x90\x3c\x64" + b"\x00\xff\x51\x03\x07\xa1\x20" + b"\x00\x90\x40\x64" + b"\x00" + END
+
+
+def test_note_off_sorts_before_note_on_at_the_same_tick():
+    # A retriggered note: the second note-on must not be cut by the first note's off.
+    events = [(0, note_on(0, 60, 90)), (96, note_on(0, 60, 80)), (96, note_off(0, 60)), (192, note_off(0, 60))]
+    out = body(encode_track(events))
+    assert out == (
+        b"\x00\x90\x3c\x5a" + b"\x60\x80\x3c\x00" + b"\x00\x90\x3c\x50" + b"\x60\x80\x3c\x00" + b"\x00" + END
+    )
+
+
+def test_end_tick_pads_the_end_of_track():
+    out = body(encode_track([(0, track_name("Chords"))], end_tick=0x80))
+    assert out == b"\x00\xff\x03\x06Chords" + b"\x81\x00" + END
+
+
+def test_header_declares_type_1_track_count_and_ppq():
+    data = encode_smf([encode_track([]), encode_track([])], 960)
+    assert data[:14] == b"MThd" + struct.pack(">IHHH", 6, 1, 2, 960)
+    assert data.count(b"MTrk") == 2
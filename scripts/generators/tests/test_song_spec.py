@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from song_spec import SECTION_DEFAULTS, SpecError, load_song, validate_song
+
+
+def section(**overrides):
+    return {"name": "Verse", "bars": 8, "prog": ["Am", "F"], "bpc": 4, "drum": "standard", **overrides}
+
+
+def spec(*sections, **top):
+    return {"title": "Test Song", "bpm": 120, "sections": list(sections) or [section()], **top}
+
+
+def test_valid_spec_has_no_errors():
+    assert validate_song(spec(section(), section(name="Chorus", vel=100, ts_num=7, ts_den_pow=3))) == []
+
+
+def test_top_level_problems_are_all_reported():
+    errors = validate_song({"title": "", "bpm": 0, "sections": [], "tempo": 1})
+    assert errors == [
+        "unknown key 'tempo'",
+        "'title' must be a non-empty string",
+        "'bpm' must be a positive number",
+        "'sections' must be a non-empty list",
+    ]
+
+
+def test_earlier_errors_do_not_hide_later_section_checks():
+    errors = validate_song(spec(section(), section(name="Bridge"), section(name="Outro", prog=["Qm7"]), extra=1))
+    assert errors[0] == "unknown key 'extra'"
+    assert any(e.startswith("sections[2] (Outro): Cannot parse chord symbol 'Qm7'") for e in errors)
+
+
+def test_mistyped_section_skips_only_its_own_value_checks():
+    errors = validate_song(spec(section(bars="8"), section(name="Chorus", bars=0)))
+    assert errors == ["sections[0] (Verse): 'bars' must be int", "sections[1] (Chorus): 'bars' must be positive"]
+
+
+def test_bool_is_not_a_number():
+    assert validate_song(spec(section(bars=True))) == ["sections[0] (Verse): 'bars' must be int"]
+
+
+@pytest.mark.parametrize(
+    "overrides, message",
+    [
+        ({"vel": 128}, "'vel' must be 1-127"),
+        ({"ts_den_pow": 4}, "'ts_den_pow' must be one of (2, 3)"),
+        ({"bpm": -1}, "'bpm' must be positive"),
+        ({"prog": []}, "'prog' must be a non-empty list of chord names"),
+        ({"humanize": {"swing": 90}}, "humanize: 'swing' must be a percentage from 50 to 75"),
+    ],
+)
+def test_section_value_checks(overrides, message):
+    assert validate_song(spec(section(**overrides))) == [f"sections[0] (Verse): {message}"]
+
+
+def test_duplicate_names_and_unknown_drum_patterns():
+    errors = validate_song(spec(section(), section(drum="polka")), drum_patterns={"standard"})
+    assert errors == [
+        "sections[1] (Verse): duplicate section name",
+        "sections[1] (Verse): unknown drum pattern 'polka'",
+    ]
+
+
+def test_load_song_fills_defaults_and_merges_humanize(tmp_path):
+    path = tmp_path / "07_Test.json"
+    data = spec(section(), section(name="Chorus", humanize={"swing": 60}), humanize={"timing": 0.01})
+    path.write_text(json.dumps(data), encoding="utf-8")
+    filename, title, bpm, sections = load_song(path)
+    assert (filename, title, bpm) == ("07_Test", "Test Song", 120)
+    assert all(sec[k] == v for sec in sections for k, v in SECTION_DEFAULTS.items())
+    assert sections[0]["humanize"] == {"timing": 0.01, "seed": "07_Test"}
+    assert sections[1]["humanize"] == {"timing": 0.01, "swing": 60, "seed": "07_Test"}
+
+
+def test_load_song_reports_every_error_with_the_path(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps(spec(section(bars=0, vel=0))), encoding="utf-8")
+    with pytest.raises(SpecError) as exc:
+        load_song(path)
+    assert str(exc.value).splitlines()[1:] == [
+        "  sections[0] (Verse): 'bars' must be positive",
+        "  sections[0] (Verse): 'vel' must be 1-127",
+    ]
+
+
+def test_load_song_rejects_invalid_json(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text("{", encoding="utf-8")
+    with pytest.raises(SpecError, match="broken.json"):
+        load_song(path)
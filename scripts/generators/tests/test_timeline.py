@@ -0,0 +1,94 @@
+import math
+
+import pytest
+
+from timeline import Timeline, bar_length
+
+
+def sec(bars, num=4, den_pow=2, **extra):
+    return {"bars": bars, "ts_num": num, "ts_den_pow": den_pow, **extra}
+
+
+def test_bar_length():
+    assert bar_length(4, 2) == 4.0
+    assert bar_length(7, 3) == 3.5
+    assert bar_length(6, 3) == 3.0
+
+
+def test_constant_tempo_conversions():
+    tl = Timeline.from_sections(120, [sec(4), sec(4)])
+    assert len(tl.segments) == 1
+    assert tl.total_beats == 32
+    assert tl.total_secs == 16.0
+    assert tl.beat_to_secs(6) == 3.0
+    assert tl.secs_to_beat(3.0) == 6.0
+    assert tl.beat_to_bar(6) == 1.5
+
+
+def test_tempo_and_meter_changes_land_on_section_starts():
+    tl = Timeline.from_sections(120, [sec(2), sec(2, 7, 3, bpm=60), sec(1, bpm=60)])
+    assert [(s.beat, s.bpm, s.num, s.den_pow) for s in tl.segments] == [(0, 120, 4, 2), (8, 60, 7, 3), (15, 60, 4, 2)]
+    assert tl.meter_changes() == [(0, 4, 2), (8, 7, 3), (15, 4, 2)]
+    assert tl.beat_to_secs(8) == 4.0
+    assert tl.beat_to_secs(15) == 11.0
+    assert tl.bar_to_beat(3) == 11.5
+    assert tl.beat_to_bar(15) == 4.0
+    assert tl.total_secs == 15.0
+
+
+def ramp_secs(length, t0, t1):
+    return 60 * length / (t1 - t0) * math.log(t1 / t0)
+
+
+def test_ramp_crossing_a_meter_change():
+    # A 4/4 ramp from 120 down to the 7/8 section's 60 BPM, which then holds.
+    tl = Timeline.from_sections(120, [sec(2, ramp=True), sec(2, 7, 3, bpm=60)])
+    ramp, held = tl.segments
+    assert (ramp.bpm, ramp.end_bpm, ramp.num) == (120, 60, 4)
+    assert (held.bpm, held.end_bpm, held.num, held.den_pow) == (60, 60, 7, 3)
+    assert tl.tempo_at(0) == 120
+    assert tl.tempo_at(4) == 90
+    assert tl.tempo_at(8) == 60
+    assert tl.beat_to_secs(8) == pytest.approx(ramp_secs(8, 120, 60))
+    assert tl.beat_to_secs(4) == pytest.approx(ramp_secs(8, 120, 60) * math.log(120 / 90) / math.log(2))
+    assert tl.total_secs == pytest.approx(ramp_secs(8, 120, 60) + 7.0)
+    # Bars count in each segment's own meter.
+    assert tl.bar_to_beat(2) == 8
+    assert tl.bar_to_beat(3) == 11.5
+    assert tl.beat_to_bar(15) == pytest.approx(4.0)
+
+
+@pytest.mark.parametrize("beat", [0, 0.25, 3.3, 7.999, 8, 9.75, 14.9])
+def test_beat_secs_round_trip(beat):
+    tl = Timeline.from_sections(120, [sec(2, ramp=True), sec(2, 7, 3, bpm=60)])
+    assert tl.secs_to_beat(tl.beat_to_secs(beat)) == pytest.approx(beat, abs=1e-9)
+
+
+def test_ramp_up_into_a_faster_section():
+    tl = Timeline.from_sections(90, [sec(4, ramp=True), sec(4, bpm=150)])
+    assert tl.tempo_at(16) == 150
+    assert tl.beat_to_secs(16) == pytest.approx(ramp_secs(16, 90, 150))
+    assert tl.secs_to_beat(tl.beat_to_secs(5.5)) == pytest.approx(5.5)
+
+
+def test_stepped_ramp_matches_the_timeline_on_the_step_grid():
+    tl = Timeline.from_sections(120, [sec(2, ramp=True), sec(2, 7, 3, bpm=60)])
+    steps = tl.tempo_steps(0.5)
+    assert steps[0][0] == 0 and steps[-1] == (8, 60)
+    assert len(steps) == 17  # 16 ramp pieces, then the held tempo
+    secs = 0.0
+    for (a, bpm), (b, _) in zip(steps, steps[1:]):
+        secs += (b - a) * 60 / bpm
+        assert secs == pytest.approx(tl.beat_to_secs(b))
+    assert all(x[1] > y[1] for x, y in zip(steps[:16], steps[1:16]))
+
+
+def test_last_section_never_ramps():
+    tl = Timeline.from_sections(100, [sec(1), sec(1, bpm=80, ramp=True)])
+    assert not tl.segments[-1].ramp
+    assert tl.total_secs == pytest.approx(4 * 60 / 100 + 4 * 60 / 80)
+
+
+def test_first_point_must_be_at_zero():
+    with pytest.raises(ValueError):
+        Timeline([(1.0, 120, False, 4, 2)], 8)
@@ -0,0 +1,131 @@
+from itertools import product
+
+import pytest
+
+from make_rpp import V, chord_pitches
+from voicings import (
+    DEFAULT_REGISTER,
+    ChordError,
+    chord_candidates,
+    close_voicing,
+    lead_voices,
+    movement,
+    parse_chord,
+    voicing,
+)
+
+
+def pitch_classes(symbol):
+    chord = parse_chord(symbol)
+    return {(chord.root + i) % 12 for i in chord.intervals} | ({chord.bass} if chord.bass is not None else set())
+
+
+@pytest.mark.parametrize(
+    "symbol, root, intervals, bass",
+    [
+        ("C", 0, (0, 4, 7), None),
+        ("D#", 3, (0, 4, 7), None),
+        ("Ebm7", 3, (0, 3, 7, 10), None),
+        ("F#m7b5/E", 6, (0, 3, 6, 10), 4),
+        ("Bbsus4", 10, (0, 5, 7), None),
+        ("C7#9", 0, (0, 4, 7, 10, 15), None),
+        ("Gmaj9", 7, (0, 4, 7, 11, 14), None),
+        ("Cdim7", 0, (0, 3, 6, 9), None),
+        ("Caug", 0, (0, 4, 8), None),
+        ("C5", 0, (0, 7), None),
+        ("C69", 0, (0, 4, 7, 9, 14), None),
+        ("A7(b9,#11)", 9, (0, 4, 7, 10, 13, 18), None),
+    ],
+)
+def test_parse_chord(symbol, root, intervals, bass):
+    chord = parse_chord(symbol)
+    assert (chord.root, chord.intervals, chord.bass) == (root, intervals, bass)
+
+
+def test_enharmonic_roots_match():
+    assert parse_chord("Db").intervals == parse_chord("C#").intervals
+    assert parse_chord("Db").root == parse_chord("C#").root == 1
+
+
+@pytest.mark.parametrize("symbol", ["", "H7", "Cfoo", "C/H", "m7"])
+def test_unparseable_symbols_raise(symbol):
+    with pytest.raises(ChordError):
+        parse_chord(symbol)
+
+
+@pytest.mark.parametrize("symbol", sorted(V))
+def test_parser_agrees_with_the_pinned_table(symbol):
+    assert {p % 12 for p in V[symbol]} == pitch_classes(symbol)
+
+
+def test_chord_missing_from_the_table_is_voiced():
+    # The old table had no D#, so 11_Foul_Beast rendered those bars silent.
+    assert "D#" not in V
+    assert chord_pitches("D#") == [63, 67, 70]
+
+
+def test_close_voicing_register_and_slash_bass():
+    assert close_voicing(parse_chord("C")) == (60, 64, 67)
+    notes = close_voicing(parse_chord("Am/G"))
+    assert notes[0] % 12 == 7 and notes[0] < min(notes[1:])
+    assert DEFAULT_REGISTER <= notes[1] < DEFAULT_REGISTER + 12
+
+
+def test_voicing_follows_the_previous_chord():
+    previous = (60, 64, 67)
+    nearest = voicing("F", previous=previous)
+    assert sorted(p % 12 for p in nearest) == [0, 5, 9]
+    # C-E-G to F-A-C moves by at most two semitones per voice in the best inversion.
+    assert max(min(abs(a - b) for b in nearest) for a in previous) <= 2
+
+
+def test_slash_bass_stays_below_every_candidate():
+    for symbol in ("C/E", "F/A", "Am/G", "G/B", "Fmaj7/E"):
+        for notes in chord_candidates(symbol):
+            assert notes[0] < min(notes[1:])
+
+
+def path_cost(path, previous=None):
+    steps = zip(path, path[1:])
+    return (movement(path[0], previous) if previous else 0) + sum(movement(a, b) for a, b in steps)
+
+
+PROGRESSIONS = [
+    ["Am", "F", "C", "G"],
+    ["Bm7b5", "E7", "Am7", "Dm7"],
+    ["G#m", "E", "F#", "D#"],
+    ["Cmaj7", "Am/G", "Fmaj7/E", "Dm7"],
+]
+
+
+@pytest.mark.parametrize("symbols", PROGRESSIONS)
+def test_lead_voices_is_optimal(symbols):
+    best = min(path_cost(list(path)) for path in product(*(chord_candidates(s) for s in symbols)))
+    path = lead_voices(symbols)
+    assert [sorted({p % 12 for p in v}) == sorted(pitch_classes(s)) for v, s in zip(path, symbols)] == [True] * 4
+    assert path_cost(path) == best
+
+
+@pytest.mark.parametrize("symbols", PROGRESSIONS)
+def test_lead_voices_continues_from_the_previous_section(symbols):
+    previous = (71, 74, 77, 81)
+    best = min(path_cost(list(path), previous) for path in product(*(chord_candidates(s) for s in symbols)))
+    assert path_cost(lead_voices(symbols, previous), previous) == best
+
+
+@pytest.mark.parametrize("symbols", PROGRESSIONS)
+def test_lead_voices_beats_chord_by_chord_greedy(symbols):
+    greedy = [voicing(symbols[0])]
+    for symbol in symbols[1:]:
+        greedy.append(voicing(symbol, previous=greedy[-1]))
+    assert path_cost(lead_voices(symbols)) <= path_cost(greedy)
+
+
+def test_lead_voices_edge_cases():
+    assert lead_voices([]) == []
+    held = lead_voices(["Dm7"] * 4)
+    assert len(set(held)) == 1
+    # A slash bass stays the lowest note whatever the inversion above it.
+    for notes in lead_voices(["C", "C/E", "F/A", "G/B"]):
+        assert notes[0] == min(notes)
+    assert [n[0] % 12 for n in lead_voices(["C/E", "F/A", "G/B"])] == [4, 9, 11]
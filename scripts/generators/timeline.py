@@ -0,0 +1,166 @@
+"""Tempo and meter map for a song.
+
+A :class:`Timeline` is a sorted list of change points, one per section start
+where the tempo or time signature changes. Each segment stores its start in
+beats (quarter notes), seconds and bars, so converting a position is a
+``bisect`` into those columns followed by closed-form math inside one
+segment instead of a walk over every section.
+
+A segment either holds its tempo or ramps linearly (per beat) to the tempo of
+the next point: for a ramp from ``t0`` to ``t1`` BPM over ``L`` beats, the
+time to reach beat ``x`` is ``60 * L / (t1 - t0) * ln(1 + (t1 - t0) * x / (L * t0))``.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
+
+
+def bar_length(num: int, den_pow: int) -> float:
+    """Bar length in quarter-note beats for a ``num / 2**den_pow`` meter."""
+    return num * 4.0 / (1 << den_pow)
+
+
+@dataclass(frozen=True)
+class Segment:
+    beat: float  # start, in quarter-note beats
+    next_beat: float  # start of the next segment (song end for the last one)
+    secs: float  # start, in seconds
+    bar: float  # start, in bars since the song start
+    bpm: float  # tempo at the start
+    end_bpm: float  # tempo at the next point (== bpm unless ramped)
+    num: int
+    den_pow: int
+
+    @property
+    def ramp(self) -> bool:
+        return self.end_bpm != self.bpm
+
+    @property
+    def bar_len(self) -> float:
+        return bar_length(self.num, self.den_pow)
+
+
+class Timeline:
+    def __init__(self, points: list[tuple[float, float, bool, int, int]], total_beats: float) -> None:
+        """``points`` are ``(beat, bpm, ramp, num, den_pow)``, sorted by beat, first at 0.
+
+        A ramped point glides to the next point's tempo; the last point never ramps.
+        """
+        if not points or points[0][0] != 0:
+            raise ValueError("a timeline needs a first point at beat 0")
+        self.total_beats = total_beats
+        self.segments: list[Segment] = []
+        secs = bar = 0.0
+        for i, (beat, bpm, ramp, num, den_pow) in enumerate(points):
+            if self.segments:
+                prev = self.segments[-1]
+                secs += self._span_secs(prev, beat - prev.beat)
+                bar += (beat - prev.beat) / prev.bar_len
+            last = i + 1 == len(points)
+            next_beat = total_beats if last else points[i + 1][0]
+            end_bpm = bpm if last or not ramp else points[i + 1][1]
+            self.segments.append(Segment(beat, next_beat, secs, bar, bpm, end_bpm, num, den_pow))
+        # Parallel start columns for bisect.
+        self._beats = [s.beat for s in self.segments]
+        self._secs = [s.secs for s in self.segments]
+        self._bars = [s.bar for s in self.segments]
+        self.total_secs = self.beat_to_secs(total_beats)
+
+    @classmethod
+    def from_sections(cls, bpm: float, sections: list[dict]) -> Timeline:
+        """Build from spec sections (``bpm``/``ramp``/``ts_num``/``ts_den_pow`` keys).
+
+        A section without ``bpm`` keeps the tempo in effect; ``ramp`` glides
+        from the section's tempo to the next section's across the section.
+        """
+        points: list[tuple[float, float, bool, int, int]] = []
+        beat = 0.0
+        tempo = bpm
+        for sec in sections:
+            tempo = sec.get("bpm", tempo)
+            state = (tempo, bool(sec.get("ramp")), sec["ts_num"], sec.get("ts_den_pow", 2))
+            if not points or points[-1][1:] != state or state[1]:
+                points.append((beat, *state))
+            beat += sec["bars"] * bar_length(state[2], state[3])
+        if points[-1][2]:
+            points[-1] = (*points[-1][:2], False, *points[-1][3:])
+        return cls(points, beat)
+
+    @staticmethod
+    def _span_secs(seg: Segment, beats: float) -> float:
+        """Seconds taken by the first ``beats`` beats of ``seg``."""
+        if not seg.ramp:
+            return beats * 60.0 / seg.bpm
+        length = seg.next_beat - seg.beat
+        slope = (seg.end_bpm - seg.bpm) / length
+        return 60.0 / slope * math.log1p(slope * beats / seg.bpm)
+
+    @staticmethod
+    def _span_beats(seg: Segment, secs: float) -> float:
+        """Beats covered in the first ``secs`` seconds of ``seg``."""
+        if not seg.ramp:
+            return secs * seg.bpm / 60.0
+        length = seg.next_beat - seg.beat
+        slope = (seg.end_bpm - seg.bpm) / length
+        return seg.bpm * math.expm1(secs * slope / 60.0) / slope
+
+    def segment_at_beat(self, beat: float) -> Segment:
+        return self.segments[max(bisect_right(self._beats, beat) - 1, 0)]
+
+    def segment_at_secs(self, secs: float) -> Segment:
+        return self.segments[max(bisect_right(self._secs, secs) - 1, 0)]
+
+    def beat_to_secs(self, beat: float) -> float:
+        seg = self.segment_at_beat(beat)
+        return seg.secs + self._span_secs(seg, beat - seg.beat)
+
+    def secs_to_beat(self, secs: float) -> float:
+        seg = self.segment_at_secs(secs)
+        return seg.beat + self._span_beats(seg, secs - seg.secs)
+
+    def bar_to_beat(self, bar: float) -> float:
+        """Beat at a (0-based, possibly fractional) bar position."""
+        seg = self.segments[max(bisect_right(self._bars, bar) - 1, 0)]
+        return seg.beat + (bar - seg.bar) * seg.bar_len
+
+    def beat_to_bar(self, beat: float) -> float:
+        seg = self.segment_at_beat(beat)
+        return seg.bar + (beat - seg.beat) / seg.bar_len
+
+    def tempo_at(self, beat: float) -> float:
+        seg = self.segment_at_beat(beat)
+        if not seg.ramp:
+            return seg.bpm
+        return seg.bpm + (seg.end_bpm - seg.bpm) * (beat - seg.beat) / (seg.next_beat - seg.beat)
+
+    def tempo_steps(self, step: float = 0.25) -> list[tuple[float, float]]:
+        """``(beat, bpm)`` changes for formats without ramps (e.g. SMF).
+
+        A ramp is cut into ``step``-beat pieces, each at the constant tempo
+        that takes exactly as long as the ramp does over that piece, so
+        positions on the step grid land where the timeline puts them.
+        """
+        out: list[tuple[float, float]] = []
+        for seg in self.segments:
+            if not seg.ramp:
+                if not out or out[-1][1] != seg.bpm:
+                    out.append((seg.beat, seg.bpm))
+                continue
+            length = seg.next_beat - seg.beat
+            pieces = max(1, math.ceil(length / step - 1e-9))
+            for k in range(pieces):
+                a = seg.beat + length * k / pieces
+                b = seg.beat + length * (k + 1) / pieces
+                out.append((a, 60.0 * (b - a) / (self.beat_to_secs(b) - self.beat_to_secs(a))))
+        return out
+
+    def meter_changes(self) -> list[tuple[float, int, int]]:
+        """``(beat, num, den_pow)`` wherever the time signature changes."""
+        out: list[tuple[float, int, int]] = []
+        for seg in self.segments:
+            if not out or out[-1][1:] != (seg.num, seg.den_pow):
+                out.append((seg.beat, seg.num, seg.den_pow))
+        return out
@@ -1,9 +1,48 @@
 #!/usr/bin/env python3
-"""Validate expected album file coverage for MIDI and REAPER projects."""
+"""Validate the album catalog: coverage, content and freshness of MIDI and REAPER files.
 
-from pathlib import Path
+Every spec, ``.rpp`` and ``.mid`` gets an entry in a JSON manifest
+(``catalog.manifest.json``) holding its size, mtime, SHA-256 and the facts
+the checks need (BPM, section count, length). A file whose size and mtime
+still match its entry is not opened again, so a warm run costs one ``stat``
+per file; only changed files are re-hashed and re-read.
+
+Each artifact entry also records the hash of the spec it was generated
+from: the spec current when its bytes were first seen, or when it was last
+rewritten (even with identical bytes) after a spec edit. The checks are:
+
+- the file exists and is not empty, and parses;
+- ``.rpp``: project tempo, region count and song length match the spec;
+- ``.mid``: first tempo matches the spec and the file does not run past
+  the spec's end;
+- stale: the spec changed since the artifact was recorded but the artifact
+  did not (regenerate it, or ``--accept`` the current state).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import struct
 import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import instrument
+from make_midi import midi_stem
+from rpp_chunks import DEFAULT_INDEXED_KEYS, RppProject
+from song_spec import SPEC_DIR, load_song, spec_paths
+from timeline import Timeline
 
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_MANIFEST = REPO_ROOT / "catalog.manifest.json"
+MANIFEST_VERSION = 1
+
+# Seconds of disagreement tolerated between a file's length and the spec's.
+LENGTH_TOLERANCE = 0.005
 
 EXPECTED_RPP = [
     "01_Static_Bloom.rpp",
@@ -53,30 +92,302 @@ EXPECTED_MIDI = [
     "14_politician_drums.mid",
 ]
 
+_RPP_KEYS = DEFAULT_INDEXED_KEYS | {"TEMPO"}
+
+
+@dataclass
+class Stats:
+    stats: int = 0
+    hashed: int = 0
+    parsed: int = 0
+
+
+def file_sha256(path: Path) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
+# --- facts ----------------------------------------------------------------
+
+
+def spec_facts(path: Path) -> dict:
+    _filename, _title, bpm, sections = load_song(path)
+    timeline = Timeline.from_sections(bpm, sections)
+    steps = timeline.tempo_steps()
+    return {
+        "bpm": bpm,
+        "sections": len(sections),
+        "beats": timeline.total_beats,
+        "secs": round(timeline.total_secs, 6),
+        "first_tempo": round(60_000_000 / steps[0][1]),
+    }
+
+
+def rpp_facts(path: Path) -> dict:
+    """Tempo (``TEMPO`` line, else the first tempo-envelope point), regions and song end."""
+    with RppProject.from_path(path, _RPP_KEYS) as project:
+        tempo = project.root.fields.get("TEMPO")
+        if not tempo:
+            envelope = next(project.root.find("TEMPOENVEX"), None)
+            tempo = envelope.fields.get("PT", [])[:1] if envelope else []
+            tempo = [t.split(" ", 1)[1] for t in tempo]
+        regions = project.regions
+    ends = [r.end for r in regions]
+    return {
+        "bpm": float(tempo[0].split()[0]) if tempo else None,
+        "sections": len(regions),
+        # Markers without an end (older scaffolds) say nothing about the song length.
+        "secs": max(ends) if ends and None not in ends else None,
+    }
+
+
+def _read_vlq(data: bytes, i: int) -> tuple[int, int]:
+    """Decode the variable-length quantity at ``data[i]``; returns (value, next index)."""
+    value = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, i
+
+
+def smf_facts(data: bytes) -> dict:
+    """Tracks, PPQ, first tempo (us per quarter) and last end-of-track tick of a .mid file."""
+    if data[:4] != b"MThd":
+        raise ValueError("not a Standard MIDI File")
+    length, _format, ntracks, ppq = struct.unpack(">IHHH", data[4:14])
+    pos = 8 + length
+    first_tempo = None
+    end_tick = 0
+    for _ in range(ntracks):
+        if data[pos : pos + 4] != b"MTrk":
+            raise ValueError(f"expected MTrk at byte {pos}")
+        (size,) = struct.unpack(">I", data[pos + 4 : pos + 8])
+        i, stop = pos + 8, pos + 8 + size
+        tick = 0
+        running = 0
+        while i < stop:
+            delta, i = _read_vlq(data, i)
+            tick += delta
+            status = data[i]
+            if status == 0xFF:
+                kind = data[i + 1]
+                n, i = _read_vlq(data, i + 2)
+                if kind == 0x51 and first_tempo is None and tick == 0:
+                    first_tempo = int.from_bytes(data[i : i + 3], "big")
+                i += n
+            elif status in (0xF0, 0xF7):
+                n, i = _read_vlq(data, i + 1)
+                i += n
+            else:
+                if status & 0x80:
+                    running = status
+                    i += 1
+                i += 1 if (running & 0xF0) in (0xC0, 0xD0) else 2
+        end_tick = max(end_tick, tick)
+        pos = stop
+    return {"tracks": ntracks, "ppq": ppq, "first_tempo": first_tempo, "end_tick": end_tick}
+
+
+def mid_facts(path: Path) -> dict:
+    return smf_facts(path.read_bytes())
+
+
+FACTS = {".json": spec_facts, ".rpp": rpp_facts, ".mid": mid_facts}
+
 
-def check_files(root: Path, folder: str, expected: list[str]) -> list[str]:
-    target = root / folder
-    missing = []
-    for name in expected:
-        if not (target / name).exists():
-            missing.append(f"{folder}/{name}")
-    return missing
+# --- manifest ---------------------------------------------------------------
+
+
+def load_manifest(path: Path) -> dict:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "files": {}}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "files": {}}
+    manifest.setdefault("files", {})
+    return manifest
+
+
+def save_manifest(path: Path, manifest: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def refresh(path: Path, key: str, files: dict, stats: Stats, full: bool = False) -> tuple[dict | None, str]:
+    """Bring ``files[key]`` up to date with ``path``.
+
+    Returns ``(entry, state)``: state is ``"missing"``, ``"cached"`` (size
+    and mtime unchanged), ``"touched"`` (same bytes, new mtime) or
+    ``"changed"``. Facts are recomputed only for changed files; a file that
+    does not parse gets ``error`` instead of facts.
+    """
+    stats.stats += 1
+    try:
+        with instrument.span("stat"):
+            st = os.stat(path)
+    except OSError:
+        files.pop(key, None)
+        return None, "missing"
+    entry = files.get(key)
+    if not full and entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+        return entry, "cached"
+
+    stats.hashed += 1
+    with instrument.span("hash"):
+        digest = file_sha256(path)
+    instrument.count(bytes=st.st_size)
+    if entry and entry["sha256"] == digest and not full:
+        entry["mtime_ns"] = st.st_mtime_ns
+        return entry, "touched"
+
+    stats.parsed += 1
+    new = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    if not st.st_size:
+        new["error"] = "empty file"
+    else:
+        try:
+            with instrument.span(f"parse {path.suffix}"):
+                new["facts"] = FACTS[path.suffix](path)
+        except (OSError, ValueError, IndexError, struct.error) as exc:
+            new["error"] = str(exc).splitlines()[0]
+    if entry and entry["sha256"] == digest and "spec_sha256" in entry:
+        new["spec_sha256"] = entry["spec_sha256"]
+    files[key] = new
+    return new, "changed"
+
+
+# --- checks -----------------------------------------------------------------
+
+
+def artifact_problems(key: str, entry: dict | None, spec: dict | None, accept: bool) -> list[str]:
+    if entry is None:
+        return [f"{key}: missing"]
+    if not entry["size"]:
+        return [f"{key}: empty file"]
+    if "error" in entry:
+        return [f"{key}: cannot be read ({entry['error']})"]
+    if spec is None:
+        return [f"{key}: no spec for this file"]
+    if "error" in spec:
+        return [f"{key}: spec cannot be read ({spec['error']})"]
+
+    problems = []
+    facts, want = entry["facts"], spec["facts"]
+    if key.endswith(".rpp"):
+        if facts["bpm"] != want["bpm"]:
+            problems.append(f"{key}: tempo {facts['bpm']} BPM, spec says {want['bpm']:g}")
+        if facts["sections"] != want["sections"]:
+            problems.append(f"{key}: {facts['sections']} regions, spec has {want['sections']} sections")
+        elif facts["secs"] is not None and abs(facts["secs"] - want["secs"]) > LENGTH_TOLERANCE:
+            problems.append(f"{key}: {facts['secs']:.3f} s long, spec says {want['secs']:.3f} s")
+    else:
+        # DAW exports may truncate rather than round microseconds per quarter.
+        if facts["first_tempo"] is None or abs(facts["first_tempo"] - want["first_tempo"]) > 1:
+            bpm = 60_000_000 / facts["first_tempo"] if facts["first_tempo"] else 0
+            problems.append(f"{key}: starts at {bpm:.2f} BPM, spec says {60_000_000 / want['first_tempo']:.2f}")
+        # Exports may end on the last note-off, so only running past the song end is drift.
+        end_tick = round(want["beats"] * facts["ppq"])
+        if facts["end_tick"] > end_tick:
+            problems.append(f"{key}: ends at tick {facts['end_tick']}, past the spec's end at {end_tick}")
+
+    if accept or "spec_sha256" not in entry:
+        entry["spec_sha256"] = spec["sha256"]
+    elif entry["spec_sha256"] != spec["sha256"]:
+        problems.append(f"{key}: stale (spec changed since this file was generated)")
+    return problems
+
+
+def validate(
+    root: Path = REPO_ROOT,
+    spec_dir: Path = SPEC_DIR,
+    manifest_path: Path = DEFAULT_MANIFEST,
+    full: bool = False,
+    accept: bool = False,
+) -> tuple[list[str], Stats, bool]:
+    """Check every expected artifact against its spec; returns (problems, stats, manifest changed)."""
+    stats = Stats()
+    with instrument.span("load manifest"):
+        manifest = load_manifest(manifest_path)
+    files: dict = manifest["files"]
+    before = json.dumps(files, sort_keys=True)
+
+    specs: dict[str, dict] = {}
+    spec_keys = set()
+    with instrument.span("specs"):
+        for path in spec_paths(spec_dir):
+            key = f"specs/{path.name}"
+            spec_keys.add(key)
+            entry, _state = refresh(path, key, files, stats, full)
+            if entry is not None:
+                specs[path.stem] = entry
+
+    # Artifact -> the spec (file stem) it is generated from.
+    sources: dict[str, str] = {}
+    for stem in specs:
+        sources[f"reaper/{stem}.rpp"] = stem
+        for part in ("chords", "drums"):
+            sources[f"midi/{midi_stem(stem)}_{part}.mid"] = stem
+    expected = [f"reaper/{name}" for name in EXPECTED_RPP] + [f"midi/{name}" for name in EXPECTED_MIDI]
+    expected += sorted(set(sources) - set(expected))
+
+    problems = []
+    with instrument.span("artifacts"):
+        for key in expected:
+            entry, state = refresh(root / key, key, files, stats, full)
+            spec = specs.get(sources.get(key, ""))
+            # Rewritten with the same bytes after the spec was saved: regenerated, and unaffected.
+            rewritten = state == "touched" and spec is not None and entry["mtime_ns"] >= spec["mtime_ns"]
+            with instrument.span("check"):
+                problems.extend(artifact_problems(key, entry, spec, accept or rewritten))
+
+    # Forget files that are no longer part of the catalog.
+    for key in set(files) - set(expected) - spec_keys:
+        del files[key]
+
+    changed = json.dumps(files, sort_keys=True) != before
+    if changed:
+        with instrument.span("save manifest"):
+            save_manifest(manifest_path, manifest)
+    return problems, stats, changed
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--manifest", type=Path, default=DEFAULT_MANIFEST, help="Catalog manifest to use (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--spec-dir", type=Path, default=SPEC_DIR, help="Directory of per-song spec files (default: %(default)s)"
+    )
+    parser.add_argument("--full", action="store_true", help="Ignore cached sizes/mtimes and re-read every file")
+    parser.add_argument(
+        "--accept", action="store_true", help="Record the current specs as the source of every artifact"
+    )
+    instrument.add_arguments(parser, "validate_catalog")
+    return parser.parse_args()
 
 
 def main() -> int:
-    repo_root = Path(__file__).resolve().parents[2]
-    missing = []
-    missing.extend(check_files(repo_root, "reaper", EXPECTED_RPP))
-    missing.extend(check_files(repo_root, "midi", EXPECTED_MIDI))
-
-    if missing:
-        print("Missing files:")
-        for item in missing:
-            print(f"  - {item}")
-        return 1
-
-    print("OK: Catalog has all expected REAPER and MIDI files.")
-    return 0
+    args = parse_args()
+    with instrument.session(args, "validate_catalog"):
+        t0 = time.perf_counter()
+        problems, stats, _changed = validate(REPO_ROOT, args.spec_dir, args.manifest, args.full, args.accept)
+        elapsed = (time.perf_counter() - t0) * 1000
+        summary = f"{stats.stats} files checked, {stats.hashed} hashed, {stats.parsed} parsed  ({elapsed:.1f} ms)"
+
+        if problems:
+            print("Catalog problems:")
+            for item in problems:
+                print(f"  - {item}")
+            print(f"\n{summary}")
+            return 1
+
+        print(f"OK: Catalog has all expected REAPER and MIDI files, in step with the specs.\n{summary}")
+        return 0
 
 
 if __name__ == "__main__":
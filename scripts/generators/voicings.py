@@ -0,0 +1,230 @@
+"""Chord-symbol parser and voicing generator.
+
+``parse_chord("F#m7b5/E")`` turns a lead-sheet symbol into a root pitch
+class, a set of intervals above the root and an optional slash bass.
+``voicing()`` lays those intervals out as MIDI notes in a register, or, when
+given the previous chord's voicing, picks the inversion/octave that moves
+the fewest semitones from it. Results are memoised per
+(symbol, register, previous voicing), so rendering a whole album touches the
+parser once per distinct chord.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+PITCH_CLASSES = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+
+# Lowest MIDI note allowed for a voicing's root in close position (E3).
+DEFAULT_REGISTER = 52
+
+_SYMBOL = re.compile(r"^([A-G])([#b]?)(.*?)(?:/([A-G])([#b]?))?$")
+# Extensions and alterations, in the order they are consumed from the suffix.
+_TOKENS = re.compile(
+    r"maj13|maj11|maj9|maj7|M13|M11|M9|M7|Δ7|Δ|"
+    r"m7b5|ø7|ø|dim7|dim|o7|o|aug|\+|"
+    r"min|mi|m|-|"
+    r"sus2|sus4|sus|"
+    r"add9|add2|add11|add4|"
+    r"13|11|9|7|69|6|5|"
+    r"b5|#5|b9|#9|#11|b13|"
+    r"\(|\)|,|\s"
+)
+
+
+class ChordError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Chord:
+    symbol: str
+    root: int  # pitch class 0-11
+    intervals: tuple[int, ...]  # semitones above the root, ascending, root included
+    bass: int | None = None  # slash-bass pitch class
+
+
+def _pitch_class(letter: str, accidental: str) -> int:
+    pc = PITCH_CLASSES[letter]
+    if accidental == "#":
+        pc += 1
+    elif accidental == "b":
+        pc -= 1
+    return pc % 12
+
+
+@lru_cache(maxsize=None)
+def parse_chord(symbol: str) -> Chord:
+    match = _SYMBOL.match(symbol.strip())
+    if not match:
+        raise ChordError(f"Cannot parse chord symbol {symbol!r}")
+    letter, accidental, suffix, bass_letter, bass_accidental = match.groups()
+    root = _pitch_class(letter, accidental)
+    bass = _pitch_class(bass_letter, bass_accidental) if bass_letter else None
+
+    third, fifth, seventh = 4, 7, None
+    extra: set[int] = set()
+    drop: set[int] = set()
+    pos = 0
+    while pos < len(suffix):
+        token_match = _TOKENS.match(suffix, pos)
+        if not token_match or token_match.end() == pos:
+            raise ChordError(f"Cannot parse chord symbol {symbol!r} (stuck at {suffix[pos:]!r})")
+        token = token_match.group(0)
+        pos = token_match.end()
+        if token in ("min", "mi", "m", "-"):
+            third = 3
+        elif token in ("maj7", "M7", "Δ7", "Δ"):
+            seventh = 11
+        elif token in ("maj9", "M9"):
+            seventh = 11
+            extra.add(14)
+        elif token in ("maj11", "M11"):
+            seventh = 11
+            extra |= {14, 17}
+        elif token in ("maj13", "M13"):
+            seventh = 11
+            extra |= {14, 21}
+        elif token in ("m7b5", "ø", "ø7"):
+            third, fifth, seventh = 3, 6, 10
+        elif token in ("dim", "o"):
+            third, fifth = 3, 6
+        elif token in ("dim7", "o7"):
+            third, fifth, seventh = 3, 6, 9
+        elif token in ("aug", "+"):
+            fifth = 8
+        elif token in ("sus4", "sus"):
+            third = 5
+        elif token == "sus2":
+            third = 2
+        elif token in ("add9", "add2"):
+            extra.add(14)
+        elif token in ("add11", "add4"):
+            extra.add(17)
+        elif token == "5":
+            drop.add(third)
+        elif token == "6":
+            extra.add(9)
+        elif token == "69":
+            extra |= {9, 14}
+        elif token == "7":
+            if seventh is None:
+                seventh = 10
+        elif token == "9":
+            seventh = 10 if seventh is None else seventh
+            extra.add(14)
+        elif token == "11":
+            seventh = 10 if seventh is None else seventh
+            extra |= {14, 17}
+        elif token == "13":
+            seventh = 10 if seventh is None else seventh
+            extra |= {14, 21}
+        elif token == "b5":
+            fifth = 6
+        elif token == "#5":
+            fifth = 8
+        elif token == "b9":
+            extra.discard(14)
+            extra.add(13)
+        elif token == "#9":
+            extra.discard(14)
+            extra.add(15)
+        elif token == "#11":
+            extra.discard(17)
+            extra.add(18)
+        elif token == "b13":
+            extra.discard(21)
+            extra.add(20)
+        # "(", ")", "," and whitespace only group alterations.
+
+    intervals = {0, third, fifth} | extra
+    if seventh is not None:
+        intervals.add(seventh)
+    intervals -= drop
+    return Chord(symbol=symbol, root=root, intervals=tuple(sorted(intervals)), bass=bass)
+
+
+def close_voicing(chord: Chord, register: int = DEFAULT_REGISTER) -> tuple[int, ...]:
+    """Root-position voicing with the root in ``[register, register + 12)``."""
+    root = register + (chord.root - register) % 12
+    notes = [root + i for i in chord.intervals]
+    if chord.bass is not None and chord.bass != chord.root:
+        notes.insert(0, root - 12 + (chord.bass - chord.root) % 12)
+    return tuple(notes)
+
+
+def candidates(chord: Chord, register: int = DEFAULT_REGISTER) -> list[tuple[int, ...]]:
+    """Every inversion of the close voicing, in the octave around ``register``.
+
+    A slash bass stays the lowest note; only the upper structure inverts,
+    and only inversions that stay above the bass are offered.
+    """
+    base = close_voicing(chord, register)
+    bass, upper = (base[:1], list(base[1:])) if chord.bass not in (None, chord.root) else ((), list(base))
+    out = []
+    for shift in (-12, 0, 12):
+        notes = [n + shift for n in upper]
+        for _ in range(len(upper)):
+            lowest = notes[0]
+            if register - 7 <= lowest < register + 12 and (not bass or lowest > bass[0]):
+                out.append(tuple(bass) + tuple(notes))
+            notes = notes[1:] + [notes[0] + 12]
+    return out or [base]
+
+
+def movement(a: tuple[int, ...], b: tuple[int, ...]) -> int:
+    """Semitones of motion between two voicings (nearest-note, both directions)."""
+    if not a or not b:
+        return 0
+    return sum(min(abs(x - y) for y in b) for x in a) + sum(min(abs(x - y) for x in a) for y in b)
+
+
+@lru_cache(maxsize=4096)
+def voicing(symbol: str, register: int = DEFAULT_REGISTER, previous: tuple[int, ...] | None = None) -> tuple[int, ...]:
+    """MIDI notes for ``symbol``; nearest to ``previous`` when that is given."""
+    chord = parse_chord(symbol)
+    if previous is None:
+        return close_voicing(chord, register)
+    return min(candidates(chord, register), key=lambda v: (movement(v, previous), v))
+
+
+@lru_cache(maxsize=None)
+def chord_candidates(symbol: str, register: int = DEFAULT_REGISTER) -> tuple[tuple[int, ...], ...]:
+    return tuple(candidates(parse_chord(symbol), register))
+
+
+_step = lru_cache(maxsize=None)(movement)
+
+
+def lead_voices(
+    symbols: list[str], previous: tuple[int, ...] | None = None, register: int = DEFAULT_REGISTER
+) -> list[tuple[int, ...]]:
+    """One voicing per symbol, minimising total movement over the whole run.
+
+    Dynamic programming over each chord's candidate set (Viterbi): the cost
+    of a voicing is the cheapest path to it from ``previous`` plus its own
+    step. Ties go to the earlier candidate, so the result is deterministic.
+    """
+    if not symbols:
+        return []
+    layers = [chord_candidates(s, register) for s in symbols]
+    cost = [_step(v, previous) if previous else 0 for v in layers[0]]
+    back: list[list[int]] = []
+    for before, layer in zip(layers, layers[1:]):
+        pointers = []
+        step_cost = []
+        for v in layer:
+            j = min(range(len(before)), key=lambda k: cost[k] + _step(before[k], v))
+            pointers.append(j)
+            step_cost.append(cost[j] + _step(before[j], v))
+        back.append(pointers)
+        cost = step_cost
+    i = min(range(len(cost)), key=cost.__getitem__)
+    path = [layers[-1][i]]
+    for layer, pointers in zip(reversed(layers[:-1]), reversed(back)):
+        i = pointers[i]
+        path.append(layer[i])
+    path.reverse()
+    return path